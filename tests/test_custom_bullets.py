@@ -0,0 +1,67 @@
+"""
+项目符号测试：没有numbering.xml的文档也能添加项目符号
+"""
+
+import os
+import tempfile
+import unittest
+
+import docx
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+
+from utils.advanced_formatting import add_custom_bullets
+
+
+class CustomBulletsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "a.docx")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_creates_numbering_part_when_missing(self):
+        doc = docx.Document()
+        doc.add_paragraph("第一项")
+        doc.add_paragraph("第二项")
+        for r_id, rel in list(doc.part.rels.items()):
+            if rel.reltype == RT.NUMBERING:
+                doc.part.drop_rel(r_id)
+        doc.save(self.path)
+        with self.assertRaises(NotImplementedError):
+            docx.Document(self.path).part.numbering_part
+        
+        result = add_custom_bullets(self.path, [0, 1], "disc")
+        self.assertTrue(result.startswith("成功"), result)
+        
+        doc = docx.Document(self.path)
+        num_ids = {p._p.pPr.numPr.numId.val for p in doc.paragraphs}
+        self.assertEqual(len(num_ids), 1)
+        numbering = doc.part.numbering_part.element
+        self.assertEqual(numbering.num_having_numId(num_ids.pop()).abstractNumId.val, 0)
+
+
+    def test_rejects_invalid_color(self):
+        docx.Document().save(self.path)
+        with open(self.path, "rb") as f:
+            original = f.read()
+        
+        result = add_custom_bullets(self.path, [0], "disc", font_color="red")
+        self.assertTrue(result.startswith("错误"), result)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), original)
+
+    def test_writes_valid_color(self):
+        doc = docx.Document()
+        doc.add_paragraph("第一项")
+        doc.save(self.path)
+        
+        result = add_custom_bullets(self.path, [0], "disc", font_color="#ff0000")
+        self.assertTrue(result.startswith("成功"), result)
+        numbering = docx.Document(self.path).part.numbering_part.element
+        colors = numbering.xpath("./w:abstractNum/w:lvl/w:rPr/w:color/@w:val")
+        self.assertIn("FF0000", colors)
+
+
+if __name__ == "__main__":
+    unittest.main()
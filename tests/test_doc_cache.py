@@ -0,0 +1,104 @@
+"""
+文档缓存测试：未写盘的修改在出错、淘汰和进程退出时不会丢失
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import docx
+
+from utils import _doc_cache
+from utils._doc_cache import get_doc, mark_dirty, evict, discard, flush_all
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _make_docx(path: str, text: str = "原文") -> None:
+    doc = docx.Document()
+    doc.add_paragraph(text)
+    doc.save(path)
+
+
+def _texts(path: str):
+    return [p.text for p in docx.Document(path).paragraphs]
+
+
+class DocCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "a.docx")
+        _make_docx(self.path)
+
+    def tearDown(self):
+        discard(self.path)
+        self.tmp.cleanup()
+
+    def _edit_without_saving(self, text: str):
+        doc = get_doc(self.path)
+        doc.add_paragraph(text)
+        mark_dirty(doc, self.path)
+        return doc
+
+    def test_evict_keeps_dirty_document(self):
+        doc = self._edit_without_saving("延迟保存")
+        # 之后某次调用出错时调用方会evict，未写盘的修改应当保留
+        evict(self.path)
+        self.assertIs(get_doc(self.path), doc)
+        self.assertEqual(flush_all(), 1)
+        self.assertEqual(_texts(self.path), ["原文", "延迟保存"])
+
+    def test_discard_drops_changes(self):
+        self._edit_without_saving("放弃")
+        discard(self.path)
+        self.assertEqual(flush_all(), 0)
+        self.assertEqual(_texts(self.path), ["原文"])
+
+    def test_lru_eviction_saves_dirty_document(self):
+        self._edit_without_saving("淘汰前写盘")
+        others = []
+        for i in range(_doc_cache._MAX_ENTRIES):
+            other = os.path.join(self.tmp.name, f"other{i}.docx")
+            _make_docx(other)
+            get_doc(other)
+            others.append(other)
+        try:
+            self.assertEqual(_texts(self.path), ["原文", "淘汰前写盘"])
+        finally:
+            for other in others:
+                discard(other)
+
+    def test_failed_eviction_save_keeps_document_dirty(self):
+        doc = self._edit_without_saving("保存失败")
+        others = []
+        with mock.patch.object(_doc_cache, "save_document", side_effect=OSError("磁盘已满")):
+            for i in range(_doc_cache._MAX_ENTRIES):
+                other = os.path.join(self.tmp.name, f"other{i}.docx")
+                _make_docx(other)
+                get_doc(other)
+                others.append(other)
+        try:
+            self.assertIs(get_doc(self.path), doc)
+            flush_all()
+            self.assertEqual(_texts(self.path), ["原文", "保存失败"])
+        finally:
+            for other in others:
+                discard(other)
+
+    def test_pending_changes_written_at_exit(self):
+        script = (
+            "import sys\n"
+            "from utils._doc_cache import get_doc, mark_dirty\n"
+            "doc = get_doc(sys.argv[1])\n"
+            "doc.add_paragraph('退出时写盘')\n"
+            "mark_dirty(doc, sys.argv[1])\n"
+        )
+        subprocess.run([sys.executable, "-c", script, self.path], cwd=ROOT, check=True)
+        self.assertEqual(_texts(self.path), ["原文", "退出时写盘"])
+
+
+if __name__ == "__main__":
+    unittest.main()
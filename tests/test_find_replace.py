@@ -0,0 +1,48 @@
+"""
+查找替换测试：整词匹配时，紧跟在制表符或换行后的词也能被替换
+"""
+
+import os
+import tempfile
+import unittest
+
+import docx
+
+from utils._doc_cache import discard, flush
+from utils.edit_operations import find_and_replace_text
+
+
+class FindReplaceWholeWordTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "a.docx")
+        doc = docx.Document()
+        doc.add_paragraph("Item\tPrice")
+        doc.add_paragraph("line1\nword")
+        doc.add_paragraph("Prices and swords")
+        doc.save(self.path)
+
+    def tearDown(self):
+        discard(self.path)
+        self.tmp.cleanup()
+
+    def _texts(self):
+        return [p.text for p in docx.Document(self.path).paragraphs]
+
+    def _check(self, save: bool):
+        for find_text, replace_text in (("Price", "Cost"), ("word", "text")):
+            result = find_and_replace_text(self.path, find_text, replace_text, match_whole_word=True, save=save)
+            self.assertEqual(result, "成功在文档 a.docx 中替换了 1 处文本")
+        flush(self.path)
+        self.assertEqual(self._texts(), ["Item\tCost", "line1\ntext", "Prices and swords"])
+
+    def test_whole_word_after_tab_and_break(self):
+        # 文档不在缓存中，只解析document.xml
+        self._check(save=True)
+
+    def test_whole_word_after_tab_and_break_cached(self):
+        self._check(save=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+合并文档测试：图表等非图片的内部关系连同目标部件一起复制到主文档
+"""
+
+import os
+import tempfile
+import unittest
+import zipfile
+
+import docx
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.opc.part import Part
+from docx.oxml.parser import parse_xml
+
+from utils.document_formatting import merge_documents, _append_body_elements, _PARALLEL_MERGE_MIN_FILES
+
+_CT_CHART = "application/vnd.openxmlformats-officedocument.drawingml.chart+xml"
+_CT_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+_CHART_XML = (
+    '<c:chartSpace xmlns:c="http://schemas.openxmlformats.org/drawingml/2006/chart" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<c:externalData r:id="rId1"/></c:chartSpace>'
+)
+_CHART_RUN = (
+    '<w:r xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:c="http://schemas.openxmlformats.org/drawingml/2006/chart" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<w:drawing><wp:inline><wp:extent cx="1" cy="1"/><wp:docPr id="1" name="chart"/>'
+    '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/chart">'
+    '<c:chart r:id="{rId}"/></a:graphicData></a:graphic></wp:inline></w:drawing></w:r>'
+)
+
+
+def _make_chart_docx(path: str, label: str) -> None:
+    """生成正文含一个图表的文档，图表引用一个嵌入的工作簿"""
+    doc = docx.Document()
+    package = doc.part.package
+    chart = Part(PackURI("/word/charts/chart1.xml"), _CT_CHART, _CHART_XML.encode(), package)
+    workbook = Part(PackURI("/word/embeddings/Workbook1.xlsx"), _CT_XLSX, label.encode(), package)
+    chart.rels.add_relationship(RT.PACKAGE, workbook, "rId1")
+    rId = doc.part.relate_to(chart, RT.CHART)
+    doc.add_paragraph(label)._p.append(parse_xml(_CHART_RUN.format(rId=rId)))
+    doc.save(path)
+
+
+def _charts(path: str):
+    """返回主文档中每个图表引用对应的嵌入工作簿内容"""
+    doc = docx.Document(path)
+    result = []
+    for el in doc.element.body.iter("{http://schemas.openxmlformats.org/drawingml/2006/chart}chart"):
+        rId = el.get("{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id")
+        chart = doc.part.related_parts[rId]
+        result.append(chart.rels["rId1"].target_part.blob.decode())
+    return result
+
+
+class MergeDocumentsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.main = os.path.join(self.tmp.name, "main.docx")
+        _make_chart_docx(self.main, "主文档")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _sources(self, count: int):
+        paths = []
+        for i in range(count):
+            path = os.path.join(self.tmp.name, f"src{i}.docx")
+            _make_chart_docx(path, f"源文档{i}")
+            paths.append(path)
+        return paths
+
+    def test_stream_merge_copies_charts(self):
+        result = merge_documents(self.main, self._sources(2))
+        self.assertTrue(result.startswith("成功"), result)
+        self.assertEqual(_charts(self.main), ["主文档", "源文档0", "源文档1"])
+        with zipfile.ZipFile(self.main) as zf:
+            self.assertEqual(zf.testzip(), None)
+
+    def test_parallel_merge_copies_charts(self):
+        result = merge_documents(self.main, self._sources(_PARALLEL_MERGE_MIN_FILES))
+        self.assertTrue(result.startswith("成功"), result)
+        expected = ["主文档"] + [f"源文档{i}" for i in range(_PARALLEL_MERGE_MIN_FILES)]
+        self.assertEqual(_charts(self.main), expected)
+
+    def test_append_body_elements_copies_charts(self):
+        main_doc = docx.Document(self.main)
+        _append_body_elements(main_doc, docx.Document(self._sources(1)[0]))
+        main_doc.save(self.main)
+        self.assertEqual(_charts(self.main), ["主文档", "源文档0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
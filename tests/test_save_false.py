@@ -0,0 +1,66 @@
+"""
+save=False延迟保存测试：导出、转换和进程退出时都能看到未写盘的修改
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import docx
+
+from utils._doc_cache import discard
+from utils.batch_paragraph_operations import batch_add_formatted_paragraphs
+from utils.saveMethod import save_document_as
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _texts(path: str):
+    return [p.text for p in docx.Document(path).paragraphs]
+
+
+class SaveFalseTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "a.docx")
+        doc = docx.Document()
+        doc.add_paragraph("原文")
+        doc.save(self.path)
+
+    def tearDown(self):
+        discard(self.path)
+        self.tmp.cleanup()
+
+    def _add_without_saving(self, text: str):
+        result = batch_add_formatted_paragraphs(self.path, [{"text": text}], save=False)
+        self.assertTrue(result.startswith("成功"), result)
+
+    def test_export_txt_sees_pending_changes(self):
+        self._add_without_saving("延迟保存")
+        result = save_document_as(self.path, "txt")
+        self.assertTrue(result.startswith("成功"), result)
+        with open(os.path.join(self.tmp.name, "a.txt"), encoding="utf-8") as f:
+            self.assertIn("延迟保存", f.read())
+
+    def test_export_docx_copy_sees_pending_changes(self):
+        self._add_without_saving("延迟保存")
+        result = save_document_as(self.path, "docx", "b")
+        self.assertTrue(result.startswith("成功"), result)
+        self.assertEqual(_texts(os.path.join(self.tmp.name, "b.docx")), ["原文", "延迟保存"])
+
+    def test_pending_changes_written_at_exit(self):
+        script = (
+            "import sys\n"
+            "from utils.batch_paragraph_operations import batch_add_formatted_paragraphs\n"
+            "print(batch_add_formatted_paragraphs(sys.argv[1], [{'text': '退出时写盘'}], save=False))\n"
+        )
+        out = subprocess.run([sys.executable, "-c", script, self.path], cwd=ROOT,
+                             check=True, capture_output=True, text=True).stdout
+        self.assertTrue(out.startswith("成功"), out)
+        self.assertEqual(_texts(self.path), ["原文", "退出时写盘"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+"""
+颜色工具模块 - 十六进制颜色字符串解析
+"""
+
+import re
+from typing import Tuple
+
+_HEX_COLOR_RE = re.compile(r'#?[0-9A-Fa-f]{6}')
+
+
+def is_hex_color(color: str) -> bool:
+    """是否为"#RRGGBB"或"RRGGBB"形式的颜色字符串"""
+    return _HEX_COLOR_RE.fullmatch(color) is not None
+
+
+def hex_to_rgb_int(color: str) -> int:
+    """
+    将"#RRGGBB"形式的颜色转换为整数（供COM接口的RGB属性使用）。
+
+    Raises:
+        ValueError: 颜色字符串不是合法的十六进制
+    """
+    return int.from_bytes(bytes.fromhex(color.lstrip('#')), 'big')
+
+
+def hex_to_rgb_tuple(color: str) -> Tuple[int, int, int]:
+    """
+    将"#RRGGBB"形式的颜色转换为 (r, g, b) 元组。
+
+    Raises:
+        ValueError: 颜色字符串不是合法的6位十六进制
+    """
+    r, g, b = bytes.fromhex(color.lstrip('#'))
+    return r, g, b
@@ -0,0 +1,223 @@
+"""
+文档对象缓存模块 - 在连续的多次调用之间复用已解析的python-docx文档
+
+同一个文件常被多个工具依次处理（设置页面、添加页眉页脚、统一格式……），
+每次都重新解析整个包的开销很大。这里按绝对路径缓存Document对象，并以文件的
+修改时间和大小作为校验：文件被其他方式（Word COM、直接改写XML等）修改后，
+缓存自动失效并重新解析。
+
+save_doc是即时写盘的，缓存只省去下一次调用的解析。对于调用方明确不保存的修改
+（例如save=False），可以用mark_dirty把修改保留在缓存中，之后由save_doc、
+flush或flush_all统一写盘，多次编辑只序列化一次；缓存已满被淘汰时也会先写盘，
+进程退出时自动调用flush_all。有未写盘修改的文档不会因为之后某次调用出错而被移出缓存。
+"""
+
+import atexit
+import io
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils._fast_docx import save_document
+from utils._paths import take_stat
+
+# 最多缓存的文档数量，超出后淘汰最久未使用的文档（有未写盘的修改时先保存）
+_MAX_ENTRIES = 8
+
+# 绝对路径 -> [Document, (st_mtime_ns, st_size), 是否有未写盘的修改]
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _stamp(path: str):
+    """文件的修改时间和大小，用于判断缓存是否仍然有效"""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def get_doc(path: str):
+    """
+    获取文件对应的Document对象，文件未变化时直接返回缓存。
+
+    Args:
+        path: docx文件路径
+
+    Returns:
+        Document对象
+    """
+    key = os.path.abspath(path)
+    # 路径检查时已经stat过的文件直接使用其结果
+    st = take_stat(key) or os.stat(key)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[1] == stamp:
+            _cache.move_to_end(key)
+            return entry[0]
+
+    from docx import Document
+    # 一次顺序读入整个文件，zip中各部件从内存中读取，不再逐个在磁盘（或网络文件系统）上定位
+    with open(key, 'rb') as f:
+        doc = Document(io.BytesIO(f.read()))
+    _store(key, doc, stamp)
+    return doc
+
+
+def peek_doc(path: str):
+    """
+    返回缓存中与文件一致的Document对象（可能带有未写盘的修改），不解析文件。
+
+    Returns:
+        Document对象；不在缓存中或文件已被修改时返回None
+    """
+    key = os.path.abspath(path)
+    try:
+        st = os.stat(key)
+    except OSError:
+        return None
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[1] == (st.st_mtime_ns, st.st_size):
+            _cache.move_to_end(key)
+            return entry[0]
+    return None
+
+
+def save_doc(doc, path: str, save_path: str = None, compression_level: int = 6) -> None:
+    """
+    保存文档，并把保存后的文件状态记入缓存。
+
+    Args:
+        doc: get_doc返回的Document对象
+        path: 文档的原路径
+        save_path: 输出路径，为None时覆盖原文件
+        compression_level: zip压缩级别（0-9）
+    """
+    key = os.path.abspath(path)
+    target = os.path.abspath(save_path) if save_path else key
+    save_document(doc, target, compression_level)
+    if target != key:
+        # 另存为时原文件未变，内存中的对象已与原文件不一致
+        discard(key)
+    _store(target, doc, _stamp(target))
+
+
+def mark_dirty(doc, path: str) -> None:
+    """记录文档有尚未写盘的修改，下次get_doc仍返回这个对象"""
+    key = os.path.abspath(path)
+    with _cache_lock:
+        entry = _cache.get(key)
+        stamp = entry[1] if entry is not None else None
+    _store(key, doc, stamp or _stamp(key), dirty=True)
+
+
+def flush(path: str) -> bool:
+    """
+    将文档未写盘的修改保存到文件。
+
+    Returns:
+        是否执行了保存
+    """
+    key = os.path.abspath(path)
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry is None or not entry[2]:
+        return False
+    save_doc(entry[0], key)
+    return True
+
+
+def _try_flush(path: str):
+    """flush的包装：返回 (是否执行了保存, 异常或None)，供批量保存时逐个收集失败"""
+    try:
+        return flush(path), None
+    except Exception as e:
+        return False, e
+
+
+def flush_all() -> int:
+    """
+    保存所有有未写盘修改的文档。
+
+    多个文档由线程池同时保存，zip压缩和文件写入期间不持有GIL，
+    各文档的写盘延迟可以相互重叠。某个文档保存失败时其余文档仍会保存，
+    失败的文档保留在缓存中（仍标记为未写盘）。
+
+    Returns:
+        保存的文档数量
+
+    Raises:
+        OSError: 有文档保存失败，异常信息中列出这些文档
+    """
+    with _cache_lock:
+        dirty_paths = [key for key, entry in _cache.items() if entry[2]]
+    if len(dirty_paths) <= 1:
+        results = [_try_flush(key) for key in dirty_paths]
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(dirty_paths), os.cpu_count() or 1)) as executor:
+            results = list(executor.map(_try_flush, dirty_paths))
+
+    failures = [f"{key}: {error}" for key, (_, error) in zip(dirty_paths, results) if error is not None]
+    if failures:
+        raise OSError("以下文档保存失败，修改仍保留在内存中: " + "; ".join(failures))
+    return sum(1 for saved, _ in results if saved)
+
+
+def evict(path: str) -> None:
+    """
+    操作出错后从缓存中移除文档，下次调用时重新解析文件。
+
+    文档有未写盘的修改（之前save=False的编辑）时保留在缓存中，这些修改不会因为
+    之后某次调用出错而丢失；需要明确放弃修改时使用discard。
+    """
+    with _cache_lock:
+        key = os.path.abspath(path)
+        entry = _cache.get(key)
+        if entry is not None and not entry[2]:
+            del _cache[key]
+
+
+def discard(path: str) -> None:
+    """从缓存中移除文档，未写盘的修改被丢弃（例如关闭文档时选择不保存）"""
+    with _cache_lock:
+        _cache.pop(os.path.abspath(path), None)
+
+
+def _store(key: str, doc, stamp, dirty: bool = False) -> None:
+    to_save = []
+    with _cache_lock:
+        _cache[key] = [doc, stamp, dirty]
+        _cache.move_to_end(key)
+        # 超出数量时淘汰最久未使用的文档；有未写盘修改的文档先保存，保存成功后才移除
+        excess = len(_cache) - _MAX_ENTRIES
+        for old_key in list(_cache)[:max(excess, 0)]:
+            old_entry = _cache[old_key]
+            if old_entry[2]:
+                to_save.append((old_key, old_entry))
+            else:
+                del _cache[old_key]
+    
+    # 在锁外写盘；保存失败时文档仍以未写盘状态留在缓存中，之后的flush会再次尝试
+    for old_key, old_entry in to_save:
+        try:
+            save_document(old_entry[0], old_key)
+        except Exception as e:
+            print(f"警告: 保存文档 {old_key} 失败，修改仍保留在内存中: {e}", file=sys.stderr)
+            continue
+        with _cache_lock:
+            # 保存期间文档又被使用或修改（条目已被替换）时不再移除
+            if _cache.get(old_key) is old_entry:
+                del _cache[old_key]
+
+
+def _flush_at_exit() -> None:
+    """进程退出时保存所有未写盘的修改，失败时输出到标准错误"""
+    try:
+        flush_all()
+    except Exception as e:
+        print(f"警告: {e}", file=sys.stderr)
+
+
+atexit.register(_flush_at_exit)
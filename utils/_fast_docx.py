@@ -0,0 +1,194 @@
+"""
+轻量级docx读写模块 - 只解析和回写word/document.xml
+
+对于只按索引修改段落的操作，不需要python-docx构建完整的包对象模型
+（样式、关系、图片等部件），直接处理主文档XML即可，内存占用和耗时都更低。
+"""
+
+import os
+import posixpath
+import shutil
+import tempfile
+import zipfile
+from contextlib import contextmanager
+
+from lxml import etree
+
+_RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_DEFAULT_MAIN_PART = "word/document.xml"
+
+
+@contextmanager
+def _replacing(target: str):
+    """
+    提供与目标文件同目录的临时文件路径，写入完成后原子地替换目标文件。
+
+    写入过程中出错时目标文件保持原样；替换后的文件沿用原文件的权限。
+    目标文件不存在时直接写入目标路径。
+    """
+    if not os.path.exists(target):
+        yield target
+        return
+    fd, tmp_path = tempfile.mkstemp(suffix=".docx", dir=os.path.dirname(os.path.abspath(target)))
+    os.close(fd)
+    try:
+        yield tmp_path
+        shutil.copymode(target, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def main_part_name(zf: zipfile.ZipFile) -> str:
+    """从_rels/.rels中查找主文档部件的名称"""
+    try:
+        rels = etree.fromstring(zf.read("_rels/.rels"))
+    except KeyError:
+        return _DEFAULT_MAIN_PART
+    for rel in rels.iter("{%s}Relationship" % _RELS_NS):
+        if rel.get("Type") == _OFFICE_DOCUMENT_REL:
+            return rel.get("Target", _DEFAULT_MAIN_PART).lstrip("/")
+    return _DEFAULT_MAIN_PART
+
+
+def part_rels(zf: zipfile.ZipFile, part_name: str) -> dict:
+    """
+    读取部件的关系文件。
+    
+    Args:
+        zf: 已打开的docx
+        part_name: 部件名称，例如"word/document.xml"
+    
+    Returns:
+        {rId: (关系类型, 目标, 是否为外部关系)}；内部关系的目标为包内的部件名称
+    """
+    base_dir, file_name = posixpath.split(part_name)
+    try:
+        rels = etree.fromstring(zf.read(posixpath.join(base_dir, "_rels", file_name + ".rels")))
+    except KeyError:
+        return {}
+    result = {}
+    for rel in rels.iter("{%s}Relationship" % _RELS_NS):
+        target = rel.get("Target", "")
+        is_external = rel.get("TargetMode") == "External"
+        if not is_external:
+            # 以/开头的目标相对于包根目录，其余相对于部件所在目录
+            if target.startswith("/"):
+                target = target.lstrip("/")
+            else:
+                target = posixpath.normpath(posixpath.join(base_dir, target))
+        result[rel.get("Id")] = (rel.get("Type"), target, is_external)
+    return result
+
+
+def content_types(zf: zipfile.ZipFile) -> dict:
+    """
+    读取[Content_Types].xml。
+    
+    Returns:
+        {部件名称: 内容类型}；未单独声明的部件以"*.扩展名"为键给出默认类型
+    """
+    try:
+        types = etree.fromstring(zf.read("[Content_Types].xml"))
+    except KeyError:
+        return {}
+    result = {}
+    for default in types.iter("{%s}Default" % _CONTENT_TYPES_NS):
+        result["*." + default.get("Extension", "").lower()] = default.get("ContentType")
+    for override in types.iter("{%s}Override" % _CONTENT_TYPES_NS):
+        result[override.get("PartName", "").lstrip("/")] = override.get("ContentType")
+    return result
+
+
+def open_doc_xml(path: str):
+    """
+    读取docx的主文档XML。
+
+    使用python-docx的解析器，返回的元素支持docx.oxml的自定义元素类，
+    可以直接用于构造Paragraph等对象。
+
+    Args:
+        path: docx文件路径
+
+    Returns:
+        w:document根元素
+    """
+    from docx.oxml.parser import parse_xml
+    with zipfile.ZipFile(path) as zf:
+        return parse_xml(zf.read(main_part_name(zf)))
+
+
+def save_doc_xml(path: str, root, save_path: str = None) -> None:
+    """
+    将修改后的主文档XML写回docx，其余部件原样复制。
+
+    Args:
+        path: 原docx文件路径
+        root: open_doc_xml返回并已修改的根元素
+        save_path: 输出路径，为None时覆盖原文件
+    """
+    target = save_path or path
+    xml = etree.tostring(root, encoding="UTF-8", standalone=True)
+
+    # 先写到同目录的临时文件，再替换目标文件
+    with _replacing(target) as tmp_path:
+        with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as dst:
+            main_part = main_part_name(src)
+            for info in src.infolist():
+                if info.filename == main_part:
+                    dst.writestr(info, xml)
+                else:
+                    with src.open(info) as fsrc, dst.open(info, "w") as fdst:
+                        shutil.copyfileobj(fsrc, fdst)
+
+
+class _ZipWriter:
+    """与python-docx的_ZipPkgWriter接口相同，但可以指定压缩级别"""
+
+    def __init__(self, pkg_file, compression_level: int):
+        if compression_level == 0:
+            self._zipf = zipfile.ZipFile(pkg_file, "w", zipfile.ZIP_STORED)
+        else:
+            self._zipf = zipfile.ZipFile(pkg_file, "w", zipfile.ZIP_DEFLATED, compresslevel=compression_level)
+
+    def write(self, pack_uri, blob):
+        self._zipf.writestr(pack_uri.membername, blob)
+
+    def close(self):
+        self._zipf.close()
+
+
+def save_document(doc, path: str, compression_level: int = 6) -> None:
+    """
+    按指定的压缩级别保存python-docx文档。
+
+    doc.save()固定使用zlib默认级别（6），较低的级别保存更快、文件稍大，
+    适合中间结果或较大的合并文档。覆盖已有文件时先写入临时文件再替换，
+    保存中途出错不会留下写了一半的文档。
+
+    Args:
+        doc: python-docx的Document对象
+        path: 保存路径
+        compression_level: 0-9，0表示不压缩
+    """
+    from docx.opc.pkgwriter import PackageWriter
+    if not 0 <= compression_level <= 9:
+        raise ValueError(f"压缩级别必须在0到9之间: {compression_level}")
+
+    package = doc.part.package
+    for part in package.parts:
+        part.before_marshal()
+
+    # 与PackageWriter.write相同的写入顺序
+    with _replacing(path) as tmp_path:
+        writer = _ZipWriter(tmp_path, compression_level)
+        try:
+            PackageWriter._write_content_types_stream(writer, package.parts)
+            PackageWriter._write_pkg_rels(writer, package.rels)
+            PackageWriter._write_parts(writer, package.parts)
+        finally:
+            writer.close()
@@ -0,0 +1,121 @@
+"""
+路径工具模块 - 统一解析文档路径
+"""
+
+import functools
+import inspect
+import os
+import threading
+from functools import lru_cache
+from typing import Optional
+
+
+def get_base_path() -> str:
+    """获取文档基础目录：优先使用环境变量OFFICE_EDIT_PATH，否则为桌面"""
+    return _base_path_for(os.environ.get('OFFICE_EDIT_PATH'))
+
+
+@lru_cache(maxsize=8)
+def _base_path_for(env_value: Optional[str]) -> str:
+    """按环境变量的值缓存基础目录，避免每次调用expanduser"""
+    return env_value or os.path.join(os.path.expanduser('~'), '桌面')
+
+
+def resolve_output_path(output_path: Optional[str] = None) -> str:
+    """返回输出目录：显式传入时原样返回，否则使用get_base_path()"""
+    return output_path or get_base_path()
+
+
+def resolve_docx(path: str, base_path: Optional[str] = None) -> str:
+    """
+    将相对路径解析为完整路径。
+    
+    Args:
+        path: 文件路径，绝对路径原样返回
+        base_path: 基础目录，为None时使用get_base_path()
+    
+    Returns:
+        完整路径
+    """
+    if os.path.isabs(path):
+        return path
+    return os.path.join(base_path or get_base_path(), path)
+
+
+# 当前线程正在执行的resolve_docx_path调用中，已检查过的文件的stat结果（绝对路径 -> os.stat_result）
+_call_stats = threading.local()
+
+
+def take_stat(path: str) -> Optional[os.stat_result]:
+    """
+    取出resolve_docx_path在本次调用中检查文件时得到的stat结果（每个路径只能取一次）。
+
+    文档缓存用它作为校验依据，同一次操作不必再调用一次os.stat。
+    取出后或文件被修改后（例如保存之后），调用方应重新stat。
+
+    Returns:
+        stat结果，没有记录时返回None
+    """
+    stats = getattr(_call_stats, 'stats', None)
+    if not stats:
+        return None
+    return stats.pop(path, None)
+
+
+def resolve_docx_path(*arg_names: str, optional: tuple = (), base_arg: Optional[str] = 'output_path'):
+    """
+    装饰器：在调用函数前解析指定参数中的文档路径，并检查文件是否存在。
+    
+    相对路径基于函数的base_arg参数（默认为output_path，若有）解析，否则基于get_base_path()。
+    参数值也可以是路径列表，列表中的每个路径都会被解析和检查。
+    
+    Args:
+        arg_names: 需要解析的参数名
+        optional: 只解析、不检查是否存在的参数名（例如可能尚未创建的输出文件）
+        base_arg: 作为基础目录的参数名；函数的同名参数含义不同时（例如导出文件路径）设为None
+    
+    用法:
+        @resolve_docx_path('file_path')
+        def set_page_layout(file_path: str, ..., output_path=None) -> str:
+            ...
+    """
+    def decorator(func):
+        # 签名只在装饰时解析一次
+        sig = inspect.signature(func)
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = sig.bind(*args, **kwargs)
+            base_path = bound.arguments.get(base_arg) if base_arg else None
+            stats = {}
+            
+            for name in arg_names:
+                value = bound.arguments.get(name)
+                if value is None:
+                    continue
+                if isinstance(value, str):
+                    value = resolve_docx(value, base_path)
+                    paths = (value,)
+                else:
+                    value = [resolve_docx(path, base_path) for path in value]
+                    paths = value
+                bound.arguments[name] = value
+                
+                if name not in optional:
+                    # 一次stat既检查文件是否存在，又留给文档缓存作为校验依据
+                    for path in paths:
+                        try:
+                            stats[os.path.abspath(path)] = os.stat(path)
+                        except OSError:
+                            return f"错误: 文件 {path} 不存在"
+            
+            # 被装饰的函数可能调用其他被装饰的函数，结束后恢复外层调用的记录
+            outer_stats = getattr(_call_stats, 'stats', None)
+            _call_stats.stats = stats
+            try:
+                return func(*bound.args, **bound.kwargs)
+            finally:
+                _call_stats.stats = outer_stats
+        
+        return wrapper
+    return decorator
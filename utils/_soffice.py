@@ -0,0 +1,219 @@
+"""
+LibreOffice实例管理模块 - 没有Word时通过UNO复用同一个无界面soffice进程转换文档
+
+每次运行 soffice --convert-to 都要启动一次LibreOffice（数秒），这里只在首次转换时
+启动一个监听本地端口的无界面soffice，之后的转换都通过UNO连接发送给这个进程。
+没有Python UNO组件时，批量转换改为一次性把所有文档传给一个soffice --convert-to进程。
+"""
+
+import atexit
+import functools
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+# LibreOffice自带的Python UNO组件按需导入
+uno = None
+PropertyValue = None
+uno_installed = False
+_import_attempted = False
+
+# soffice监听的本地端口，以及启动后等待其可连接的最长时间（秒）
+_SOFFICE_PORT = 2002
+_CONNECT_TIMEOUT = 30
+
+
+def ensure_uno() -> bool:
+    """
+    首次调用时导入uno。
+
+    Returns:
+        Python UNO组件是否可用
+    """
+    global uno, PropertyValue, uno_installed, _import_attempted
+    if not _import_attempted:
+        _import_attempted = True
+        try:
+            import uno
+            from com.sun.star.beans import PropertyValue
+            uno_installed = True
+        except ImportError:
+            uno_installed = False
+    return uno_installed
+
+
+_process = None
+_desktop = None
+_lock = threading.Lock()
+# 启动soffice失败后记为不可用，之后的调用不再重复尝试
+_soffice_unavailable = False
+
+
+@functools.lru_cache(maxsize=1)
+def _find_soffice():
+    """查找soffice可执行文件，找不到时返回None"""
+    for name in ("soffice", "libreoffice"):
+        path = shutil.which(name)
+        if path:
+            return path
+    if os.name == "nt":
+        for env in ("PROGRAMFILES", "PROGRAMFILES(X86)"):
+            path = os.path.join(os.environ.get(env, ""), "LibreOffice", "program", "soffice.exe")
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def soffice_available() -> bool:
+    """LibreOffice转换是否可以使用（不会启动soffice）"""
+    return not _soffice_unavailable and ensure_uno()
+
+
+def soffice_cli_available() -> bool:
+    """是否可以通过命令行调用soffice批量转换（不需要Python UNO组件）"""
+    return _find_soffice() is not None
+
+
+def convert_batch_via_cli(file_paths, output_format: str, output_dir: str, timeout: float = None) -> None:
+    """
+    用一个soffice --headless --convert-to进程转换多个文档，输出到output_dir。
+
+    逐个文档调用时每次都要启动LibreOffice，一次传入所有文档只启动一次。
+
+    Args:
+        file_paths: 源文档路径列表
+        output_format: soffice --convert-to的目标格式，例如"pdf"、"html"
+        output_dir: 输出目录
+        timeout: 等待转换完成的最长时间（秒），为None时一直等待
+    """
+    soffice = _find_soffice()
+    if soffice is None:
+        raise ImportError("未找到LibreOffice（soffice）")
+    subprocess.run(
+        [soffice, "--headless", "--norestore", "--convert-to", output_format, "--outdir", output_dir, *file_paths],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+        timeout=timeout,
+    )
+
+
+def _connect():
+    """连接本地端口上的soffice，返回com.sun.star.frame.Desktop"""
+    local_ctx = uno.getComponentContext()
+    resolver = local_ctx.ServiceManager.createInstanceWithContext(
+        "com.sun.star.bridge.UnoUrlResolver", local_ctx
+    )
+    ctx = resolver.resolve(
+        f"uno:socket,host=localhost,port={_SOFFICE_PORT};urp;StarOffice.ComponentContext"
+    )
+    return ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+
+
+def _start_and_connect():
+    """启动无界面soffice并等待其可以连接"""
+    global _process
+    soffice = _find_soffice()
+    if soffice is None:
+        raise ImportError("未找到LibreOffice（soffice）")
+    _process = subprocess.Popen(
+        [
+            soffice, "--headless", "--invisible", "--nologo", "--norestore", "--nodefault",
+            f"--accept=socket,host=localhost,port={_SOFFICE_PORT};urp;",
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + _CONNECT_TIMEOUT
+    while True:
+        try:
+            return _connect()
+        except Exception:
+            if _process.poll() is not None or time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def get_desktop():
+    """
+    获取共享的LibreOffice Desktop对象，首次调用时启动soffice（端口上已有实例时直接连接）。
+
+    Returns:
+        com.sun.star.frame.Desktop UNO对象
+    """
+    global _desktop, _soffice_unavailable
+    if not soffice_available():
+        raise ImportError("LibreOffice转换需要LibreOffice及其Python UNO组件")
+    with _lock:
+        if _desktop is not None:
+            try:
+                # 检查soffice进程是否仍然可用
+                _desktop.getComponents()
+            except Exception:
+                _desktop = None
+        if _desktop is None:
+            try:
+                _desktop = _connect()
+            except Exception:
+                try:
+                    _desktop = _start_and_connect()
+                except Exception as e:
+                    _soffice_unavailable = True
+                    raise ImportError(f"无法启动LibreOffice: {e}") from e
+        return _desktop
+
+
+def _properties(**values) -> tuple:
+    """将关键字参数转为UNO的PropertyValue序列"""
+    props = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        props.append(prop)
+    return tuple(props)
+
+
+def convert_via_uno(file_path: str, output_path: str, filter_name: str = "writer_pdf_Export") -> None:
+    """
+    用共享的soffice实例打开文档并按指定导出过滤器保存，完成后只关闭文档，不退出soffice。
+
+    Args:
+        file_path: 源文档路径
+        output_path: 输出文件路径
+        filter_name: LibreOffice导出过滤器名称，默认导出PDF
+    """
+    desktop = get_desktop()
+    doc = desktop.loadComponentFromURL(
+        uno.systemPathToFileUrl(os.path.abspath(file_path)), "_blank", 0,
+        _properties(Hidden=True, ReadOnly=True)
+    )
+    try:
+        doc.storeToURL(
+            uno.systemPathToFileUrl(os.path.abspath(output_path)),
+            _properties(FilterName=filter_name)
+        )
+    finally:
+        doc.close(True)
+
+
+def quit_soffice() -> None:
+    """关闭本模块启动的soffice进程（进程退出时自动调用），连接的外部实例不会被关闭"""
+    global _desktop, _process
+    with _lock:
+        if _process is not None:
+            try:
+                if _desktop is not None:
+                    _desktop.terminate()
+                _process.wait(timeout=10)
+            except Exception:
+                _process.kill()
+            _process = None
+        _desktop = None
+
+
+atexit.register(quit_soffice)
@@ -0,0 +1,144 @@
+"""
+Word COM实例管理模块 - 在多次调用之间复用同一个Word.Application进程
+"""
+
+import atexit
+import os
+import threading
+
+# 交给Word之前先写入缓存中未写盘的修改
+from utils._doc_cache import flush
+
+# pywin32按需导入，避免在不使用COM功能时加载COM运行库
+win32com = None
+pythoncom = None
+win32com_installed = False
+_import_attempted = False
+
+
+def ensure_win32com() -> bool:
+    """
+    首次调用时导入pywin32。
+
+    Returns:
+        pywin32是否可用
+    """
+    global win32com, pythoncom, win32com_installed, _import_attempted
+    if not _import_attempted:
+        _import_attempted = True
+        try:
+            import win32com.client
+            import pythoncom
+            win32com_installed = True
+        except ImportError:
+            win32com_installed = False
+    return win32com_installed
+
+_word = None
+_word_lock = threading.Lock()
+_thread_state = threading.local()
+# 启动Word失败后记为不可用，之后的调用直接走python-docx路径
+_word_unavailable = False
+
+
+def word_available() -> bool:
+    """
+    Word COM是否可以使用（不会启动Word）。
+
+    设置环境变量DOCEDITOR_NO_COM=1可以强制禁用COM，例如在无桌面的服务器上运行时。
+    """
+    if _word_unavailable or os.environ.get("DOCEDITOR_NO_COM") == "1":
+        return False
+    return ensure_win32com()
+
+
+def _ensure_com_initialized() -> None:
+    """每个线程只调用一次CoInitialize"""
+    if not getattr(_thread_state, "com_initialized", False):
+        pythoncom.CoInitialize()
+        _thread_state.com_initialized = True
+
+
+def get_word():
+    """
+    获取共享的Word.Application实例，首次调用时启动Word。
+
+    Returns:
+        Word.Application COM对象
+    """
+    global _word, _word_unavailable
+    if not ensure_win32com():
+        raise ImportError("Word COM功能需要pywin32支持，请先安装: pip install pywin32")
+    if not word_available():
+        raise ImportError("Word COM功能不可用")
+    _ensure_com_initialized()
+    with _word_lock:
+        if _word is not None:
+            try:
+                # 检查Word进程是否仍然可用
+                _word.Documents.Count
+            except Exception:
+                _word = None
+        if _word is None:
+            try:
+                _word = win32com.client.DispatchEx("Word.Application")
+            except Exception as e:
+                # 未安装Word或无法启动，不再重复尝试
+                _word_unavailable = True
+                raise ImportError(f"无法启动Word: {e}") from e
+            _word.Visible = False
+            _word.DisplayAlerts = 0  # 0 = wdAlertsNone
+            _disable_layout_options(_word)
+        return _word
+
+
+def open_document(word, file_path: str, **kwargs):
+    """
+    在Word中打开文档，关键字参数原样传给Documents.Open。
+
+    文档在缓存中有未写盘的修改（save=False）时先写盘：否则Word读到的是旧文件，
+    而Word保存后文件发生变化，缓存中的修改也会被丢弃。
+
+    Returns:
+        Word Document COM对象
+    """
+    flush(file_path)
+    return word.Documents.Open(FileName=file_path, **kwargs)
+
+
+def running_word():
+    """
+    返回已经启动的共享Word实例，尚未启动时返回None（不会启动Word）。
+    """
+    return _word
+
+
+def _disable_layout_options(word) -> None:
+    """
+    关闭屏幕刷新，减少Word内部的排版开销。
+
+    只修改随Word实例结束的ScreenUpdating；Options下的后台分页、拼写语法检查、
+    自动保存间隔等是用户的持久设置，不在这里修改。
+    """
+    word.ScreenUpdating = False
+
+
+def quit_word() -> None:
+    """关闭共享的Word实例并释放当前线程的COM（进程退出时自动调用）"""
+    global _word
+    with _word_lock:
+        if _word is not None:
+            try:
+                _word.Quit()
+            except Exception:
+                pass
+            _word = None
+    if getattr(_thread_state, "com_initialized", False):
+        try:
+            pythoncom.CoUninitialize()
+        except Exception:
+            pass
+        _thread_state.com_initialized = False
+
+
+atexit.register(quit_word)
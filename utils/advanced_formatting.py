@@ -8,8 +8,10 @@ from docx import Document
 from docx.shared import Pt, Cm, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.shape import WD_INLINE_SHAPE
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from docx.oxml.ns import qn, nsdecls
+from docx.oxml import OxmlElement, parse_xml
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.parts.numbering import NumberingPart
 import docx.opc.constants
 
 # 检查docx库安装状态
@@ -19,13 +21,30 @@ try:
 except ImportError:
     docx_installed = False
 
-# 尝试导入pywin32，用于某些高级功能
-try:
-    import win32com.client
-    import pythoncom
-    win32com_installed = True
-except ImportError:
-    win32com_installed = False
+# pywin32在首次使用COM功能时才导入
+from utils._word_app import get_word, ensure_win32com, open_document
+from utils._colors import hex_to_rgb_int, is_hex_color
+from utils._paths import resolve_docx
+from utils._doc_cache import flush
+
+_QN_VAL = qn("w:val")
+_QN_ABSTRACT_NUM = qn("w:abstractNum")
+_QN_ABSTRACT_NUM_ID = qn("w:abstractNumId")
+_QN_NAME = qn("w:name")
+_QN_NUM = qn("w:num")
+_QN_ILVL = qn("w:ilvl")
+_QN_LEFT = qn("w:left")
+_QN_HANGING = qn("w:hanging")
+# 项目符号字体需要同时设置的rFonts属性
+_QN_FONT_ATTRS = tuple(qn(attr) for attr in ("w:ascii", "w:hAnsi", "w:eastAsia", "w:cs"))
+
+# 项目符号样式映射
+_SYMBOL_MAP = {
+    "disc": "•",
+    "circle": "○",
+    "square": "■",
+    "number": "1."
+}
 
 def add_text_box(
     file_path: str,
@@ -70,18 +89,11 @@ def add_text_box(
         return "错误: 无法创建文本框，请先安装python-docx库"
     
     # 检查是否支持高级文本框功能
-    if not win32com_installed:
+    if not ensure_win32com():
         return "错误: 文本框功能需要pywin32支持，请先安装: pip install pywin32"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
+    # 解析完整路径
+    file_path = resolve_docx(file_path)
     
     # 确保文件存在
     if not os.path.exists(file_path):
@@ -89,11 +101,9 @@ def add_text_box(
     
     try:
         # 使用COM接口添加文本框（这是最可靠的方式）
-        pythoncom.CoInitialize()
-        word = win32com.client.Dispatch("Word.Application")
-        word.Visible = False
+        word = get_word()
         
-        doc = word.Documents.Open(file_path)
+        doc = open_document(word, file_path)
         
         # 确定插入位置
         if paragraph_index == -1 or paragraph_index >= doc.Paragraphs.Count:
@@ -141,14 +151,12 @@ def add_text_box(
         
         # 设置边框颜色
         if border_color:
-            color = border_color.lstrip('#')
-            rgb_int = int(color, 16)
+            rgb_int = hex_to_rgb_int(border_color)
             shape.Line.ForeColor.RGB = rgb_int
         
         # 设置填充颜色
         if fill_color:
-            color = fill_color.lstrip('#')
-            rgb_int = int(color, 16)
+            rgb_int = hex_to_rgb_int(fill_color)
             shape.Fill.ForeColor.RGB = rgb_int
         else:
             # 默认透明填充
@@ -173,30 +181,22 @@ def add_text_box(
             text_range.Font.Italic = True
         
         if font_color:
-            color = font_color.lstrip('#')
-            rgb_int = int(color, 16)
+            rgb_int = hex_to_rgb_int(font_color)
             text_range.Font.Color.RGB = rgb_int
         
-        # 保存并关闭文档
+        # 清空撤销记录后保存并关闭文档
+        doc.UndoClear()
         doc.Save()
         doc.Close()
-        word.Quit()
-        pythoncom.CoUninitialize()
         
         return f"成功添加文本框到文档 {os.path.basename(file_path)}"
     
     except Exception as e:
-        if 'word' in locals():
+        if 'doc' in locals():
             try:
-                if 'doc' in locals():
-                    doc.Close(SaveChanges=False)
-                word.Quit()
+                doc.Close(SaveChanges=False)
             except:
                 pass
-        try:
-            pythoncom.CoUninitialize()
-        except:
-            pass
         return f"添加文本框时出错: {str(e)}"
 
 def add_drop_cap(
@@ -224,18 +224,11 @@ def add_drop_cap(
         return "错误: 无法添加首字下沉，请先安装python-docx库"
     
     # 检查是否支持高级文本格式功能
-    if not win32com_installed:
+    if not ensure_win32com():
         return "错误: 首字下沉功能需要pywin32支持，请先安装: pip install pywin32"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
+    # 解析完整路径
+    file_path = resolve_docx(file_path)
     
     # 确保文件存在
     if not os.path.exists(file_path):
@@ -247,27 +240,22 @@ def add_drop_cap(
     
     try:
         # 使用COM接口添加首字下沉（这是最可靠的方式）
-        pythoncom.CoInitialize()
-        word = win32com.client.Dispatch("Word.Application")
-        word.Visible = False
+        word = get_word()
         
-        doc = word.Documents.Open(file_path)
+        doc = open_document(word, file_path)
         
         # 检查段落索引是否有效
         if paragraph_index < 0 or paragraph_index >= doc.Paragraphs.Count:
             doc.Close(SaveChanges=False)
-            word.Quit()
-            pythoncom.CoUninitialize()
             return f"错误: 段落索引 {paragraph_index} 超出范围，文档共有 {doc.Paragraphs.Count} 个段落"
         
         # 获取段落并应用首字下沉
         para = doc.Paragraphs[paragraph_index + 1]  # COM对象从1开始计数
         
-        # 确保段落有内容
-        if len(para.Range.Text.strip()) == 0:
+        # 确保段落有内容（段落末尾总有一个段落标记，只有该字符时为空段落；
+        # 只取字符数，避免把整段文本跨进程传回来）
+        if para.Range.Characters.Count <= 1:
             doc.Close(SaveChanges=False)
-            word.Quit()
-            pythoncom.CoUninitialize()
             return f"错误: 段落 {paragraph_index} 没有内容，无法添加首字下沉"
         
         # 选择段落的第一个字符
@@ -283,30 +271,22 @@ def add_drop_cap(
             word.Selection.Font.Name = font_name
         
         if font_color:
-            color = font_color.lstrip('#')
-            rgb_int = int(color, 16)
+            rgb_int = hex_to_rgb_int(font_color)
             word.Selection.Font.Color = rgb_int
         
-        # 保存并关闭文档
+        # 清空撤销记录后保存并关闭文档
+        doc.UndoClear()
         doc.Save()
         doc.Close()
-        word.Quit()
-        pythoncom.CoUninitialize()
         
         return f"成功为文档 {os.path.basename(file_path)} 的第 {paragraph_index} 段添加首字下沉效果"
     
     except Exception as e:
-        if 'word' in locals():
+        if 'doc' in locals():
             try:
-                if 'doc' in locals():
-                    doc.Close(SaveChanges=False)
-                word.Quit()
+                doc.Close(SaveChanges=False)
             except:
                 pass
-        try:
-            pythoncom.CoUninitialize()
-        except:
-            pass
         return f"添加首字下沉效果时出错: {str(e)}"
 
 def add_word_art(
@@ -338,18 +318,11 @@ def add_word_art(
         return "错误: 无法添加艺术字，请先安装python-docx库"
     
     # 检查是否支持高级文本格式功能
-    if not win32com_installed:
+    if not ensure_win32com():
         return "错误: 艺术字功能需要pywin32支持，请先安装: pip install pywin32"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
+    # 解析完整路径
+    file_path = resolve_docx(file_path)
     
     # 确保文件存在
     if not os.path.exists(file_path):
@@ -361,11 +334,9 @@ def add_word_art(
     
     try:
         # 使用COM接口添加艺术字
-        pythoncom.CoInitialize()
-        word = win32com.client.Dispatch("Word.Application")
-        word.Visible = False
+        word = get_word()
         
-        doc = word.Documents.Open(file_path)
+        doc = open_document(word, file_path)
         
         # 确定插入位置
         if paragraph_index == -1 or paragraph_index >= doc.Paragraphs.Count:
@@ -391,36 +362,27 @@ def add_word_art(
         
         # 设置填充颜色
         if fill_color:
-            color = fill_color.lstrip('#')
-            rgb_int = int(color, 16)
+            rgb_int = hex_to_rgb_int(fill_color)
             art.TextEffect.Fill.ForeColor.RGB = rgb_int
         
         # 设置轮廓颜色
         if outline_color:
-            color = outline_color.lstrip('#')
-            rgb_int = int(color, 16)
+            rgb_int = hex_to_rgb_int(outline_color)
             art.TextEffect.Line.ForeColor.RGB = rgb_int
         
-        # 保存并关闭文档
+        # 清空撤销记录后保存并关闭文档
+        doc.UndoClear()
         doc.Save()
         doc.Close()
-        word.Quit()
-        pythoncom.CoUninitialize()
         
         return f"成功添加艺术字到文档 {os.path.basename(file_path)}"
     
     except Exception as e:
-        if 'word' in locals():
+        if 'doc' in locals():
             try:
-                if 'doc' in locals():
-                    doc.Close(SaveChanges=False)
-                word.Quit()
+                doc.Close(SaveChanges=False)
             except:
                 pass
-        try:
-            pythoncom.CoUninitialize()
-        except:
-            pass
         return f"添加艺术字时出错: {str(e)}"
 
 def add_custom_bullets(
@@ -449,147 +411,182 @@ def add_custom_bullets(
     if not docx_installed:
         return "错误: 无法添加自定义项目符号，请先安装python-docx库"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
+    # 解析完整路径
+    file_path = resolve_docx(file_path)
     
     # 确保文件存在
     if not os.path.exists(file_path):
         return f"错误: 文件 {file_path} 不存在"
     
-    # 映射符号样式
-    symbol_map = {
-        "disc": "•",
-        "circle": "○", 
-        "square": "■",
-        "number": "1."
-    }
-    
     # 如果是custom样式，必须提供自定义符号
     if bullet_style == "custom" and not custom_symbol:
         return "错误: 使用自定义项目符号样式时必须提供custom_symbol"
     
+    if bullet_style != "custom" and bullet_style not in _SYMBOL_MAP:
+        return f"错误: 不支持的项目符号样式 {bullet_style}"
+    
+    # 颜色直接写入numbering.xml的w:color，必须是6位十六进制
+    if font_color and not is_hex_color(font_color):
+        return f"错误: 无效的颜色值 {font_color}，请使用十六进制格式，如 \"#FF0000\""
+    
     try:
-        # 尝试使用Word COM对象（功能最完整）
-        if win32com_installed:
-            try:
-                pythoncom.CoInitialize()
-                word = win32com.client.Dispatch("Word.Application")
-                word.Visible = False
-                
-                doc = word.Documents.Open(file_path)
-                
-                success_count = 0
-                invalid_indices = []
-                
-                for idx in paragraph_indices:
-                    # 检查段落索引是否有效
-                    if idx < 0 or idx >= doc.Paragraphs.Count:
-                        invalid_indices.append(idx)
-                        continue
-                    
-                    # 获取段落并应用项目符号
-                    para = doc.Paragraphs[idx + 1]  # COM对象从1开始计数
-                    para.Range.Select()
-                    
-                    if bullet_style == "number":
-                        # 使用编号列表
-                        word.Selection.Range.ListFormat.ApplyNumberDefault()
-                    elif bullet_style == "custom" or bullet_style in symbol_map:
-                        # 使用项目符号
-                        word.Selection.Range.ListFormat.ApplyBulletDefault()
-                        
-                        # 如果是自定义样式，设置自定义符号
-                        if bullet_style == "custom":
-                            word.Selection.Range.ListFormat.ListTemplate.ListLevels(1).NumberFormat = custom_symbol + " "
-                        else:
-                            word.Selection.Range.ListFormat.ListTemplate.ListLevels(1).NumberFormat = symbol_map[bullet_style] + " "
-                        
-                        # 设置字体
-                        if font_name:
-                            word.Selection.Range.ListFormat.ListTemplate.ListLevels(1).Font.Name = font_name
-                        
-                        # 设置颜色
-                        if font_color:
-                            color = font_color.lstrip('#')
-                            rgb_int = int(color, 16)
-                            word.Selection.Range.ListFormat.ListTemplate.ListLevels(1).Font.Color = rgb_int
-                    
-                    success_count += 1
-                
-                # 保存并关闭文档
-                doc.Save()
-                doc.Close()
-                word.Quit()
-                pythoncom.CoUninitialize()
-                
-                result_msg = f"成功为文档 {os.path.basename(file_path)} 中的 {success_count} 个段落添加项目符号"
-                if invalid_indices:
-                    result_msg += f"，但有 {len(invalid_indices)} 个无效的段落索引: {invalid_indices}"
-                
-                return result_msg
-            
-            except Exception as e:
-                if 'word' in locals():
-                    try:
-                        if 'doc' in locals():
-                            doc.Close(SaveChanges=False)
-                        word.Quit()
-                    except:
-                        pass
-                try:
-                    pythoncom.CoUninitialize()
-                except:
-                    pass
-                return f"添加项目符号时出错: {str(e)}"
+        # 先写盘缓存中的未保存修改，避免本次保存后又被旧的缓存副本覆盖
+        flush(file_path)
+        doc = Document(file_path)
+        
+        # 获取（或创建）与当前符号设置对应的编号定义
+        num_id = _get_or_add_bullet_num(
+            doc,
+            bullet_style,
+            custom_symbol if bullet_style == "custom" else _SYMBOL_MAP[bullet_style],
+            font_name,
+            font_color
+        )
         
-        else:
-            # 使用python-docx添加基本的项目符号（功能有限）
-            doc = Document(file_path)
-            
-            success_count = 0
-            invalid_indices = []
-            
-            for idx in paragraph_indices:
-                # 检查段落索引是否有效
-                if idx < 0 or idx >= len(doc.paragraphs):
-                    invalid_indices.append(idx)
-                    continue
-                
-                # 获取段落并应用项目符号
-                paragraph = doc.paragraphs[idx]
-                
-                # 使用python-docx添加简单项目符号（功能有限）
-                pPr = paragraph._p.get_or_add_pPr()
-                pStyle = OxmlElement("w:pStyle")
-                pStyle.set(qn("w:val"), "ListBullet")
-                pPr.append(pStyle)
-                
-                # 尝试添加项目符号（注：python-docx对项目符号的支持有限）
-                numPr = OxmlElement("w:numPr")
-                numId = OxmlElement("w:numId")
-                numId.set(qn("w:val"), "1")
-                numPr.append(numId)
-                pPr.append(numPr)
-                
-                success_count += 1
-            
-            # 保存文档
-            doc.save(file_path)
-            
-            result_msg = f"成功为文档 {os.path.basename(file_path)} 中的 {success_count} 个段落添加基本项目符号"
-            if invalid_indices:
-                result_msg += f"，但有 {len(invalid_indices)} 个无效的段落索引: {invalid_indices}"
+        paragraphs = doc.paragraphs
+        success_count = 0
+        invalid_indices = []
+        
+        for idx in paragraph_indices:
+            # 检查段落索引是否有效
+            if idx < 0 or idx >= len(paragraphs):
+                invalid_indices.append(idx)
+                continue
             
-            result_msg += "\n注意：使用python-docx实现的项目符号功能有限，建议安装pywin32获得完整支持。"
+            # 为段落设置编号属性
+            numPr = paragraphs[idx]._p.get_or_add_pPr().get_or_add_numPr()
+            numPr.get_or_add_ilvl().val = 0
+            numPr.get_or_add_numId().val = num_id
             
-            return result_msg
+            success_count += 1
+        
+        # 保存文档
+        doc.save(file_path)
+        
+        result_msg = f"成功为文档 {os.path.basename(file_path)} 中的 {success_count} 个段落添加项目符号"
+        if invalid_indices:
+            result_msg += f"，但有 {len(invalid_indices)} 个无效的段落索引: {invalid_indices}"
+        
+        return result_msg
     
     except Exception as e:
-        return f"添加项目符号时出错: {str(e)}" 
\ No newline at end of file
+        return f"添加项目符号时出错: {str(e)}"
+
+def _get_or_add_numbering_part(doc) -> NumberingPart:
+    """
+    获取文档的编号定义部分，文档没有numbering.xml时创建一个空的并关联到正文。
+    """
+    try:
+        return doc.part.numbering_part
+    except NotImplementedError:
+        pass
+    
+    package = doc.part.package
+    partname = package.next_partname("/word/numbering%d.xml")
+    numbering_part = NumberingPart(
+        partname, CT.WML_NUMBERING, parse_xml(f"<w:numbering {nsdecls('w')}/>"), package
+    )
+    doc.part.relate_to(numbering_part, RT.NUMBERING)
+    return numbering_part
+
+def _get_or_add_bullet_num(
+    doc,
+    bullet_style: str,
+    symbol: str,
+    font_name: str = None,
+    font_color: str = None
+) -> Optional[int]:
+    """
+    在numbering.xml中查找或注册项目符号的编号定义。
+    
+    相同设置的项目符号共用同一个abstractNum/num，重复调用不会产生新的定义。
+    
+    Returns:
+        编号ID(numId)
+    """
+    numbering = _get_or_add_numbering_part(doc).element
+    
+    # 用w:name标记本模块创建的定义，便于后续调用复用
+    name = "|".join(["bullet", bullet_style, symbol, font_name or "", font_color or ""])
+    
+    abstract_num = None
+    for candidate in numbering.findall(_QN_ABSTRACT_NUM):
+        name_el = candidate.find(_QN_NAME)
+        if name_el is not None and name_el.get(_QN_VAL) == name:
+            abstract_num = candidate
+            break
+    
+    if abstract_num is None:
+        used_ids = [int(x) for x in numbering.xpath("./w:abstractNum/@w:abstractNumId")]
+        abstract_id = max(used_ids) + 1 if used_ids else 0
+        
+        abstract_num = OxmlElement("w:abstractNum")
+        abstract_num.set(_QN_ABSTRACT_NUM_ID, str(abstract_id))
+        
+        name_el = OxmlElement("w:name")
+        name_el.set(_QN_VAL, name)
+        multi_level = OxmlElement("w:multiLevelType")
+        multi_level.set(_QN_VAL, "singleLevel")
+        abstract_num.append(multi_level)
+        abstract_num.append(name_el)
+        
+        lvl = OxmlElement("w:lvl")
+        lvl.set(_QN_ILVL, "0")
+        
+        start = OxmlElement("w:start")
+        start.set(_QN_VAL, "1")
+        lvl.append(start)
+        
+        num_fmt = OxmlElement("w:numFmt")
+        lvl_text = OxmlElement("w:lvlText")
+        if bullet_style == "number":
+            num_fmt.set(_QN_VAL, "decimal")
+            lvl_text.set(_QN_VAL, "%1.")
+        else:
+            num_fmt.set(_QN_VAL, "bullet")
+            lvl_text.set(_QN_VAL, symbol)
+        lvl.append(num_fmt)
+        lvl.append(lvl_text)
+        
+        lvl_jc = OxmlElement("w:lvlJc")
+        lvl_jc.set(_QN_VAL, "left")
+        lvl.append(lvl_jc)
+        
+        # 缩进与Word默认列表保持一致
+        pPr = OxmlElement("w:pPr")
+        ind = OxmlElement("w:ind")
+        ind.set(_QN_LEFT, "720")
+        ind.set(_QN_HANGING, "360")
+        pPr.append(ind)
+        lvl.append(pPr)
+        
+        # 符号字体和颜色
+        if font_name or font_color:
+            rPr = OxmlElement("w:rPr")
+            if font_name:
+                rFonts = OxmlElement("w:rFonts")
+                for attr in _QN_FONT_ATTRS:
+                    rFonts.set(attr, font_name)
+                rPr.append(rFonts)
+            if font_color:
+                color = OxmlElement("w:color")
+                color.set(_QN_VAL, font_color.lstrip('#').upper())
+                rPr.append(color)
+            lvl.append(rPr)
+        
+        abstract_num.append(lvl)
+        
+        # abstractNum必须位于所有w:num之前
+        first_num = numbering.find(_QN_NUM)
+        if first_num is not None:
+            first_num.addprevious(abstract_num)
+        else:
+            numbering.append(abstract_num)
+    else:
+        abstract_id = int(abstract_num.get(_QN_ABSTRACT_NUM_ID))
+        # 复用已经引用该定义的num
+        for num in numbering.num_lst:
+            if num.abstractNumId.val == abstract_id:
+                return num.numId
+    
+    return numbering.add_num(abstract_id).numId
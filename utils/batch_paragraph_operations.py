@@ -4,17 +4,134 @@
 """
 
 import os
+from copy import deepcopy
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
-from docx import Document
+from docx.text.paragraph import Paragraph
 from docx.shared import Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
+from docx.enum.style import WD_STYLE_TYPE
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
 
+from utils._colors import hex_to_rgb_tuple
+from utils._paths import resolve_docx
+from utils._fast_docx import open_doc_xml, save_doc_xml
+# 批量操作与其他工具共用已解析的文档，未写盘的修改不会被覆盖
+from utils._doc_cache import get_doc, peek_doc, save_doc, mark_dirty, evict
+from utils.edit_operations import _replace_paragraph_text
+
+# 常用的XML限定名，模块加载时计算一次
+_QN_ASCII = qn('w:ascii')
+_QN_HANSI = qn('w:hAnsi')
+_QN_EAST_ASIA = qn('w:eastAsia')
+_QN_VAL = qn('w:val')
+_QN_FILL = qn('w:fill')
+_QN_P = qn('w:p')
+_QN_BODY = qn('w:body')
+
+# rPr子元素的规范顺序，合并属性时用于排序
+_RPR_ORDER = {qn(tag): index for index, tag in enumerate((
+    'w:rStyle', 'w:rFonts', 'w:b', 'w:bCs', 'w:i', 'w:iCs', 'w:caps', 'w:smallCaps',
+    'w:strike', 'w:dstrike', 'w:outline', 'w:shadow', 'w:emboss', 'w:imprint',
+    'w:noProof', 'w:snapToGrid', 'w:vanish', 'w:webHidden', 'w:color', 'w:spacing',
+    'w:w', 'w:kern', 'w:position', 'w:sz', 'w:szCs', 'w:highlight', 'w:u', 'w:effect',
+    'w:bdr', 'w:shd', 'w:fitText', 'w:vertAlign', 'w:rtl', 'w:cs', 'w:em', 'w:lang',
+    'w:eastAsianLayout', 'w:specVanish', 'w:oMath'
+))}
+
+# 对齐方式映射
+_ALIGNMENT_MAP = {
+    "left": WD_ALIGN_PARAGRAPH.LEFT,
+    "center": WD_ALIGN_PARAGRAPH.CENTER,
+    "right": WD_ALIGN_PARAGRAPH.RIGHT,
+    "justify": WD_ALIGN_PARAGRAPH.JUSTIFY
+}
+
+# 行间距规则映射
+_SPACING_RULE_MAP = {
+    "multiple": WD_LINE_SPACING.MULTIPLE,
+    "exact": WD_LINE_SPACING.EXACTLY,
+    "atLeast": WD_LINE_SPACING.AT_LEAST
+}
+
+# 高亮颜色映射
+_HIGHLIGHT_COLOR_MAP = {
+    "yellow": "FFFF00", "green": "00FF00", "blue": "0000FF",
+    "red": "FF0000", "pink": "FFC0CB", "turquoise": "40E0D0"
+}
+
+class BatchSession:
+    """
+    批量操作会话 - 在一次打开和保存之间执行多个批量操作
+    
+    用法:
+        with BatchSession(file_path) as session:
+            session.add_paragraphs(paragraphs_data)
+            session.format(format_operations)
+            session.set_spacing(spacing_operations)
+    
+    文档通过缓存获取，退出时如果有修改则保存一次；发生异常时不保存，并把修改了一半的文档移出缓存。
+    """
+    
+    def __init__(self, file_path: str, save_path: Optional[str] = None, save: bool = True):
+        """
+        Args:
+            file_path: Word文档的完整路径
+            save_path: 另存为的完整路径（可选），为None时覆盖原文件
+            save: 退出时是否保存；为False时修改保留在缓存中，由之后的保存或close_document写盘
+        """
+        self.file_path = file_path
+        self.save_path = save_path
+        self.save = save
+        self.doc = None
+        self.dirty = False
+        self._paras = None
+    
+    def __enter__(self):
+        self.doc = get_doc(self.file_path)
+        self._paras = list(self.doc.paragraphs)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            evict(self.file_path)
+        elif self.dirty:
+            if self.save:
+                save_doc(self.doc, self.file_path, self.save_path)
+            else:
+                mark_dirty(self.doc, self.file_path)
+        return False
+    
+    def add_paragraphs(self, paragraphs_data: List[Dict[str, Any]]):
+        """批量添加格式化段落，返回 (成功数量, 失败操作列表)"""
+        success_count, failed_operations = _do_add(self.doc, paragraphs_data)
+        if success_count:
+            self.dirty = True
+            # 段落结构已变化，刷新缓存的段落列表
+            self._paras = list(self.doc.paragraphs)
+        return success_count, failed_operations
+    
+    def format(self, format_operations: List[Dict[str, Any]]):
+        """批量格式化段落，返回 (成功数量, 失败操作列表)"""
+        total_formatted, failed_operations = _do_format(self._paras, format_operations)
+        if total_formatted:
+            self.dirty = True
+        return total_formatted, failed_operations
+    
+    def set_spacing(self, spacing_operations: List[Dict[str, Any]]):
+        """批量设置段落间距，返回 (成功数量, 失败操作列表)"""
+        total_processed, failed_operations = _do_spacing(self._paras, spacing_operations)
+        if total_processed:
+            self.dirty = True
+        return total_processed, failed_operations
+
 def batch_add_formatted_paragraphs(
     file_path: str,
     paragraphs_data: List[Dict[str, Any]],
-    output_path: Optional[str] = None
+    output_path: Optional[str] = None,
+    save_path: Optional[str] = None,
+    save: bool = True
 ) -> str:
     """
     批量添加格式化段落到Word文档
@@ -26,7 +143,7 @@ def batch_add_formatted_paragraphs(
             - is_heading: 是否为标题（可选）
             - heading_level: 标题级别（可选）
             - alignment: 对齐方式（可选）
-            - insert_position: 插入位置（可选）
+            - insert_position: 插入位置，新段落插入到原文档该索引段落之后（可选）
             - font_name: 字体名称（可选）
             - font_size: 字体大小（可选）
             - bold: 是否加粗（可选）
@@ -37,73 +154,27 @@ def batch_add_formatted_paragraphs(
             - after_spacing: 段后间距（可选）
             - line_spacing: 行间距（可选）
         output_path: 输出路径，如果为None则从环境变量获取
+        save_path: 另存为路径（可选），为None时覆盖原文件
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，由之后的保存或close_document写盘
     
     Returns:
         操作结果信息
     """
-    # 处理文件路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
+    if not paragraphs_data:
+        return "没有需要添加的段落"
     
-    if not os.path.isabs(file_path):
-        file_path = os.path.join(output_path, file_path)
+    # 处理文件路径
+    file_path = resolve_docx(file_path, output_path)
     
     if not os.path.exists(file_path):
         return f"错误: 文件 {file_path} 不存在"
     
+    if save_path:
+        save_path = resolve_docx(save_path, output_path)
+    
     try:
-        doc = Document(file_path)
-        success_count = 0
-        failed_operations = []
-        
-        # 批量处理段落
-        for i, para_data in enumerate(paragraphs_data):
-            try:
-                # 获取基本参数
-                text = para_data.get('text', '')
-                is_heading = para_data.get('is_heading', False)
-                heading_level = para_data.get('heading_level', 1)
-                alignment = para_data.get('alignment', 'left')
-                insert_position = para_data.get('insert_position', -1)
-                
-                # 创建段落或标题
-                if is_heading:
-                    paragraph = doc.add_heading(text, level=heading_level)
-                else:
-                    paragraph = doc.add_paragraph(text)
-                
-                # 应用对齐方式
-                alignment_map = {
-                    "left": WD_ALIGN_PARAGRAPH.LEFT,
-                    "center": WD_ALIGN_PARAGRAPH.CENTER,
-                    "right": WD_ALIGN_PARAGRAPH.RIGHT,
-                    "justify": WD_ALIGN_PARAGRAPH.JUSTIFY
-                }
-                if alignment.lower() in alignment_map:
-                    paragraph.alignment = alignment_map[alignment.lower()]
-                
-                # 应用文本格式
-                _apply_text_formatting(paragraph, para_data)
-                
-                # 应用段落间距
-                _apply_paragraph_spacing(paragraph, para_data)
-                
-                # 处理插入位置
-                if insert_position != -1 and insert_position < len(doc.paragraphs) - 1:
-                    target_paragraph = doc.paragraphs[insert_position]
-                    new_p = paragraph._p
-                    new_p.getparent().remove(new_p)
-                    target_paragraph._p.addnext(new_p)
-                
-                success_count += 1
-                
-            except Exception as e:
-                failed_operations.append((i, str(e)))
-        
-        # 保存文档
-        doc.save(file_path)
+        with BatchSession(file_path, save_path, save) as session:
+            success_count, failed_operations = session.add_paragraphs(paragraphs_data)
         
         result_msg = f"成功批量添加 {success_count} 个格式化段落到文档 {os.path.basename(file_path)}"
         if failed_operations:
@@ -117,7 +188,9 @@ def batch_add_formatted_paragraphs(
 def batch_format_paragraphs(
     file_path: str,
     format_operations: List[Dict[str, Any]],
-    output_path: Optional[str] = None
+    output_path: Optional[str] = None,
+    save_path: Optional[str] = None,
+    save: bool = True
 ) -> str:
     """
     批量格式化指定段落
@@ -134,45 +207,26 @@ def batch_format_paragraphs(
             - font_color: 字体颜色（可选）
             - highlight_color: 高亮颜色（可选）
         output_path: 输出路径，如果为None则从环境变量获取
+        save_path: 另存为路径（可选），为None时覆盖原文件
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，由之后的保存或close_document写盘
     
     Returns:
         操作结果信息
     """
-    # 处理文件路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
+    if not format_operations:
+        return "没有需要执行的格式化操作"
     
-    if not os.path.isabs(file_path):
-        file_path = os.path.join(output_path, file_path)
+    # 处理文件路径
+    file_path = resolve_docx(file_path, output_path)
     
     if not os.path.exists(file_path):
         return f"错误: 文件 {file_path} 不存在"
     
+    if save_path:
+        save_path = resolve_docx(save_path, output_path)
+    
     try:
-        doc = Document(file_path)
-        total_formatted = 0
-        failed_operations = []
-        
-        # 批量处理格式化操作
-        for i, operation in enumerate(format_operations):
-            try:
-                paragraph_indices = operation.get('paragraph_indices', [])
-                
-                for paragraph_index in paragraph_indices:
-                    if 0 <= paragraph_index < len(doc.paragraphs):
-                        paragraph = doc.paragraphs[paragraph_index]
-                        _apply_text_formatting(paragraph, operation)
-                        total_formatted += 1
-                    else:
-                        failed_operations.append((i, f"无效的段落索引: {paragraph_index}"))
-                        
-            except Exception as e:
-                failed_operations.append((i, str(e)))
-        
-        # 保存文档
-        doc.save(file_path)
+        total_formatted, failed_operations = _process_by_index(file_path, save_path, _do_format, format_operations, save)
         
         result_msg = f"成功批量格式化 {total_formatted} 个段落"
         if failed_operations:
@@ -186,7 +240,9 @@ def batch_format_paragraphs(
 def batch_set_paragraph_spacing(
     file_path: str,
     spacing_operations: List[Dict[str, Any]],
-    output_path: Optional[str] = None
+    output_path: Optional[str] = None,
+    save_path: Optional[str] = None,
+    save: bool = True
 ) -> str:
     """
     批量设置段落间距
@@ -200,136 +256,413 @@ def batch_set_paragraph_spacing(
             - line_spacing: 行间距（可选）
             - line_spacing_rule: 行间距规则（可选）
         output_path: 输出路径，如果为None则从环境变量获取
+        save_path: 另存为路径（可选），为None时覆盖原文件
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，由之后的保存或close_document写盘
     
     Returns:
         操作结果信息
     """
+    if not spacing_operations:
+        return "没有需要执行的间距设置操作"
+    
     # 处理文件路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
+    file_path = resolve_docx(file_path, output_path)
     
-    if not os.path.isabs(file_path):
-        file_path = os.path.join(output_path, file_path)
+    if not os.path.exists(file_path):
+        return f"错误: 文件 {file_path} 不存在"
+    
+    if save_path:
+        save_path = resolve_docx(save_path, output_path)
+    
+    try:
+        total_processed, failed_operations = _process_by_index(file_path, save_path, _do_spacing, spacing_operations, save)
+        
+        result_msg = f"成功批量设置 {total_processed} 个段落的间距"
+        if failed_operations:
+            result_msg += f"，但有 {len(failed_operations)} 个操作失败"
+        
+        return result_msg
+        
+    except Exception as e:
+        return f"批量设置段落间距时出错: {str(e)}"
+
+def batch_document_operations(
+    file_path: str,
+    operations: List[Dict[str, Any]],
+    output_path: Optional[str] = None,
+    save_path: Optional[str] = None,
+    save: bool = True
+) -> str:
+    """
+    在一次打开和保存之间依次执行添加段落、格式化和间距设置操作
+    
+    Args:
+        file_path: Word文档路径
+        operations: 操作列表，按顺序执行，每个元素包含：
+            - op: 操作类型，add/format/spacing
+            - 其余字段与batch_add_formatted_paragraphs的段落数据、
+              batch_format_paragraphs的格式化操作或batch_set_paragraph_spacing的间距操作相同
+        output_path: 输出路径，如果为None则从环境变量获取
+        save_path: 另存为路径（可选），为None时覆盖原文件
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，由之后的保存或close_document写盘
+    
+    Returns:
+        操作结果信息
+    """
+    if not operations:
+        return "没有需要执行的操作"
+    
+    # 处理文件路径
+    file_path = resolve_docx(file_path, output_path)
     
     if not os.path.exists(file_path):
         return f"错误: 文件 {file_path} 不存在"
     
+    if save_path:
+        save_path = resolve_docx(save_path, output_path)
+    
     try:
-        doc = Document(file_path)
-        total_processed = 0
+        counts = {'add': 0, 'format': 0, 'spacing': 0}
         failed_operations = []
         
-        # 批量处理间距设置操作
-        for i, operation in enumerate(spacing_operations):
-            try:
-                paragraph_indices = operation.get('paragraph_indices', [])
+        with BatchSession(file_path, save_path, save) as session:
+            handlers = {
+                'add': session.add_paragraphs,
+                'format': session.format,
+                'spacing': session.set_spacing,
+            }
+            # 连续的同类操作合并为一次调用，添加段落后段落列表也只刷新一次
+            start = 0
+            while start < len(operations):
+                op = operations[start].get('op')
+                end = start + 1
+                while end < len(operations) and operations[end].get('op') == op:
+                    end += 1
                 
-                for paragraph_index in paragraph_indices:
-                    if 0 <= paragraph_index < len(doc.paragraphs):
-                        paragraph = doc.paragraphs[paragraph_index]
-                        _apply_paragraph_spacing(paragraph, operation)
-                        total_processed += 1
-                    else:
-                        failed_operations.append((i, f"无效的段落索引: {paragraph_index}"))
-                        
-            except Exception as e:
-                failed_operations.append((i, str(e)))
-        
-        # 保存文档
-        doc.save(file_path)
+                handler = handlers.get(op)
+                if handler is None:
+                    failed_operations.extend((i, f"无效的操作类型: {op}") for i in range(start, end))
+                else:
+                    count, failed = handler(operations[start:end])
+                    counts[op] += count
+                    # 失败操作的序号换算为在operations中的位置
+                    failed_operations.extend((start + i, message) for i, message in failed)
+                start = end
         
-        result_msg = f"成功批量设置 {total_processed} 个段落的间距"
+        result_msg = (
+            f"成功在文档 {os.path.basename(file_path)} 中添加 {counts['add']} 个段落，"
+            f"格式化 {counts['format']} 个段落，设置 {counts['spacing']} 个段落的间距"
+        )
         if failed_operations:
             result_msg += f"，但有 {len(failed_operations)} 个操作失败"
         
         return result_msg
         
     except Exception as e:
-        return f"批量设置段落间距时出错: {str(e)}"
+        return f"批量执行文档操作时出错: {str(e)}"
+
+def _process_by_index(file_path: str, save_path: Optional[str], process, operations: List[Dict[str, Any]],
+                      save: bool = True):
+    """
+    对文档的正文段落执行process(paras, operations)，有修改时保存一次。
+    
+    文档已在缓存中（可能带有未写盘的修改）或不立即保存时修改缓存中的对象；
+    否则只按索引修改段落，直接处理document.xml，无需构建完整的文档对象模型。
+    
+    Returns:
+        process的返回值 (成功数量, 失败操作列表)
+    """
+    doc = peek_doc(file_path) if save else get_doc(file_path)
+    if doc is not None:
+        try:
+            count, failed_operations = process(doc.paragraphs, operations)
+            if count and save:
+                save_doc(doc, file_path, save_path)
+            elif count:
+                mark_dirty(doc, file_path)
+        except Exception:
+            evict(file_path)
+            raise
+        return count, failed_operations
+    
+    root = open_doc_xml(file_path)
+    count, failed_operations = process(_body_paragraphs(root), operations)
+    if count:
+        save_doc_xml(file_path, root, save_path)
+    return count, failed_operations
+
+def _body_paragraphs(root) -> List[Paragraph]:
+    """返回document.xml中正文的顶层段落，顺序与doc.paragraphs一致"""
+    body = root.find(_QN_BODY)
+    return [Paragraph(p, None) for p in body.findall(_QN_P)]
+
+def _do_add(doc, paragraphs_data: List[Dict[str, Any]]):
+    """在已打开的文档中批量添加段落，返回 (成功数量, 失败操作列表)"""
+    success_count = 0
+    failed_operations = []
+    
+    # insert_position以原文档的段落索引为准
+    body = doc.element.body
+    original_paragraphs = body.findall(_QN_P)
+    new_elements = []
+    pending_moves = []
+    # 同一批次中标题样式和格式模板只解析、构建一次
+    style_ids = {}
+    templates = {}
+    
+    # 批量处理段落：新段落先在文档树外构建，最后一次插入到正文末尾
+    for i, para_data in enumerate(paragraphs_data):
+        try:
+            # 获取基本参数
+            text = para_data.get('text', '')
+            is_heading = para_data.get('is_heading', False)
+            heading_level = para_data.get('heading_level', 1)
+            alignment = para_data.get('alignment', 'left')
+            insert_position = para_data.get('insert_position', -1)
+            
+            # 创建段落或标题（与doc.add_heading相同：0级为Title样式）
+            p = OxmlElement('w:p')
+            paragraph = Paragraph(p, doc._body)
+            if is_heading:
+                if not 0 <= heading_level <= 9:
+                    raise ValueError(f"标题级别必须在0到9之间: {heading_level}")
+                style_name = "Title" if heading_level == 0 else f"Heading {heading_level}"
+                if style_name not in style_ids:
+                    style_ids[style_name] = doc.part.get_style_id(style_name, WD_STYLE_TYPE.PARAGRAPH)
+                p.style = style_ids[style_name]
+            if text:
+                paragraph.add_run(text)
+            
+            # 应用对齐方式
+            alignment_value = _ALIGNMENT_MAP.get(alignment.lower())
+            if alignment_value is not None:
+                paragraph.alignment = alignment_value
+            
+            # 应用文本格式，格式参数相同的段落共用一个rPr模板
+            key = _format_key(para_data)
+            rpr_template = templates.get(key)
+            if rpr_template is None:
+                rpr_template = templates[key] = _build_rpr_template(*key)
+            _apply_rpr_template(paragraph, rpr_template)
+            
+            # 应用段落间距
+            _apply_paragraph_spacing(paragraph, _resolve_spacing(para_data))
+            
+            new_elements.append(p)
+            # 记录插入位置，循环结束后统一处理
+            if 0 <= insert_position < len(original_paragraphs):
+                pending_moves.append((p, insert_position))
+            
+            success_count += 1
+            
+        except Exception as e:
+            failed_operations.append((i, str(e)))
+    
+    # 与add_paragraph相同，插入到sectPr之前
+    sectPr = body.sectPr
+    end = body.index(sectPr) if sectPr is not None else len(body)
+    body[end:end] = new_elements
+    
+    # 倒序移动到目标段落之后，同一位置的多个段落保持输入顺序
+    for new_p, insert_position in reversed(pending_moves):
+        original_paragraphs[insert_position].addnext(new_p)
+    
+    return success_count, failed_operations
+
+def _do_format(paras, format_operations: List[Dict[str, Any]]):
+    """对段落列表批量应用文本格式，返回 (成功数量, 失败操作列表)"""
+    n_paras = len(paras)
+    total_formatted = 0
+    failed_operations = []
+    # 格式参数相同的操作共用一个rPr模板，按操作顺序应用，后面的操作仍覆盖前面的
+    templates = {}
+    
+    # 批量处理格式化操作
+    for i, operation in enumerate(format_operations):
+        try:
+            paragraph_indices = operation.get('paragraph_indices', [])
+            key = _format_key(operation)
+            rpr_template = templates.get(key)
+            if rpr_template is None:
+                rpr_template = templates[key] = _build_rpr_template(*key)
+            
+            for paragraph_index in paragraph_indices:
+                if 0 <= paragraph_index < n_paras:
+                    _apply_rpr_template(paras[paragraph_index], rpr_template)
+                    total_formatted += 1
+                else:
+                    failed_operations.append((i, f"无效的段落索引: {paragraph_index}"))
+                    
+        except Exception as e:
+            failed_operations.append((i, str(e)))
+    
+    return total_formatted, failed_operations
+
+def _do_spacing(paras, spacing_operations: List[Dict[str, Any]]):
+    """对段落列表批量设置间距，返回 (成功数量, 失败操作列表)"""
+    n_paras = len(paras)
+    total_processed = 0
+    failed_operations = []
+    
+    # 批量处理间距设置操作
+    for i, operation in enumerate(spacing_operations):
+        try:
+            paragraph_indices = operation.get('paragraph_indices', [])
+            # 每个操作的间距值只转换一次，应用到其中的所有段落
+            spacing = _resolve_spacing(operation)
+            
+            for paragraph_index in paragraph_indices:
+                if 0 <= paragraph_index < n_paras:
+                    _apply_paragraph_spacing(paras[paragraph_index], spacing)
+                    total_processed += 1
+                else:
+                    failed_operations.append((i, f"无效的段落索引: {paragraph_index}"))
+                    
+        except Exception as e:
+            failed_operations.append((i, str(e)))
+    
+    return total_processed, failed_operations
 
-def _apply_text_formatting(paragraph, format_data: Dict[str, Any]):
-    """应用文本格式"""
-    font_name = format_data.get('font_name')
-    font_size = format_data.get('font_size')
-    bold = format_data.get('bold', False)
-    italic = format_data.get('italic', False)
-    underline = format_data.get('underline', False)
+def _format_key(format_data: Dict[str, Any]) -> tuple:
+    """
+    把格式参数转换为_build_rpr_template的参数元组，颜色只解析一次。
+    
+    参数相同的格式生成相同的元组，可以作为字典键复用已构建的模板。
+    """
     font_color = format_data.get('font_color')
     highlight_color = format_data.get('highlight_color')
-    
-    # 确保段落有run
+    return (
+        format_data.get('font_name'),
+        format_data.get('font_size'),
+        format_data.get('bold', False),
+        format_data.get('italic', False),
+        format_data.get('underline', False),
+        _parse_rgb(font_color) if font_color else None,
+        _highlight_shd(highlight_color) if highlight_color else None,
+    )
+
+def _apply_rpr_template(paragraph, rpr_template):
+    """用rPr模板设置段落中所有run的格式"""
+    # 确保段落有run：保留段落属性，其余内容替换为一个包含原文本的run
     if len(paragraph.runs) == 0:
-        original_text = paragraph.text
-        for child in list(paragraph._element):
-            paragraph._element.remove(child)
-        paragraph.add_run(original_text)
+        _replace_paragraph_text(paragraph._p, paragraph.text)
     
-    # 应用格式到所有runs
+    # 所有格式属性合并在一个rPr模板中，每个run只需一次替换
     for run in paragraph.runs:
-        if font_name:
-            run.font.name = font_name
-            run._element.get_or_add_rPr().get_or_add_rFonts().set(qn('w:eastAsia'), font_name)
-        
-        if font_size:
-            run.font.size = Pt(font_size)
-        
-        run.font.bold = bold
-        run.font.italic = italic
-        run.font.underline = underline
-        
-        # 设置字体颜色
-        if font_color:
-            try:
-                if font_color.startswith("#"):
-                    font_color = font_color[1:]
-                r = int(font_color[0:2], 16)
-                g = int(font_color[2:4], 16)
-                b = int(font_color[4:6], 16)
-                run.font.color.rgb = RGBColor(r, g, b)
-            except ValueError:
-                pass
-        
-        # 设置高亮颜色
-        if highlight_color:
-            highlight_color_map = {
-                "yellow": "FFFF00", "green": "00FF00", "blue": "0000FF",
-                "red": "FF0000", "pink": "FFC0CB", "turquoise": "40E0D0"
-            }
-            if highlight_color.lower() in highlight_color_map:
-                shading_elm = OxmlElement('w:shd')
-                color_value = highlight_color_map[highlight_color.lower()]
-                shading_elm.set(qn('w:fill'), color_value)
-                run._element.get_or_add_rPr().append(shading_elm)
+        _replace_rpr(run._element, rpr_template)
+
+def _build_rpr_template(font_name, font_size, bold, italic, underline, rgb, shd_template):
+    """根据格式参数构建w:rPr模板元素"""
+    rPr = OxmlElement('w:rPr')
+    
+    if font_name:
+        rFonts = OxmlElement('w:rFonts')
+        rFonts.set(_QN_ASCII, font_name)
+        rFonts.set(_QN_HANSI, font_name)
+        rFonts.set(_QN_EAST_ASIA, font_name)
+        rPr.append(rFonts)
+    
+    # 与python-docx一致：False写成w:val="0"，下划线关闭写成none
+    b = OxmlElement('w:b')
+    if not bold:
+        b.set(_QN_VAL, '0')
+    rPr.append(b)
+    
+    i = OxmlElement('w:i')
+    if not italic:
+        i.set(_QN_VAL, '0')
+    rPr.append(i)
+    
+    if rgb is not None:
+        color = OxmlElement('w:color')
+        color.set(_QN_VAL, str(rgb))
+        rPr.append(color)
+    
+    if font_size:
+        # w:sz以半磅为单位
+        sz = OxmlElement('w:sz')
+        sz.set(_QN_VAL, str(int(round(float(font_size) * 2))))
+        rPr.append(sz)
+    
+    u = OxmlElement('w:u')
+    u.set(_QN_VAL, 'single' if underline else 'none')
+    rPr.append(u)
+    
+    if shd_template is not None:
+        rPr.append(deepcopy(shd_template))
+    
+    return rPr
+
+def _replace_rpr(r_element, rpr_template):
+    """用模板替换run的rPr，保留模板中未涉及的原有属性"""
+    new_rPr = deepcopy(rpr_template)
+    old_rPr = r_element.rPr
+    if old_rPr is not None:
+        template_tags = {child.tag for child in new_rPr}
+        kept = [child for child in old_rPr if child.tag not in template_tags]
+        if kept:
+            new_rPr.extend(kept)
+            new_rPr[:] = sorted(new_rPr, key=lambda child: _RPR_ORDER.get(child.tag, len(_RPR_ORDER)))
+        r_element.remove(old_rPr)
+    r_element.insert(0, new_rPr)
+
+@lru_cache(maxsize=256)
+def _parse_rgb(color_str: str) -> Optional[RGBColor]:
+    """解析十六进制颜色字符串，无效时返回None"""
+    try:
+        r, g, b = hex_to_rgb_tuple(color_str)
+        return RGBColor(r, g, b)
+    except ValueError:
+        return None
 
-def _apply_paragraph_spacing(paragraph, spacing_data: Dict[str, Any]):
-    """应用段落间距"""
+@lru_cache(maxsize=32)
+def _highlight_shd(color_name: str):
+    """返回高亮颜色对应的w:shd模板元素，使用时需要复制"""
+    color_value = _HIGHLIGHT_COLOR_MAP.get(color_name.lower())
+    if not color_value:
+        return None
+    shading_elm = OxmlElement('w:shd')
+    shading_elm.set(_QN_FILL, color_value)
+    return shading_elm
+
+def _resolve_spacing(spacing_data: Dict[str, Any]) -> tuple:
+    """
+    把间距参数一次转换为可直接赋值的值，同一组参数应用到多个段落时不再逐段转换。
+    
+    Returns:
+        (段前间距, 段后间距, 行间距规则, 行间距值)，为None的项不设置
+    """
     before_spacing = spacing_data.get('before_spacing')
     after_spacing = spacing_data.get('after_spacing')
     line_spacing = spacing_data.get('line_spacing')
     line_spacing_rule = spacing_data.get('line_spacing_rule', 'multiple')
     
+    space_before = Pt(before_spacing) if before_spacing is not None else None
+    space_after = Pt(after_spacing) if after_spacing is not None else None
+    
+    # 无效的行间距规则不设置行间距
+    rule = None
+    line_value = None
+    if line_spacing is not None and line_spacing_rule in _SPACING_RULE_MAP:
+        rule = _SPACING_RULE_MAP[line_spacing_rule]
+        line_value = line_spacing if line_spacing_rule == "multiple" else Pt(line_spacing)
+    
+    return space_before, space_after, rule, line_value
+
+def _apply_paragraph_spacing(paragraph, spacing: tuple):
+    """应用_resolve_spacing转换后的段落间距"""
+    space_before, space_after, rule, line_value = spacing
+    paragraph_format = paragraph.paragraph_format
+    
     # 设置段前间距
-    if before_spacing is not None:
-        paragraph.paragraph_format.space_before = Pt(before_spacing)
+    if space_before is not None:
+        paragraph_format.space_before = space_before
     
     # 设置段后间距
-    if after_spacing is not None:
-        paragraph.paragraph_format.space_after = Pt(after_spacing)
+    if space_after is not None:
+        paragraph_format.space_after = space_after
     
     # 设置行间距
-    if line_spacing is not None:
-        spacing_rule_map = {
-            "multiple": WD_LINE_SPACING.MULTIPLE,
-            "exact": WD_LINE_SPACING.EXACTLY,
-            "atLeast": WD_LINE_SPACING.AT_LEAST
-        }
-        
-        if line_spacing_rule in spacing_rule_map:
-            paragraph.paragraph_format.line_spacing_rule = spacing_rule_map[line_spacing_rule]
-            
-            if line_spacing_rule == "multiple":
-                paragraph.paragraph_format.line_spacing = line_spacing
-            else:
-                paragraph.paragraph_format.line_spacing = Pt(line_spacing)
+    if rule is not None:
+        paragraph_format.line_spacing_rule = rule
+        paragraph_format.line_spacing = line_value
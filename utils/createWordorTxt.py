@@ -2,15 +2,43 @@
 文档创建模块 - 用于创建空白的TXT和Word文档
 """
 
+import importlib.util
 import os
+import threading
 from typing import Optional
 
-# 检查python-docx库是否可用
-try:
-    from docx import Document
-    docx_installed = True
-except ImportError:
-    docx_installed = False
+# 检查python-docx库是否可用（不导入，创建空白文档时用不到它）
+_docx_spec = importlib.util.find_spec("docx")
+docx_installed = _docx_spec is not None
+
+# python-docx自带的空白模板，首次创建文档时读取，之后直接写入，无需解析再序列化
+_EMPTY_DOCX_BYTES = None
+
+def _empty_docx_bytes() -> Optional[bytes]:
+    """读取python-docx自带的default.docx，找不到时返回None"""
+    global _EMPTY_DOCX_BYTES
+    if _EMPTY_DOCX_BYTES is None and _docx_spec.submodule_search_locations:
+        template = os.path.join(_docx_spec.submodule_search_locations[0], 'templates', 'default.docx')
+        try:
+            with open(template, 'rb') as f:
+                _EMPTY_DOCX_BYTES = f.read()
+        except OSError:
+            pass
+    return _EMPTY_DOCX_BYTES
+
+from utils._paths import resolve_output_path
+
+# 已确认存在的目录，避免批量创建文件时重复调用makedirs
+_ensured_dirs = set()
+_ensured_dirs_lock = threading.Lock()
+
+def _ensure_dir(directory: str) -> None:
+    """确保目录存在，同一目录只创建一次"""
+    if directory in _ensured_dirs:
+        return
+    os.makedirs(directory, exist_ok=True)
+    with _ensured_dirs_lock:
+        _ensured_dirs.add(directory)
 
 def create_empty_txt(filename: str, output_path: Optional[str] = None) -> str:
     """
@@ -28,21 +56,17 @@ def create_empty_txt(filename: str, output_path: Optional[str] = None) -> str:
         filename += '.txt'
     
     # 从环境变量获取输出路径，如果未设置则使用默认桌面路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
+    output_path = resolve_output_path(output_path)
     
     # 创建完整的文件路径
     file_path = os.path.join(output_path, filename)
     
     try:
         # 创建输出目录（如果不存在）
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        _ensure_dir(os.path.dirname(file_path))
         
-        # 创建空白文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            pass
+        # 创建空白文件（直接创建/截断，无需文本编码和缓冲层）
+        os.close(os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644))
         return f"成功在 {output_path} 创建了空白文件: {filename}"
     except Exception as e:
         return f"创建文件时出错: {str(e)}"
@@ -67,23 +91,24 @@ def create_word_document(filename: str, output_path: Optional[str] = None) -> st
         filename += '.docx'
     
     # 从环境变量获取输出路径，如果未设置则使用默认桌面路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
+    output_path = resolve_output_path(output_path)
     
     # 创建完整的文件路径
     file_path = os.path.join(output_path, filename)
     
     try:
         # 创建输出目录（如果不存在）
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        _ensure_dir(os.path.dirname(file_path))
         
         # 创建新的Word文档
-        doc = Document()
-        
-        # 保存文档
-        doc.save(file_path)
+        template_bytes = _empty_docx_bytes()
+        if template_bytes is not None:
+            with open(file_path, 'wb') as f:
+                f.write(template_bytes)
+        else:
+            # 找不到模板文件时（不同版本的python-docx）退回到常规方式
+            from docx import Document
+            Document().save(file_path)
         
         return f"成功在 {output_path} 创建了Word文档: {filename}"
     except Exception as e:
@@ -2,7 +2,14 @@
 文档格式化操作模块 - 页眉页脚、页面布局和文档合并功能
 """
 
+import io
 import os
+import posixpath
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from copy import deepcopy
+from pickle import PicklingError
 from typing import List, Dict, Any, Optional
 from docx import Document
 from docx.shared import Cm, Pt, RGBColor
@@ -10,6 +17,11 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
 from docx.enum.section import WD_ORIENTATION
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.opc.part import PartFactory
+from docx.oxml.parser import parse_xml
+from lxml import etree
 
 # 检查docx库安装状态
 try:
@@ -18,6 +30,64 @@ try:
 except ImportError:
     docx_installed = False
 
+from utils._colors import hex_to_rgb_tuple, is_hex_color
+# Word COM实例在多次调用之间共享，pywin32不可用时get_word()抛出ImportError
+from utils._word_app import get_word, open_document
+from utils._paths import resolve_docx_path
+# 已解析的文档在连续调用之间复用，文件被修改后自动重新解析
+from utils._doc_cache import get_doc, save_doc, evict, flush
+from utils._fast_docx import save_document, main_part_name, part_rels, content_types
+
+_QN_SECTPR = qn('w:sectPr')
+_QN_BODY = qn('w:body')
+_QN_EASTASIA = qn('w:eastAsia')
+_QN_ASCII = qn('w:ascii')
+_QN_HANSI = qn('w:hAnsi')
+_QN_FLDCHARTYPE = qn('w:fldCharType')
+
+def _set_run_fonts(r, font_name: str) -> None:
+    """
+    设置run的西文和中文字体。
+    
+    与run.font.name加上单独设置w:eastAsia的结果相同，但w:rPr和w:rFonts只查找（或创建）一次。
+    """
+    rFonts = r.get_or_add_rPr().get_or_add_rFonts()
+    rFonts.set(_QN_ASCII, font_name)
+    rFonts.set(_QN_HANSI, font_name)
+    rFonts.set(_QN_EASTASIA, font_name)
+
+def _build_page_field():
+    """构建页码域（PAGE）的XML元素模板，使用时深拷贝"""
+    begin = OxmlElement('w:fldChar')
+    begin.set(_QN_FLDCHARTYPE, 'begin')
+    
+    instr_text = OxmlElement('w:instrText')
+    instr_text.text = ' PAGE '
+    
+    end = OxmlElement('w:fldChar')
+    end.set(_QN_FLDCHARTYPE, 'end')
+    return begin, instr_text, end
+
+_PAGE_FIELD_TEMPLATE = _build_page_field()
+
+# 页面方向和行间距规则映射，键为小写
+_ORIENTATION_MAP = {
+    "portrait": WD_ORIENTATION.PORTRAIT,
+    "landscape": WD_ORIENTATION.LANDSCAPE
+}
+# 行间距规则 -> (WD_LINE_SPACING值, 行间距值是否以磅为单位)
+_LINE_SPACING_RULES = {
+    "multiple": (WD_LINE_SPACING.MULTIPLE, False),
+    "exact": (WD_LINE_SPACING.EXACTLY, True),
+    "atleast": (WD_LINE_SPACING.AT_LEAST, True)
+}
+_R_NS_PREFIX = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+# [Content_Types].xml中没有声明类型的部件按二进制数据处理
+_DEFAULT_CONTENT_TYPE = 'application/octet-stream'
+# 待合并文档达到该数量时，在多个进程中并行解析
+_PARALLEL_MERGE_MIN_FILES = 4
+
+@resolve_docx_path('file_path')
 def add_header_footer(
     file_path: str,
     header_text: str = None,
@@ -42,18 +112,6 @@ def add_header_footer(
     if not docx_installed:
         return "错误: 无法添加页眉页脚，请先安装python-docx库: pip install python-docx"
     
-    # 处理文件路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
-    
-    if not os.path.isabs(file_path):
-        file_path = os.path.join(output_path, file_path)
-    
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     # 检查是否提供了有效的参数
     if header_text is None and footer_text is None and not page_numbers:
         return "错误: 请至少提供页眉文本、页脚文本或启用页码"
@@ -61,42 +119,43 @@ def add_header_footer(
     try:
         # 尝试使用Word COM对象添加页眉页脚（功能最完整）
         try:
-            import win32com.client
-            import pythoncom
+            word = get_word()
             
-            pythoncom.CoInitialize()
-            word = win32com.client.Dispatch("Word.Application")
-            word.Visible = False
-            
-            doc = word.Documents.Open(file_path)
-            
-            # 添加页眉
-            if header_text:
-                for section in range(1, doc.Sections.Count + 1):
-                    header = doc.Sections(section).Headers(1)
-                    header.Range.Text = header_text
-            
-            # 添加页脚
-            if footer_text or page_numbers:
-                for section in range(1, doc.Sections.Count + 1):
-                    footer = doc.Sections(section).Footers(1)
+            doc = open_document(word, file_path)
+            try:
+                # 只设置第一节，其余各节链接到前一节，避免逐节跨进程赋值
+                sections = doc.Sections
+                section_count = sections.Count
+                first_section = sections(1)
+                
+                # 添加页眉
+                if header_text:
+                    first_section.Headers(1).Range.Text = header_text
+                    for section in range(2, section_count + 1):
+                        sections(section).Headers(1).LinkToPrevious = True
+                
+                # 添加页脚
+                if footer_text or page_numbers:
+                    footer = first_section.Footers(1)
                     
                     if footer_text:
                         footer.Range.Text = footer_text
                     
                     if page_numbers:
                         footer.PageNumbers.Add()
-            
-            doc.Save()
-            doc.Close()
-            word.Quit()
-            pythoncom.CoUninitialize()
+                    
+                    for section in range(2, section_count + 1):
+                        sections(section).Footers(1).LinkToPrevious = True
+                
+                doc.Save()
+            finally:
+                doc.Close(SaveChanges=0)  # 0 = wdDoNotSaveChanges
             
             return f"成功为文档 {os.path.basename(file_path)} 添加页眉页脚"
         
         except ImportError:
             # 使用python-docx的方式添加页眉页脚（功能受限）
-            doc = Document(file_path)
+            doc = get_doc(file_path)
             
             for section in doc.sections:
                 if header_text:
@@ -116,28 +175,21 @@ def add_header_footer(
                     footer_para = footer.paragraphs[0] if footer_text else footer.add_paragraph()
                     
                     run = footer_para.add_run()
-                    
-                    fldChar = OxmlElement('w:fldChar')
-                    fldChar.set(qn('w:fldCharType'), 'begin')
-                    run._r.append(fldChar)
-                    
-                    instrText = OxmlElement('w:instrText')
-                    instrText.text = ' PAGE '
-                    run._r.append(instrText)
-                    
-                    fldChar = OxmlElement('w:fldChar')
-                    fldChar.set(qn('w:fldCharType'), 'end')
-                    run._r.append(fldChar)
+                    for element in _PAGE_FIELD_TEMPLATE:
+                        run._r.append(deepcopy(element))
                     
                     footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
             
-            doc.save(file_path)
+            save_doc(doc, file_path)
             
             return f"成功为文档 {os.path.basename(file_path)} 添加页眉页脚"
     
     except Exception as e:
+        # 丢弃可能改了一半的缓存文档
+        evict(file_path)
         return f"添加页眉页脚时出错: {str(e)}"
 
+@resolve_docx_path('file_path')
 def set_page_layout(
     file_path: str,
     orientation: str = None,
@@ -173,29 +225,13 @@ def set_page_layout(
     if not docx_installed:
         return "错误: 无法设置页面布局，请先安装python-docx库: pip install python-docx"
     
-    # 处理文件路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
-    
-    if not os.path.isabs(file_path):
-        file_path = os.path.join(output_path, file_path)
-    
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     # 校验方向参数
-    orientation_map = {
-        "portrait": WD_ORIENTATION.PORTRAIT,
-        "landscape": WD_ORIENTATION.LANDSCAPE
-    }
-    
-    if orientation and orientation.lower() not in orientation_map:
+    orientation_value = _ORIENTATION_MAP.get(orientation.lower()) if orientation else None
+    if orientation and orientation_value is None:
         return f"错误: 无效的页面方向 '{orientation}'，可选值为: portrait, landscape"
     
     try:
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         total_sections = len(doc.sections)
         
         # 确定要处理的节索引
@@ -235,8 +271,8 @@ def set_page_layout(
                 section = doc.sections[section_index]
                 
                 # 设置页面方向
-                if orientation:
-                    section.orientation = orientation_map[orientation.lower()]
+                if orientation_value is not None:
+                    section.orientation = orientation_value
                 
                 # 设置页面尺寸
                 if page_width and page_height:
@@ -262,7 +298,7 @@ def set_page_layout(
                 failed_indices.append((section_index, str(e)))
         
         # 保存文档
-        doc.save(file_path)
+        save_doc(doc, file_path)
         
         # 生成结果消息
         if apply_to_all:
@@ -278,12 +314,15 @@ def set_page_layout(
         return result_msg
         
     except Exception as e:
+        evict(file_path)
         return f"设置页面布局时出错: {str(e)}"
 
+@resolve_docx_path('main_file_path', 'files_to_merge', optional=('main_file_path',))
 def merge_documents(
     main_file_path: str,
     files_to_merge: List[str],
-    output_path: Optional[str] = None
+    output_path: Optional[str] = None,
+    compression_level: int = 6
 ) -> str:
     """
     合并多个Word文档。
@@ -292,6 +331,7 @@ def merge_documents(
         main_file_path: 主文档路径（合并后的文档将保存为该文件）
         files_to_merge: 要合并的文档路径列表
         output_path: 输出路径，如果为None则从环境变量获取
+        compression_level: 保存时的zip压缩级别（0-9），默认6；大文档可设为1以加快保存，但文件更大（仅python-docx方式有效）
     
     Returns:
         操作结果信息
@@ -299,60 +339,42 @@ def merge_documents(
     if not docx_installed:
         return "错误: 无法合并文档，请先安装python-docx库: pip install python-docx"
     
-    # 处理文件路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
-    
-    if not os.path.isabs(main_file_path):
-        main_file_path = os.path.join(output_path, main_file_path)
-    
     if not files_to_merge:
         return "错误: 请提供至少一个要合并的文档"
     
-    # 处理文件路径
-    processed_files = []
-    for file_path in files_to_merge:
-        if not os.path.isabs(file_path):
-            file_path = os.path.join(output_path, file_path)
-        
-        if not os.path.exists(file_path):
-            return f"错误: 文件 {file_path} 不存在"
-        
-        processed_files.append(file_path)
+    # 路径已由装饰器解析并检查
+    processed_files = files_to_merge
     
     try:
+        # 下面直接读取磁盘上的文件，先写入缓存中未写盘的修改
+        for path in (main_file_path, *processed_files):
+            flush(path)
+        
         # 尝试使用Word COM对象合并文档（功能最完整）
         try:
-            import win32com.client
-            import pythoncom
+            word = get_word()
             
-            pythoncom.CoInitialize()
-            word = win32com.client.Dispatch("Word.Application")
-            word.Visible = False
-            
-            if not os.path.exists(main_file_path):
-                doc = word.Documents.Add()
-                doc.SaveAs(main_file_path)
-            else:
-                doc = word.Documents.Open(main_file_path)
-            
-            merged_count = 0
-            
-            for file_path in processed_files:
-                word.Selection.EndKey(Unit=6)
+            create_new = not os.path.exists(main_file_path)
+            doc = word.Documents.Add() if create_new else open_document(word, main_file_path)
+            try:
+                merged_count = 0
                 
-                if merged_count > 0:
-                    word.Selection.InsertBreak(Type=2)
+                # 直接在文档末尾的Range上插入，不移动Selection，避免Word每步重新排版和刷新
+                for file_path in processed_files:
+                    if merged_count > 0:
+                        end = doc.Content.End - 1
+                        doc.Range(end, end).InsertBreak(Type=2)  # 2 = wdSectionBreakNextPage
+                    
+                    end = doc.Content.End - 1
+                    doc.Range(end, end).InsertFile(file_path)
+                    merged_count += 1
                 
-                word.Selection.InsertFile(file_path)
-                merged_count += 1
-            
-            doc.Save()
-            doc.Close()
-            word.Quit()
-            pythoncom.CoUninitialize()
+                if create_new:
+                    doc.SaveAs(main_file_path)
+                else:
+                    doc.Save()
+            finally:
+                doc.Close(SaveChanges=0)  # 0 = wdDoNotSaveChanges
             
             return f"成功将 {merged_count} 个文档合并到 {os.path.basename(main_file_path)}"
         
@@ -365,46 +387,274 @@ def merge_documents(
             
             merged_count = 0
             
-            for file_path in processed_files:
-                doc_to_merge = Document(file_path)
-                
-                if merged_count > 0:
-                    main_doc.add_section()
-                
-                for paragraph in doc_to_merge.paragraphs:
-                    new_paragraph = main_doc.add_paragraph()
-                    
-                    for run in paragraph.runs:
-                        new_run = new_paragraph.add_run(run.text)
-                        new_run.bold = run.bold
-                        new_run.italic = run.italic
-                        new_run.underline = run.underline
-                        if run.font.size:
-                            new_run.font.size = run.font.size
-                        if run.font.name:
-                            new_run.font.name = run.font.name
+            if len(processed_files) >= _PARALLEL_MERGE_MIN_FILES:
+                merged_count = _merge_parallel(main_doc, processed_files)
+            
+            if merged_count == 0:
+                for file_path in processed_files:
+                    if merged_count > 0:
+                        main_doc.add_section()
                     
-                    new_paragraph.style = paragraph.style
-                    new_paragraph.alignment = paragraph.alignment
-                
-                for table in doc_to_merge.tables:
-                    new_table = main_doc.add_table(rows=len(table.rows), cols=len(table.columns))
-                    new_table.style = table.style
+                    # 流式读取源文档正文，把顶层元素逐个移入主文档，完整保留段落、表格及其格式
+                    _stream_body_elements(main_doc, file_path)
                     
-                    for i, row in enumerate(table.rows):
-                        for j, cell in enumerate(row.cells):
-                            if i < len(new_table.rows) and j < len(new_table.rows[i].cells):
-                                new_table.rows[i].cells[j].text = cell.text
-                
-                merged_count += 1
+                    merged_count += 1
             
-            main_doc.save(main_file_path)
+            save_document(main_doc, main_file_path, compression_level)
             
             return f"成功将 {merged_count} 个文档合并到 {os.path.basename(main_file_path)}"
     
     except Exception as e:
         return f"合并文档时出错: {str(e)}"
 
+def _extract_body(file_path: str):
+    """
+    工作进程入口：解析文档，返回正文XML、正文引用的关系以及这些关系可达的部件。
+    
+    Returns:
+        (正文XML字节串, {rId: (关系类型, 目标, 是否为外部关系)}, {部件名称: _zip_part_loader的返回值})
+    """
+    body = Document(file_path).element.body
+    with zipfile.ZipFile(file_path) as zf:
+        load_part = _zip_part_loader(zf)
+        main_rels = part_rels(zf, main_part_name(zf))
+        rels = {rId: main_rels[rId] for rId in _referenced_rids(body) if rId in main_rels}
+        
+        # 只收集正文实际引用到的部件，页眉页脚、样式等不随正文合并的部件不传回主进程
+        parts = {}
+        pending = [target for _, target, is_external in rels.values() if not is_external]
+        while pending:
+            name = pending.pop()
+            if name in parts or name not in zf.NameToInfo:
+                continue
+            parts[name] = load_part(name)
+            pending.extend(target for _, target, is_external in parts[name][3].values() if not is_external)
+    return etree.tostring(body), rels, parts
+
+def _merge_parallel(main_doc, processed_files: List[str]) -> int:
+    """
+    在进程池中并行解析待合并的文档，在当前进程中依次拼接。
+    
+    Returns:
+        合并的文档数量；进程池不可用时返回0，由调用方改为串行合并
+    """
+    max_workers = min(os.cpu_count() or 1, len(processed_files))
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            extracted = list(executor.map(_extract_body, processed_files))
+    except (BrokenProcessPool, PicklingError, OSError):
+        return 0
+    
+    for index, (body_xml, rels, parts) in enumerate(extracted):
+        if index > 0:
+            main_doc.add_section()
+        
+        dst_part = main_doc.part
+        _append_children(
+            main_doc, parse_xml(body_xml),
+            lambda rId: _copy_related_part(dst_part, rels.get(rId), parts.__getitem__)
+        )
+        extracted[index] = None
+    
+    return len(processed_files)
+
+def _stream_body_elements(dst_doc, file_path: str) -> int:
+    """
+    流式解析源文档的document.xml，把正文的顶层元素逐个移动到目标文档末尾。
+    
+    不为源文档构建python-docx对象模型，已移走的元素也不再留在解析树中，
+    内存占用只与单个顶层元素的大小有关。
+    
+    Returns:
+        移动的元素数量
+    """
+    dst_body = dst_doc.element.body
+    sectPr = dst_body.find(_QN_SECTPR)
+    dst_part = dst_doc.part
+    rid_map = {}
+    count = 0
+    
+    with zipfile.ZipFile(file_path) as zf:
+        main_part = main_part_name(zf)
+        rels = part_rels(zf, main_part)
+        load_part = _zip_part_loader(zf)
+        
+        def copy_relationship(rId: str) -> Optional[str]:
+            return _copy_related_part(dst_part, rels.get(rId), load_part)
+        
+        with zf.open(main_part) as xml_stream:
+            for _, elem in etree.iterparse(xml_stream, events=('end',), remove_blank_text=True):
+                parent = elem.getparent()
+                # 只处理正文的顶层元素，其子元素随之一起移动
+                if parent is None or parent.tag != _QN_BODY or elem.tag == _QN_SECTPR:
+                    continue
+                
+                _remap_relationships(elem, copy_relationship, rid_map)
+                if sectPr is not None:
+                    sectPr.addprevious(elem)
+                else:
+                    dst_body.append(elem)
+                count += 1
+    
+    return count
+
+def _append_body_elements(dst_doc, src_doc) -> int:
+    """
+    将源文档正文的顶层元素复制到目标文档末尾（最后的sectPr之前）。
+    
+    Returns:
+        复制的元素数量
+    """
+    src_part, dst_part = src_doc.part, dst_doc.part
+    return _append_children(
+        dst_doc, src_doc.element.body,
+        lambda rId: _copy_relationship(src_part, dst_part, rId),
+        copy=True
+    )
+
+def _append_children(dst_doc, src_body, copy_relationship, copy: bool = False) -> int:
+    """
+    将src_body的顶层元素（sectPr除外）移动或复制到目标文档正文末尾。
+    
+    Args:
+        dst_doc: 目标文档
+        src_body: 源w:body元素
+        copy_relationship: 根据源rId在目标文档中建立关系并返回新rId的函数
+        copy: 为True时复制元素，否则直接移动
+    
+    Returns:
+        添加的元素数量
+    """
+    dst_body = dst_doc.element.body
+    sectPr = dst_body.find(_QN_SECTPR)
+    rid_map = {}
+    count = 0
+    
+    for child in list(src_body.iterchildren()):
+        if child.tag == _QN_SECTPR:
+            continue
+        
+        new_child = deepcopy(child) if copy else child
+        _remap_relationships(new_child, copy_relationship, rid_map)
+        
+        if sectPr is not None:
+            sectPr.addprevious(new_child)
+        else:
+            dst_body.append(new_child)
+        count += 1
+    
+    return count
+
+def _remap_relationships(element, copy_relationship, rid_map: Dict[str, Optional[str]]):
+    """复制元素中引用的图片、图表、嵌入对象和外部链接需要在目标文档中重新建立关系"""
+    for el in element.iter():
+        if not isinstance(el.tag, str):
+            continue
+        for attr, rId in el.attrib.items():
+            if not attr.startswith(_R_NS_PREFIX):
+                continue
+            if rId not in rid_map:
+                rid_map[rId] = copy_relationship(rId)
+            if rid_map[rId]:
+                el.set(attr, rid_map[rId])
+
+def _referenced_rids(element) -> set:
+    """元素及其子元素中以r:命名空间属性引用的全部rId"""
+    return {
+        value
+        for el in element.iter() if isinstance(el.tag, str)
+        for attr, value in el.attrib.items() if attr.startswith(_R_NS_PREFIX)
+    }
+
+def _copy_relationship(src_part, dst_part, rId: str) -> Optional[str]:
+    """在目标文档中建立与源关系等价的关系，返回新的rId；源文档中没有该关系时返回None"""
+    rel = src_part.rels.get(rId)
+    return _copy_related_part(dst_part, rel and _docx_rel_info(rel), _docx_part_info)
+
+def _docx_rel_info(rel) -> tuple:
+    """python-docx关系 -> (关系类型, 目标部件或外部链接, 是否为外部关系)"""
+    return rel.reltype, rel.target_ref if rel.is_external else rel.target_part, rel.is_external
+
+def _docx_part_info(part):
+    """python-docx部件 -> (部件名称, 内容类型, 数据, {rId: _docx_rel_info})"""
+    rels = {rId: _docx_rel_info(rel) for rId, rel in part.rels.items()}
+    return part.partname, part.content_type, part.blob, rels
+
+def _zip_part_loader(zf: zipfile.ZipFile):
+    """返回按包内名称读取部件的函数，结果格式与_docx_part_info相同，目标为包内的部件名称"""
+    types = content_types(zf)
+    
+    def load_part(name: str):
+        content_type = types.get(name) or types.get("*." + posixpath.splitext(name)[1].lstrip(".").lower())
+        return "/" + name, content_type or _DEFAULT_CONTENT_TYPE, zf.read(name), part_rels(zf, name)
+    
+    return load_part
+
+def _copy_related_part(dst_part, rel: Optional[tuple], load_part) -> Optional[str]:
+    """
+    在目标部件上建立与源关系等价的关系，返回新的rId。
+    
+    图片按内容去重；图表、OLE对象、SmartArt等其他内部关系连同目标部件及其
+    引用的部件（如图表的嵌入工作簿）一起复制。
+    
+    Args:
+        dst_part: 目标文档的主文档部件
+        rel: 源关系(关系类型, 目标, 是否为外部关系)，源文档中没有该关系时为None
+        load_part: 根据目标读取源部件的函数，格式见_docx_part_info
+    
+    Returns:
+        新的rId；源关系不存在或目标部件缺失时返回None
+    """
+    if rel is None:
+        return None
+    
+    reltype, target, is_external = rel
+    if is_external:
+        return dst_part.relate_to(target, reltype, is_external=True)
+    
+    try:
+        if reltype == RT.IMAGE:
+            new_rId, _ = dst_part.get_or_add_image(io.BytesIO(load_part(target)[2]))
+            return new_rId
+        return dst_part.relate_to(_copy_part(dst_part.package, target, reltype, load_part, {}), reltype)
+    except KeyError:
+        # 源文档中引用的部件不存在，无法复制
+        return None
+
+def _copy_part(package, target, reltype: str, load_part, copied: Dict[Any, Any]):
+    """
+    把源部件复制到目标包中，并按原rId复制它自己的关系，使部件内的引用保持有效。
+    
+    copied记录已复制的部件，部件之间循环引用时不会重复复制。
+    """
+    if target in copied:
+        return copied[target]
+    
+    partname, content_type, blob, rels = load_part(target)
+    taken = {part.partname for part in package.iter_parts()}
+    taken.update(part.partname for part in copied.values())
+    new_part = PartFactory(_next_partname(partname, taken), content_type, reltype, blob, package)
+    copied[target] = new_part
+    
+    for rId, (child_reltype, child_target, is_external) in rels.items():
+        if is_external:
+            new_part.rels.add_relationship(child_reltype, child_target, rId, is_external=True)
+        else:
+            child = _copy_part(package, child_target, child_reltype, load_part, copied)
+            new_part.rels.add_relationship(child_reltype, child, rId)
+    
+    return new_part
+
+def _next_partname(partname: str, taken) -> PackURI:
+    """按源部件名称的格式取一个目标包中未被占用的名称，例如/word/charts/chart1.xml -> chart2.xml"""
+    base, ext = posixpath.splitext(partname)
+    base = base.rstrip("0123456789")
+    n = 1
+    while PackURI(f"{base}{n}{ext}") in taken:
+        n += 1
+    return PackURI(f"{base}{n}{ext}")
+
+@resolve_docx_path('file_path')
 def apply_consistent_formatting(
     file_path: str,
     content_type: str = "heading",  # "heading", "title", "normal" (正文)
@@ -418,7 +668,8 @@ def apply_consistent_formatting(
     before_spacing: float = None,
     after_spacing: float = None,
     line_spacing: float = None,
-    line_spacing_rule: str = "multiple"
+    line_spacing_rule: str = "multiple",
+    compression_level: int = 6
 ) -> str:
     """
     将指定的格式应用到所有同级标题或正文，确保格式一致性。
@@ -437,6 +688,7 @@ def apply_consistent_formatting(
         after_spacing: 段后间距（磅值）
         line_spacing: 行间距值
         line_spacing_rule: 行间距规则（"multiple"/"exact"/"atLeast"）
+        compression_level: 保存时的zip压缩级别（0-9），默认6；大文档可设为1以加快保存，但文件更大
     
     Returns:
         操作结果信息
@@ -445,75 +697,53 @@ def apply_consistent_formatting(
     if not docx_installed:
         return "错误: 无法应用格式，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
         # 打开Word文档
-        doc = Document(file_path)
-        
-        # 根据内容类型和级别应用格式
-        target_style = None
-        format_count = 0
+        doc = get_doc(file_path)
         
-        if content_type.lower() == "heading":
-            # 为标题设置格式
+        # 根据内容类型和级别确定目标样式，None表示正文
+        content_type_lower = content_type.lower()
+        if content_type_lower == "heading":
             target_style = f"Heading {level}"
-            for paragraph in doc.paragraphs:
-                if paragraph.style.name == target_style:
-                    _apply_format_to_paragraph(
-                        paragraph, font_name, font_size, bold, italic, underline, 
-                        font_color, before_spacing, after_spacing, line_spacing, line_spacing_rule
-                    )
-                    format_count += 1
-                    
-        elif content_type.lower() == "title":
-            # 为文档标题设置格式
+        elif content_type_lower == "title":
             target_style = "Title"
-            for paragraph in doc.paragraphs:
-                if paragraph.style.name == target_style:
-                    _apply_format_to_paragraph(
-                        paragraph, font_name, font_size, bold, italic, underline, 
-                        font_color, before_spacing, after_spacing, line_spacing, line_spacing_rule
-                    )
-                    format_count += 1
-                    
-        elif content_type.lower() == "normal":
-            # 为正文设置格式
-            for paragraph in doc.paragraphs:
-                if paragraph.style.name == "Normal" or paragraph.style.name.startswith("Body"):
-                    _apply_format_to_paragraph(
-                        paragraph, font_name, font_size, bold, italic, underline, 
-                        font_color, before_spacing, after_spacing, line_spacing, line_spacing_rule
-                    )
-                    format_count += 1
-                    
+        elif content_type_lower == "normal":
+            target_style = None
         else:
             return f"错误: 不支持的内容类型 '{content_type}'，请使用 'heading', 'title' 或 'normal'"
         
+        fmt = dict(
+            font_name=font_name, font_size=font_size, bold=bold, italic=italic,
+            underline=underline, font_color=font_color, before_spacing=before_spacing,
+            after_spacing=after_spacing, line_spacing=line_spacing, line_spacing_rule=line_spacing_rule
+        )
+        
+        format_count = 0
+        for paragraph in doc.paragraphs:
+            # 每个段落只读取一次样式名称
+            style_name = paragraph.style.name
+            if target_style is not None:
+                matched = style_name == target_style
+            else:
+                matched = style_name == "Normal" or style_name.startswith("Body")
+            
+            if matched:
+                _apply_format_to_paragraph(paragraph, **fmt)
+                format_count += 1
+        
         # 保存文档
-        doc.save(file_path)
+        save_doc(doc, file_path, compression_level=compression_level)
         
         content_type_str = {
             "heading": f"{level}级标题",
             "title": "文档标题",
             "normal": "正文"
-        }.get(content_type.lower(), content_type)
+        }.get(content_type_lower, content_type)
         
         return f"成功为 {format_count} 个{content_type_str}应用一致格式"
         
     except Exception as e:
+        evict(file_path)
         return f"应用一致格式时出错: {str(e)}"
 
 def _apply_format_to_paragraph(
@@ -537,39 +767,38 @@ def _apply_format_to_paragraph(
         line_spacing_rule: 行间距规则
     """
     # 应用字体样式
-    if any([font_name, font_size, bold is not None, italic is not None, underline is not None, font_color]):
+    if font_name or font_size or bold is not None or italic is not None or underline is not None or font_color:
+        # 字号和颜色对所有run相同，只计算一次
+        size = Pt(font_size) if font_size else None
+        # 解析十六进制颜色，格式无效时忽略颜色设置
+        color = None
+        if font_color and is_hex_color(font_color):
+            color = RGBColor(*hex_to_rgb_tuple(font_color))
+        
+        # 每次访问run.font都会新建Font对象，每个run只取一次
         for run in paragraph.runs:
+            font = run.font
             if font_name:
-                run.font.name = font_name
-                # 设置中文字体
-                try:
-                    run._element.rPr.rFonts.set(qn('w:eastAsia'), font_name)
-                except:
-                    pass
+                # 同时设置西文和中文字体
+                _set_run_fonts(run._element, font_name)
                 
-            if font_size:
-                run.font.size = Pt(font_size)
+            if size is not None:
+                font.size = size
                 
             if bold is not None:
-                run.font.bold = bold
+                font.bold = bold
                 
             if italic is not None:
-                run.font.italic = italic
+                font.italic = italic
                 
             if underline is not None:
-                run.font.underline = underline
+                font.underline = underline
                 
-            if font_color:
-                try:
-                    # 解析十六进制颜色
-                    color = font_color.lstrip('#')
-                    rgb = tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
-                    run.font.color.rgb = RGBColor(*rgb)
-                except:
-                    pass
+            if color is not None:
+                font.color.rgb = color
     
     # 应用段落间距
-    if any([before_spacing is not None, after_spacing is not None, line_spacing is not None]):
+    if before_spacing is not None or after_spacing is not None or line_spacing is not None:
         if before_spacing is not None:
             paragraph.paragraph_format.space_before = Pt(before_spacing)
             
@@ -577,12 +806,8 @@ def _apply_format_to_paragraph(
             paragraph.paragraph_format.space_after = Pt(after_spacing)
             
         if line_spacing is not None:
-            if line_spacing_rule.lower() == "multiple":
-                paragraph.paragraph_format.line_spacing = line_spacing
-                paragraph.paragraph_format.line_spacing_rule = WD_LINE_SPACING.MULTIPLE
-            elif line_spacing_rule.lower() == "exact":
-                paragraph.paragraph_format.line_spacing = Pt(line_spacing)
-                paragraph.paragraph_format.line_spacing_rule = WD_LINE_SPACING.EXACTLY
-            elif line_spacing_rule.lower() == "atleast":
-                paragraph.paragraph_format.line_spacing = Pt(line_spacing)
-                paragraph.paragraph_format.line_spacing_rule = WD_LINE_SPACING.AT_LEAST
+            rule = _LINE_SPACING_RULES.get(line_spacing_rule.lower())
+            if rule is not None:
+                rule_value, in_points = rule
+                paragraph.paragraph_format.line_spacing = Pt(line_spacing) if in_points else line_spacing
+                paragraph.paragraph_format.line_spacing_rule = rule_value
@@ -3,28 +3,44 @@ Word Document Operations
 
 This module provides functions for opening, reading, and closing Word documents.
 """
+import importlib.util
 import os
-import sys
-
-# 标记库是否已安装
-docx_installed = True
-
-# 尝试导入python-docx库，如果没有安装则标记为未安装但不退出
-try:
-    import docx
-    from docx import Document
-    from docx.shared import Pt, RGBColor, Inches, Cm
-    from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
-    from docx.enum.section import WD_ORIENTATION, WD_SECTION
-    from docx.oxml.ns import qn
-    from docx.oxml import OxmlElement
-    import docx.opc.constants
-except ImportError:
+
+# 只检查python-docx是否可用，不在导入本模块时加载它（读取文档时直接解析XML）
+docx_installed = importlib.util.find_spec("docx") is not None
+if not docx_installed:
     print("警告: 未检测到python-docx库，Word文档功能将不可用")
     print("请使用以下命令安装: pip install python-docx")
-    docx_installed = False
 
+import zipfile
+from lxml import etree
+
+# Word COM实例在多次调用之间共享；running_word()只返回已启动的实例，不会启动Word
+from utils._word_app import running_word
+from utils._fast_docx import main_part_name
+from utils._paths import resolve_docx_path
+from utils._doc_cache import get_doc, save_doc, discard, flush, flush_all
+
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_BODY = _W_NS + 'body'
+_W_P = _W_NS + 'p'
+_W_R = _W_NS + 'r'
+_W_T = _W_NS + 't'
+_W_TAB = _W_NS + 'tab'
+_W_PTAB = _W_NS + 'ptab'
+_W_BR = _W_NS + 'br'
+_W_CR = _W_NS + 'cr'
+_W_NO_BREAK_HYPHEN = _W_NS + 'noBreakHyphen'
+_W_HYPERLINK = _W_NS + 'hyperlink'
+_W_PPR_PSTYLE = _W_NS + 'pPr/' + _W_NS + 'pStyle'
+_W_STYLE = _W_NS + 'style'
+_W_NAME = _W_NS + 'name'
+_W_VAL = _W_NS + 'val'
+_W_TYPE = _W_NS + 'type'
+_W_STYLE_ID = _W_NS + 'styleId'
 
+
+@resolve_docx_path('file_path')
 def open_and_read_word_document(file_path: str) -> str:
     """
     打开并读取Word文档的完整内容。
@@ -39,47 +55,104 @@ def open_and_read_word_document(file_path: str) -> str:
     if not docx_installed:
         return "错误: 无法读取Word文档，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
-        # 打开Word文档
-        doc = Document(file_path)
-        
-        # 提取文档基本信息
-        paragraphs = [p.text for p in doc.paragraphs]
-        headings = [p.text for p in doc.paragraphs if p.style.name.startswith('Heading')]
+        # 流式解析document.xml，不构建完整的文档对象模型；
+        # 一次遍历同时生成带编号的内容行和统计标题数
+        lines = []
+        heading_count = 0
+        for i, (p_text, is_heading) in enumerate(_iter_paragraph_texts(file_path)):
+            # 添加段落编号 (i) 在每段前
+            lines.append(f"[{i}] {p_text}\n")
+            if is_heading:
+                heading_count += 1
         
         # 构建文档信息头
         doc_info = (
             f"文件名: {os.path.basename(file_path)}\n"
-            f"段落数: {len(paragraphs)}\n"
-            f"标题数: {len(headings)}\n\n"
+            f"段落数: {len(lines)}\n"
+            f"标题数: {heading_count}\n\n"
         )
         
-        # 构建完整文档内容，保留段落结构，并在每段前添加段落编号
-        full_content = ""
-        for i, p_text in enumerate(paragraphs):
-            # 添加段落编号 (i) 在每段前
-            full_content += f"[{i}] {p_text}\n"
-        
-        # 返回文档信息和完整内容
-        return doc_info + full_content
+        # 信息头和各段落内容一次拼接，保留段落结构；不再先拼接正文再与信息头相加，
+        # 大文档只生成一份完整的结果字符串
+        lines.insert(0, doc_info)
+        return "".join(lines)
     except Exception as e:
         return f"读取Word文档时出错: {str(e)}"
 
 
+def _heading_style_ids(zf: zipfile.ZipFile) -> set:
+    """从styles.xml中找出名称以Heading开头的样式ID"""
+    try:
+        root = etree.fromstring(zf.read('word/styles.xml'))
+    except KeyError:
+        return set()
+    
+    ids = set()
+    for style in root.iter(_W_STYLE):
+        name = style.find(_W_NAME)
+        # 内置样式在XML中的名称是小写的，例如"heading 1"
+        if name is not None and name.get(_W_VAL, '').lower().startswith('heading'):
+            ids.add(style.get(_W_STYLE_ID))
+    return ids
+
+
+def _run_text(r) -> str:
+    """提取w:r的文本，与python-docx的Run.text保持一致"""
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == _W_T:
+            parts.append(child.text or '')
+        elif tag in (_W_TAB, _W_PTAB):
+            parts.append('\t')
+        elif tag == _W_BR:
+            if child.get(_W_TYPE) in (None, 'textWrapping'):
+                parts.append('\n')
+        elif tag == _W_CR:
+            parts.append('\n')
+        elif tag == _W_NO_BREAK_HYPHEN:
+            parts.append('-')
+    return ''.join(parts)
+
+
+def _iter_paragraph_texts(file_path: str):
+    """
+    流式读取正文的顶层段落（与doc.paragraphs相同的范围）。
+    
+    Yields:
+        (段落文本, 是否为标题样式)
+    """
+    # 缓存中尚未写盘的修改（save=False）先落盘，否则读到的是旧内容
+    flush(file_path)
+    with zipfile.ZipFile(file_path) as zf:
+        heading_ids = _heading_style_ids(zf)
+        with zf.open(main_part_name(zf)) as xml_stream:
+            for _, elem in etree.iterparse(xml_stream, events=('end',), tag=_W_P):
+                parent = elem.getparent()
+                # 表格、文本框中的段落会在所属的顶层元素处理完后一并清理
+                if parent is None or parent.tag != _W_BODY:
+                    continue
+                
+                parts = []
+                for child in elem:
+                    if child.tag == _W_R:
+                        parts.append(_run_text(child))
+                    elif child.tag == _W_HYPERLINK:
+                        parts.extend(_run_text(r) for r in child.iterchildren(_W_R))
+                
+                p_style = elem.find(_W_PPR_PSTYLE)
+                is_heading = p_style is not None and p_style.get(_W_VAL) in heading_ids
+                
+                yield ''.join(parts), is_heading
+                
+                # 释放已处理的元素，内存占用与文档长度无关
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+
+@resolve_docx_path('file_path')
 def close_document(file_path: str, save_changes: bool = True) -> str:
     """
     关闭Word文档，可选是否保存更改。
@@ -95,31 +168,13 @@ def close_document(file_path: str, save_changes: bool = True) -> str:
     if not docx_installed:
         return "错误: 无法关闭文档，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
-        # 尝试使用Microsoft Word COM对象关闭文档
-        try:
-            import win32com.client
-            import pythoncom
-            
-            pythoncom.CoInitialize()
-            word = win32com.client.Dispatch("Word.Application")
-            
-            # 检查文档是否已经打开
-            doc_found = False
+        # 文档仍在共享的Word实例中打开时在Word中关闭；Word尚未启动时不为此启动Word
+        word = running_word()
+        
+        # 检查文档是否已经打开
+        doc_found = False
+        if word is not None:
             for doc in word.Documents:
                 if os.path.abspath(doc.FullName) == os.path.abspath(file_path):
                     if save_changes:
@@ -127,26 +182,36 @@ def close_document(file_path: str, save_changes: bool = True) -> str:
                     doc.Close(SaveChanges=save_changes)
                     doc_found = True
                     break
-            
-            if not doc_found:
-                # 如果文档未打开，则python-docx中没有明确的关闭方法
-                # 这里我们模拟一个"关闭"操作，即打开文档后立即关闭
-                doc = Document(file_path)
-                if save_changes:
-                    doc.save(file_path)
-            
-            pythoncom.CoUninitialize()
-            
-            return f"成功关闭文档: {os.path.basename(file_path)}" + (" 并保存更改" if save_changes else "")
         
-        except ImportError:
-            # 如果没有win32com库，使用python-docx的方式
-            doc = Document(file_path)
-            if save_changes:
-                doc.save(file_path)
-            
-            # python-docx没有明确的关闭方法，垃圾收集器会处理
-            return f"成功关闭文档: {os.path.basename(file_path)}" + (" 并保存更改" if save_changes else "")
+        if doc_found:
+            # Word已经保存或放弃了修改，缓存中的文档不再有效
+            discard(file_path)
+        else:
+            # 文档未在Word中打开时关闭缓存的python-docx文档
+            _close_cached(file_path, save_changes)
+        
+        return f"成功关闭文档: {os.path.basename(file_path)}" + (" 并保存更改" if save_changes else "")
     
     except Exception as e:
         return f"关闭文档时出错: {str(e)}"
+
+
+def _close_cached(file_path: str, save_changes: bool) -> None:
+    """保存（如需要）并从缓存中移除python-docx文档"""
+    if save_changes:
+        save_doc(get_doc(file_path), file_path)
+    discard(file_path)
+
+
+def save_all_documents() -> str:
+    """
+    保存所有有未写盘修改（save=False）的文档。
+    
+    Returns:
+        操作结果信息
+    """
+    try:
+        saved_count = flush_all()
+        return f"成功保存 {saved_count} 个有未写盘修改的文档"
+    except Exception as e:
+        return f"保存文档时出错: {str(e)}"
@@ -5,7 +5,9 @@ This module provides functions for editing Word document content including
 paragraph editing, text replacement, and paragraph deletion.
 """
 import os
+import re
 import sys
+from functools import lru_cache
 from typing import Union, List
 
 
@@ -19,15 +21,30 @@ try:
     from docx.shared import Pt, RGBColor, Inches, Cm
     from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
     from docx.enum.section import WD_ORIENTATION, WD_SECTION
-    from docx.oxml.ns import qn
+    from docx.oxml.ns import qn, nsmap
     from docx.oxml import OxmlElement
     import docx.opc.constants
+    from lxml import etree
+    
+    _W_BODY = qn('w:body')
+    _W_P = qn('w:p')
+    _W_R = qn('w:r')
+    _W_T = qn('w:t')
+    _XML_SPACE = qn('xml:space')
+    # 段落直接包含的run以及超链接中run的w:t，与CT_P.text的范围一致；XPath只编译一次
+    _RUN_TEXT_NODES = etree.XPath('./w:r/w:t | ./w:hyperlink/w:r/w:t', namespaces={'w': nsmap['w']})
 except ImportError:
     print("警告: 未检测到python-docx库，Word文档功能将不可用")
     print("请使用以下命令安装: pip install python-docx")
     docx_installed = False
 
+# 已解析的文档在连续调用之间复用；save=False的修改保留在缓存中，由之后的保存统一写盘
+from utils._doc_cache import get_doc, peek_doc, save_doc, mark_dirty, evict
+from utils._fast_docx import open_doc_xml, save_doc_xml
+# 相对路径的解析和文件存在检查由装饰器统一完成
+from utils._paths import resolve_docx_path
 
+@resolve_docx_path('file_path')
 def edit_paragraph_in_document(
     file_path: str,
     paragraph_index: int,
@@ -43,7 +60,7 @@ def edit_paragraph_in_document(
         file_path: Word文档的完整路径或相对于输出目录的路径
         paragraph_index: 起始段落索引 (从0开始计数)
         new_text: 新的文本内容（用于单段落编辑）
-        save: 是否保存更改，默认为True
+        save: 是否保存更改，默认为True；为False时修改保留在内存中，由之后的保存或close_document写盘
         end_index: 结束段落索引（包含），如果为None则只编辑单个段落
         replacement_texts: 替换文本列表，用于批量编辑多个段落
     
@@ -54,23 +71,9 @@ def edit_paragraph_in_document(
     if not docx_installed:
         return "错误: 无法编辑Word文档，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
         # 打开Word文档
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
         # 确定编辑范围
         if end_index is None:
@@ -84,12 +87,16 @@ def edit_paragraph_in_document(
             end_idx = end_index
             edit_mode = "batch"
         
+        # 只获取一次段落列表
+        paras = doc.paragraphs
+        n_paras = len(paras)
+        
         # 检查索引范围是否有效
-        if start_idx < 0 or start_idx >= len(doc.paragraphs):
-            return f"错误: 无效的起始段落索引 {start_idx}，文档共有 {len(doc.paragraphs)} 个段落"
+        if start_idx < 0 or start_idx >= n_paras:
+            return f"错误: 无效的起始段落索引 {start_idx}，文档共有 {n_paras} 个段落"
         
-        if end_idx < 0 or end_idx >= len(doc.paragraphs):
-            return f"错误: 无效的结束段落索引 {end_idx}，文档共有 {len(doc.paragraphs)} 个段落"
+        if end_idx < 0 or end_idx >= n_paras:
+            return f"错误: 无效的结束段落索引 {end_idx}，文档共有 {n_paras} 个段落"
         
         if start_idx > end_idx:
             return f"错误: 起始索引 {start_idx} 不能大于结束索引 {end_idx}"
@@ -100,46 +107,15 @@ def edit_paragraph_in_document(
         
         # 执行编辑操作
         if edit_mode == "single":
-            # 单段落编辑
-            paragraph = doc.paragraphs[start_idx]
-            
-            # 保存原始样式和格式
-            original_style = paragraph.style
-            original_alignment = paragraph.alignment
-            
-            # 清除现有内容
-            for run in paragraph.runs:
-                run.clear()
-            
-            # 确保段落内容被清除
-            if paragraph.runs:
-                paragraph.text = ""
-            
-            # 添加新内容
-            run = paragraph.add_run(new_text)
-            
-            # 恢复原始样式和格式
-            paragraph.style = original_style
-            paragraph.alignment = original_alignment
+            # 单段落编辑（段落属性保持不变，样式和对齐方式无需恢复）
+            _replace_paragraph_text(paras[start_idx]._p, new_text)
             
             modified_count = 1
             
         else:
             # 批量编辑模式
             for i in range(start_idx, end_idx + 1):
-                paragraph = doc.paragraphs[i]
-                
-                # 保存原始样式和格式
-                original_style = paragraph.style
-                original_alignment = paragraph.alignment
-                
-                # 清除现有内容
-                for run in paragraph.runs:
-                    run.clear()
-                
-                # 确保段落内容被清除
-                if paragraph.runs:
-                    paragraph.text = ""
+                paragraph = paras[i]
                 
                 # 确定要使用的替换文本
                 if replacement_texts and len(replacement_texts) > (i - start_idx):
@@ -152,18 +128,16 @@ def edit_paragraph_in_document(
                     # 使用默认的new_text
                     replacement_text = new_text
                 
-                # 添加新内容
-                run = paragraph.add_run(replacement_text)
-                
-                # 恢复原始样式和格式
-                paragraph.style = original_style
-                paragraph.alignment = original_alignment
+                # 替换段落内容（段落属性保持不变）
+                _replace_paragraph_text(paragraph._p, replacement_text)
                 
                 modified_count += 1
         
         # 保存文档
         if save:
-            doc.save(file_path)
+            save_doc(doc, file_path)
+        else:
+            mark_dirty(doc, file_path)
         
         # 返回结果信息
         if edit_mode == "single":
@@ -172,10 +146,79 @@ def edit_paragraph_in_document(
             return f"成功编辑文档 {os.path.basename(file_path)} 第 {start_idx+1} 到第 {end_idx+1} 段落，共修改 {modified_count} 个段落"
             
     except Exception as e:
+        evict(file_path)
         return f"编辑Word文档内容时出错: {str(e)}"
 
 
+def _replace_paragraph_text(p, text: str) -> None:
+    """
+    把段落内容替换为一个包含text的run。
+    
+    保留段落属性（w:pPr）；段落原有run时复用第一个run，保留其文本格式，其余内容全部删除。
+    """
+    pPr = p.pPr
+    first_r = p.find(_W_R)
+    # 切片删除在lxml中一次完成，不再逐个子元素调用remove
+    del p[:]
+    if pPr is not None:
+        p.append(pPr)
+    if first_r is None:
+        first_r = p.add_r()
+    else:
+        p.append(first_r)
+    # CT_R.text只替换run的内容、保留w:rPr，并把制表符和换行转换为w:tab和w:br，与Paragraph.add_run一致
+    first_r.text = text
+
+
+def _replace_in_text_nodes(p, regex, replacement, expected_count: int) -> bool:
+    """
+    在段落各个w:t元素的内部分别替换，保留每个run的格式。
+    
+    只有当各w:t内找到的匹配与在整段文本中找到的完全相同（数量和位置一致，
+    即没有跨run的匹配）时才修改文档。
+    
+    Returns:
+        是否已完成替换；为False时段落未被修改，需要改写整段
+    """
+    text_nodes = _RUN_TEXT_NODES(p)
+    texts = [t.text or '' for t in text_nodes]
+    
+    spans = []
+    offset = 0
+    for text in texts:
+        spans.extend((offset + m.start(), offset + m.end()) for m in regex.finditer(text))
+        offset += len(text)
+    if len(spans) != expected_count:
+        return False
+    if [m.span() for m in regex.finditer(''.join(texts))] != spans:
+        return False
+    
+    for t, text in zip(text_nodes, texts):
+        new_text, count = regex.subn(replacement, text)
+        if count:
+            t.text = new_text
+            # 首尾的空白需要xml:space="preserve"才会被保留
+            if new_text != new_text.strip():
+                t.set(_XML_SPACE, 'preserve')
+    return True
+
+
+@lru_cache(maxsize=256)
+def _find_patterns(find_text: str, match_case: bool, match_whole_word: bool):
+    """
+    编译查找模式，同样的查找条件在多次调用之间复用。
+    
+    Returns:
+        (不带整词限制的模式, 实际用于替换的模式)
+    """
+    flags = 0 if match_case else re.IGNORECASE
+    plain_regex = re.compile(re.escape(find_text), flags)
+    if match_whole_word:
+        return plain_regex, re.compile(rf"(?<!\w){plain_regex.pattern}(?!\w)", flags)
+    return plain_regex, plain_regex
+
 
+@resolve_docx_path('file_path')
 def find_and_replace_text(
     file_path: str,
     find_text: str,
@@ -193,7 +236,7 @@ def find_and_replace_text(
         replace_text: 替换为的文本
         match_case: 是否区分大小写，默认为False
         match_whole_word: 是否匹配整个单词，默认为False
-        save: 是否保存更改，默认为True
+        save: 是否保存更改，默认为True；为False时修改保留在内存中，由之后的保存或close_document写盘
     
     Returns:
         操作结果信息
@@ -202,128 +245,79 @@ def find_and_replace_text(
     if not docx_installed:
         return "错误: 无法在Word文档中查找替换文本，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
+    if not find_text:
+        return "错误: 查找文本不能为空"
     
     try:
-        # 使用python-docx的方式（更可靠）
-        doc = Document(file_path)
-        replace_count = 0
+        # 查找模式只编译一次（并在调用之间缓存），使用正则引擎完成查找和替换，无需逐段转换小写和切片
+        plain_regex, regex = _find_patterns(find_text, bool(match_case), bool(match_whole_word))
         
-        # 遍历所有段落和所有run
-        for paragraph in doc.paragraphs:
-            # 获取段落的完整文本
-            full_text = paragraph.text
-            if not match_case:
-                search_text = find_text.lower()
-                full_text_lower = full_text.lower()
-            else:
-                search_text = find_text
-                full_text_lower = full_text
-            
-            # 如果段落中包含要查找的文本
-            if search_text in full_text_lower:
-                # 清除所有runs
-                for run in paragraph.runs:
-                    run.clear()
-                
-                # 如果需要区分大小写
-                if match_case:
-                    # 直接替换
-                    new_text = full_text.replace(find_text, replace_text)
-                    replace_count += full_text.count(find_text)
-                else:
-                    # 不区分大小写的替换
-                    current_pos = 0
-                    new_text = ""
-                    while True:
-                        # 在剩余文本中查找目标字符串
-                        pos = full_text_lower[current_pos:].find(search_text)
-                        if pos == -1:
-                            # 没有找到更多匹配，添加剩余文本
-                            new_text += full_text[current_pos:]
-                            break
-                        
-                        # 添加匹配位置之前的文本
-                        new_text += full_text[current_pos:current_pos + pos]
-                        # 添加替换文本
-                        new_text += replace_text
-                        # 更新位置
-                        current_pos += pos + len(find_text)
-                        replace_count += 1
-                
-                # 添加新的run，包含替换后的文本
-                paragraph.add_run(new_text)
+        # 文档不在缓存中且立即保存时，只解析和回写document.xml，不构建完整的文档对象模型
+        if save and peek_doc(file_path) is None:
+            root = open_doc_xml(file_path)
+            replace_count = _replace_in_body(root.find(_W_BODY), plain_regex, regex, find_text, replace_text)
+            if replace_count:
+                save_doc_xml(file_path, root)
+            return f"成功在文档 {os.path.basename(file_path)} 中替换了 {replace_count} 处文本"
         
-        # 遍历所有表格单元格
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        # 获取段落的完整文本
-                        full_text = paragraph.text
-                        if not match_case:
-                            search_text = find_text.lower()
-                            full_text_lower = full_text.lower()
-                        else:
-                            search_text = find_text
-                            full_text_lower = full_text
-                        
-                        # 如果段落中包含要查找的文本
-                        if search_text in full_text_lower:
-                            # 清除所有runs
-                            for run in paragraph.runs:
-                                run.clear()
-                            
-                            # 如果需要区分大小写
-                            if match_case:
-                                # 直接替换
-                                new_text = full_text.replace(find_text, replace_text)
-                                replace_count += full_text.count(find_text)
-                            else:
-                                # 不区分大小写的替换
-                                current_pos = 0
-                                new_text = ""
-                                while True:
-                                    # 在剩余文本中查找目标字符串
-                                    pos = full_text_lower[current_pos:].find(search_text)
-                                    if pos == -1:
-                                        # 没有找到更多匹配，添加剩余文本
-                                        new_text += full_text[current_pos:]
-                                        break
-                                    
-                                    # 添加匹配位置之前的文本
-                                    new_text += full_text[current_pos:current_pos + pos]
-                                    # 添加替换文本
-                                    new_text += replace_text
-                                    # 更新位置
-                                    current_pos += pos + len(find_text)
-                                    replace_count += 1
-                            
-                            # 添加新的run，包含替换后的文本
-                            paragraph.add_run(new_text)
+        # 使用python-docx的方式（更可靠）
+        doc = get_doc(file_path)
+        replace_count = _replace_in_body(doc.element.body, plain_regex, regex, find_text, replace_text)
         
         # 保存文档
         if save:
-            doc.save(file_path)
+            save_doc(doc, file_path)
+        else:
+            mark_dirty(doc, file_path)
         
         return f"成功在文档 {os.path.basename(file_path)} 中替换了 {replace_count} 处文本"
     
     except Exception as e:
+        evict(file_path)
         return f"在Word文档中查找替换文本时出错: {str(e)}"
 
 
+def _replace_in_body(body, plain_regex, regex, find_text: str, replace_text: str) -> int:
+    """
+    在w:body中（包括表格单元格）的所有段落里替换匹配的文本。
+    
+    Returns:
+        替换的次数
+    """
+    replace_count = 0
+    
+    # 替换文本按原样插入，不解析其中的反斜杠和分组引用
+    replacement = lambda _match: replace_text
+    
+    # 目标文本含制表符或换行时，w:t文本的拼接不能代表段落文本，不做预筛选
+    quick_check = '\t' not in find_text and '\n' not in find_text
+    
+    # 先在整个正文的文本中查找一次，没有匹配时跳过逐段处理。
+    # 不同段落的文本会首尾相连，所以这里只用不带整词限制的模式（结果只会多不会少）
+    if quick_check and not plain_regex.search("".join(body.itertext(_W_T, with_tail=False))):
+        return 0
+    
+    # 直接遍历正文（包括表格单元格）中的所有w:p元素，
+    # 段落文本直接从CT_P读取，不再为每个候选段落构造Paragraph对象
+    for p in body.iter(_W_P):
+        # 拼接w:t时会丢掉w:tab/w:br，紧跟在制表符或换行后的词会被误判为非整词，
+        # 所以预筛选只用不带整词限制的模式，是否整词匹配由下面对p.text的替换决定
+        if quick_check and not plain_regex.search("".join(p.itertext(_W_T, with_tail=False))):
+            continue
+        
+        # 在段落的完整文本中替换
+        new_text, count = regex.subn(replacement, p.text)
+        if count:
+            # 所有匹配都在单个w:t内部时原地替换，保留各run的格式；
+            # 有跨run的匹配时用一个包含替换后文本的run替换段落内容
+            if not _replace_in_text_nodes(p, regex, replacement, count):
+                _replace_paragraph_text(p, new_text)
+            replace_count += count
+    
+    return replace_count
+
+
+@resolve_docx_path('file_path')
 def delete_paragraph(
     file_path: str,
     paragraph_index: Union[int, List[int]],
@@ -335,7 +329,7 @@ def delete_paragraph(
     Args:
         file_path: Word文档的完整路径或相对于输出目录的路径
         paragraph_index: 要删除的段落索引 (从0开始计数) 或索引列表
-        save: 是否保存更改，默认为True
+        save: 是否保存更改，默认为True；为False时修改保留在内存中，由之后的保存或close_document写盘
     
     Returns:
         操作结果信息
@@ -344,23 +338,9 @@ def delete_paragraph(
     if not docx_installed:
         return "错误: 无法编辑Word文档，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
         # 打开Word文档
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
         # 处理输入参数，统一转换为列表格式
         if isinstance(paragraph_index, int):
@@ -370,40 +350,26 @@ def delete_paragraph(
             paragraph_indices = paragraph_index
             batch_mode = True
         
-        # 为了避免删除段落后索引变化导致的问题，先按索引降序排序
-        sorted_indices = sorted(paragraph_indices, reverse=True)
+        # 只获取一次正文中的w:p元素列表，之后直接按元素删除；不为每个段落构造Paragraph对象
+        body = doc.element.body
+        p_elements = body.findall(_W_P)
+        n_paras = len(p_elements)
         
-        # 记录成功和失败的删除数量
-        success_count = 0
-        invalid_indices = []
+        # 去重后按索引降序删除，无效索引单独记录
+        valid_indices = sorted({idx for idx in paragraph_indices if 0 <= idx < n_paras}, reverse=True)
+        invalid_indices = sorted((idx for idx in paragraph_indices if not 0 <= idx < n_paras), reverse=True)
         
         # 批量删除段落
-        for idx in sorted_indices:
-            # 检查段落索引是否有效
-            if idx < 0 or idx >= len(doc.paragraphs):
-                invalid_indices.append(idx)
-                continue
-            
-            try:
-                # 获取要删除的段落
-                paragraph = doc.paragraphs[idx]
-                
-                # 删除段落
-                p = paragraph._element
-                p.getparent().remove(p)
-                
-                # 删除对象的引用
-                paragraph._p = None
-                paragraph._element = None
-                
-                success_count += 1
-                
-            except Exception as e:
-                invalid_indices.append(idx)
+        success_count = 0
+        for idx in valid_indices:
+            body.remove(p_elements[idx])
+            success_count += 1
         
         # 保存文档
         if save:
-            doc.save(file_path)
+            save_doc(doc, file_path)
+        else:
+            mark_dirty(doc, file_path)
         
         # 生成结果消息
         if batch_mode:
@@ -414,10 +380,11 @@ def delete_paragraph(
             if success_count > 0:
                 result_msg = f"成功从文档 {os.path.basename(file_path)} 中删除第 {paragraph_indices[0]+1} 段落"
             else:
-                result_msg = f"删除失败: 无效的段落索引 {paragraph_indices[0]}，文档共有 {len(doc.paragraphs)} 个段落"
+                result_msg = f"删除失败: 无效的段落索引 {paragraph_indices[0]}，文档共有 {n_paras} 个段落"
         
         return result_msg
         
     except Exception as e:
+        evict(file_path)
         return f"删除Word文档段落时出错: {str(e)}"
 
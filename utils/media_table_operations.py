@@ -9,11 +9,50 @@ from docx import Document
 from docx.shared import Cm
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
+from docx.oxml.shape import CT_Inline
+from docx.oxml.table import CT_Tbl
+from docx.table import Table
+from docx.text.paragraph import Paragraph
 
+# 已解析的文档在连续的批量操作之间复用，文件被修改后自动重新解析
+from utils._doc_cache import get_doc, save_doc, mark_dirty, evict
+from utils.edit_operations import _replace_paragraph_text
+# Word COM实例在多次调用之间共享，pywin32不可用时get_word()抛出ImportError
+from utils._word_app import get_word, open_document
+# 相对路径的解析和文件存在检查由装饰器统一完成
+from utils._paths import resolve_docx, resolve_docx_path
+
+_W_P = qn('w:p')
+_W_TCPR = qn('w:tcPr')
+_W_FLDCHARTYPE = qn('w:fldCharType')
+
+def _set_cell_text(tc, text: str) -> None:
+    """
+    将单元格内容替换为text：保留第一个段落及其段落属性，删除其余内容。
+    
+    与python-docx的cell.text相比，不需要删除再重建段落和run，单元格的对齐等段落格式
+    以及第一个run的文本格式也得以保留。
+    """
+    first_p = None
+    for child in list(tc):
+        if child.tag == _W_TCPR:
+            continue
+        if first_p is None and child.tag == _W_P:
+            first_p = child
+            continue
+        tc.remove(child)
+    
+    if first_p is None:
+        first_p = tc.add_p()
+    # 复用第一个run，只替换其中的文本
+    _replace_paragraph_text(first_p, text)
+
+@resolve_docx_path('file_path')
 def batch_insert_images(
     file_path: str,
     images_data: List[Dict[str, Any]],
-    output_path: Optional[str] = None
+    output_path: Optional[str] = None,
+    save: bool = True
 ) -> str:
     """
     批量插入图片到Word文档
@@ -26,27 +65,24 @@ def batch_insert_images(
             - height: 图片高度厘米（可选）
             - after_paragraph: 插入位置段落索引（可选，默认-1表示末尾）
         output_path: 输出路径，如果为None则从环境变量获取
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，由之后的保存、close_document或save_all_documents统一写盘（进程退出时也会自动写盘）
     
     Returns:
         操作结果信息
     """
-    # 处理文件路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
-    
-    if not os.path.isabs(file_path):
-        file_path = os.path.join(output_path, file_path)
-    
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         success_count = 0
         failed_operations = []
         
+        # 只获取一次段落列表，插入新段落时同步更新，不再每次重新构建doc.paragraphs
+        paras = doc.paragraphs
+        
+        # 同一图片文件只读取和解析一次；内容相同的图片由python-docx按SHA1共用同一个图片部件
+        loaded_images = {}
+        # 图形ID只从文档中查找一次，之后递增
+        next_shape_id = doc.part.next_id
+        
         # 批量处理图片插入
         for i, img_data in enumerate(images_data):
             try:
@@ -56,8 +92,7 @@ def batch_insert_images(
                 after_paragraph = img_data.get('after_paragraph', -1)
                 
                 # 处理图片路径
-                if not os.path.isabs(image_path):
-                    image_path = os.path.join(output_path, image_path)
+                image_path = resolve_docx(image_path, output_path)
                 
                 # 检查图片文件是否存在
                 if not os.path.exists(image_path):
@@ -67,25 +102,27 @@ def batch_insert_images(
                 # 确定插入位置
                 if after_paragraph == -1:
                     paragraph = doc.add_paragraph()
-                elif 0 <= after_paragraph < len(doc.paragraphs):
-                    target_paragraph = doc.paragraphs[after_paragraph]
-                    paragraph = doc.add_paragraph()
-                    # 移动段落到指定位置
-                    target_paragraph._p.addnext(paragraph._p)
+                    paras.append(paragraph)
+                elif 0 <= after_paragraph < len(paras):
+                    target_paragraph = paras[after_paragraph]
+                    # 直接在指定位置创建段落，而不是先追加到末尾再移动
+                    new_p = OxmlElement('w:p')
+                    target_paragraph._p.addnext(new_p)
+                    paragraph = Paragraph(new_p, target_paragraph._parent)
+                    paras.insert(after_paragraph + 1, paragraph)
                 else:
                     failed_operations.append((i, f"无效的段落索引: {after_paragraph}"))
                     continue
                 
-                # 插入图片
+                # 插入图片（与run.add_picture相同，但复用已加载的图片）
+                if image_path not in loaded_images:
+                    loaded_images[image_path] = doc.part.get_or_add_image(image_path)
+                rId, image = loaded_images[image_path]
+                cx, cy = image.scaled_dimensions(Cm(width) if width else None, Cm(height) if height else None)
+                
                 run = paragraph.add_run()
-                if width and height:
-                    run.add_picture(image_path, width=Cm(width), height=Cm(height))
-                elif width:
-                    run.add_picture(image_path, width=Cm(width))
-                elif height:
-                    run.add_picture(image_path, height=Cm(height))
-                else:
-                    run.add_picture(image_path)
+                run._r.add_drawing(CT_Inline.new_pic_inline(next_shape_id, rId, image.filename, cx, cy))
+                next_shape_id += 1
                 
                 success_count += 1
                 
@@ -93,7 +130,10 @@ def batch_insert_images(
                 failed_operations.append((i, str(e)))
         
         # 保存文档
-        doc.save(file_path)
+        if save:
+            save_doc(doc, file_path)
+        else:
+            mark_dirty(doc, file_path)
         
         result_msg = f"成功批量插入 {success_count} 张图片到文档 {os.path.basename(file_path)}"
         if failed_operations:
@@ -102,12 +142,15 @@ def batch_insert_images(
         return result_msg
         
     except Exception as e:
+        evict(file_path)
         return f"批量插入图片时出错: {str(e)}"
 
+@resolve_docx_path('file_path')
 def batch_insert_tables(
     file_path: str,
     tables_data: List[Dict[str, Any]],
-    output_path: Optional[str] = None
+    output_path: Optional[str] = None,
+    save: bool = True
 ) -> str:
     """
     批量插入表格到Word文档
@@ -121,27 +164,20 @@ def batch_insert_tables(
             - after_paragraph: 插入位置段落索引（可选，默认-1表示末尾）
             - style: 表格样式（可选，默认"Table Grid"）
         output_path: 输出路径，如果为None则从环境变量获取
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，由之后的保存、close_document或save_all_documents统一写盘（进程退出时也会自动写盘）
     
     Returns:
         操作结果信息
     """
-    # 处理文件路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
-    
-    if not os.path.isabs(file_path):
-        file_path = os.path.join(output_path, file_path)
-    
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         success_count = 0
         failed_operations = []
         
+        # 插入表格不会改变正文的段落列表，只需获取一次
+        paras = doc.paragraphs
+        n_paras = len(paras)
+        
         # 批量处理表格插入
         for i, table_data in enumerate(tables_data):
             try:
@@ -157,7 +193,7 @@ def batch_insert_tables(
                     continue
                 
                 # 验证段落索引
-                if after_paragraph != -1 and (after_paragraph < 0 or after_paragraph >= len(doc.paragraphs)):
+                if after_paragraph != -1 and (after_paragraph < 0 or after_paragraph >= n_paras):
                     failed_operations.append((i, f"无效的段落索引: {after_paragraph}"))
                     continue
                 
@@ -165,21 +201,22 @@ def batch_insert_tables(
                 if after_paragraph == -1:
                     table = doc.add_table(rows=rows, cols=cols)
                 else:
-                    target_paragraph = doc.paragraphs[after_paragraph]
-                    table = doc.add_table(rows=rows, cols=cols)
-                    # 移动表格到指定位置
-                    target_paragraph._p.addnext(table._tbl)
+                    target_paragraph = paras[after_paragraph]
+                    # 直接在指定位置创建表格（宽度与doc.add_table相同），而不是先追加到末尾再移动
+                    tbl = CT_Tbl.new_tbl(rows, cols, doc._block_width)
+                    target_paragraph._p.addnext(tbl)
+                    table = Table(tbl, doc._body)
                 
                 # 设置表格样式
                 table.style = style
                 
-                # 填充表格数据
+                # 填充表格数据（新表格没有合并单元格，按行列顺序直接取w:tc）
                 if data:
-                    for row_idx, row_data in enumerate(data):
-                        if row_idx < rows:
-                            for col_idx, cell_data in enumerate(row_data):
-                                if col_idx < cols:
-                                    table.cell(row_idx, col_idx).text = str(cell_data)
+                    tbl_rows = table._tbl.tr_lst
+                    for row_idx, row_data in enumerate(data[:rows]):
+                        tcs = tbl_rows[row_idx].tc_lst
+                        for col_idx, cell_data in enumerate(row_data[:cols]):
+                            _set_cell_text(tcs[col_idx], str(cell_data))
                 
                 success_count += 1
                 
@@ -187,7 +224,10 @@ def batch_insert_tables(
                 failed_operations.append((i, str(e)))
         
         # 保存文档
-        doc.save(file_path)
+        if save:
+            save_doc(doc, file_path)
+        else:
+            mark_dirty(doc, file_path)
         
         result_msg = f"成功批量插入 {success_count} 个表格到文档 {os.path.basename(file_path)}"
         if failed_operations:
@@ -196,12 +236,15 @@ def batch_insert_tables(
         return result_msg
         
     except Exception as e:
+        evict(file_path)
         return f"批量插入表格时出错: {str(e)}"
 
+@resolve_docx_path('file_path')
 def batch_edit_table_cells(
     file_path: str,
     edit_operations: List[Dict[str, Any]],
-    output_path: Optional[str] = None
+    output_path: Optional[str] = None,
+    save: bool = True
 ) -> str:
     """
     批量编辑表格单元格内容
@@ -215,39 +258,34 @@ def batch_edit_table_cells(
                 - col: 列索引（从0开始）
                 - text: 单元格内容
         output_path: 输出路径，如果为None则从环境变量获取
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，由之后的保存、close_document或save_all_documents统一写盘（进程退出时也会自动写盘）
     
     Returns:
         操作结果信息
     """
-    # 处理文件路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
-    
-    if not os.path.isabs(file_path):
-        file_path = os.path.join(output_path, file_path)
-    
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         total_edited = 0
         failed_operations = []
         
         # 批量处理表格编辑操作
+        tables = doc.tables
         for i, operation in enumerate(edit_operations):
             try:
                 table_index = operation.get('table_index', -1)
                 cell_edits = operation.get('cell_edits', [])
                 
                 # 验证表格索引
-                if table_index < 0 or table_index >= len(doc.tables):
+                if table_index < 0 or table_index >= len(tables):
                     failed_operations.append((i, f"无效的表格索引: {table_index}"))
                     continue
                 
-                table = doc.tables[table_index]
+                table = tables[table_index]
+                
+                # 单元格网格和行列数只计算一次，table.cell()每次调用都会重新计算整个网格
+                cells = table._cells
+                n_rows = len(table.rows)
+                n_cols = len(table.columns)
                 
                 # 处理单元格编辑
                 for cell_edit in cell_edits:
@@ -256,23 +294,26 @@ def batch_edit_table_cells(
                     text = cell_edit.get('text', '')
                     
                     # 验证行列索引
-                    if row < 0 or row >= len(table.rows):
+                    if row < 0 or row >= n_rows:
                         failed_operations.append((i, f"无效的行索引: {row}"))
                         continue
                     
-                    if col < 0 or col >= len(table.columns):
+                    if col < 0 or col >= n_cols:
                         failed_operations.append((i, f"无效的列索引: {col}"))
                         continue
                     
                     # 编辑单元格
-                    table.cell(row, col).text = text
+                    _set_cell_text(cells[row * n_cols + col]._tc, text)
                     total_edited += 1
                 
             except Exception as e:
                 failed_operations.append((i, str(e)))
         
         # 保存文档
-        doc.save(file_path)
+        if save:
+            save_doc(doc, file_path)
+        else:
+            mark_dirty(doc, file_path)
         
         result_msg = f"成功批量编辑 {total_edited} 个表格单元格"
         if failed_operations:
@@ -281,7 +322,9 @@ def batch_edit_table_cells(
         return result_msg
         
     except Exception as e:
+        evict(file_path)
         return f"批量编辑表格单元格时出错: {str(e)}"
+@resolve_docx_path('file_path')
 def insert_table_of_contents(
     file_path: str,
     title: str = "目录",
@@ -304,18 +347,6 @@ def insert_table_of_contents(
     """
     # 检查是否安装了必要的库
     
-    # 处理文件路径
-    if output_path is None:
-        output_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not output_path:
-            output_path = os.path.join(os.path.expanduser('~'), '桌面')
-    
-    if not os.path.isabs(file_path):
-        file_path = os.path.join(output_path, file_path)
-    
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     # 校验参数
     if levels < 1 or levels > 9:
         return "错误: 目录级别数必须在1至9之间"
@@ -323,102 +354,86 @@ def insert_table_of_contents(
     try:
         # 尝试使用Word COM对象添加目录
         try:
-            import win32com.client
-            import pythoncom
+            word = get_word()
             
-            pythoncom.CoInitialize()
-            word = win32com.client.Dispatch("Word.Application")
-            word.Visible = False
-            
-            doc = word.Documents.Open(file_path)
-            
-            # 将光标移动到指定段落后
-            if after_paragraph >= 0 and after_paragraph < doc.Paragraphs.Count:
-                range_to_insert = doc.Paragraphs(after_paragraph + 1).Range
-                range_to_insert.Collapse(0)
-                
-                # 插入换行符创建新段落
-                range_to_insert.InsertParagraphAfter()
-                range_to_insert.Collapse(0)
-                
-                # 插入标题
-                if title:
-                    range_to_insert.Text = title
-                    range_to_insert.InsertParagraphAfter()
+            doc = open_document(word, file_path)
+            try:
+                # 将光标移动到指定段落后
+                if after_paragraph >= 0 and after_paragraph < doc.Paragraphs.Count:
+                    range_to_insert = doc.Paragraphs(after_paragraph + 1).Range
                     range_to_insert.Collapse(0)
-                
-                # 插入目录
-                toc_range = range_to_insert
-                toc_range.Fields.Add(Range=toc_range, Type=-1, Text=f"TOC \\o \"1-{levels}\" \\h", PreserveFormatting=True)
-            else:
-                # 在文档开头插入目录
-                range_to_insert = doc.Paragraphs(1).Range
-                range_to_insert.Collapse(1)
-                
-                # 插入标题
-                if title:
-                    range_to_insert.Text = title
+                    
+                    # 插入换行符创建新段落
                     range_to_insert.InsertParagraphAfter()
                     range_to_insert.Collapse(0)
+                    
+                    # 插入标题
+                    if title:
+                        range_to_insert.Text = title
+                        range_to_insert.InsertParagraphAfter()
+                        range_to_insert.Collapse(0)
+                    
+                    # 插入目录
+                    toc_range = range_to_insert
+                    toc_range.Fields.Add(Range=toc_range, Type=-1, Text=f"TOC \\o \"1-{levels}\" \\h", PreserveFormatting=True)
+                else:
+                    # 在文档开头插入目录
+                    range_to_insert = doc.Paragraphs(1).Range
+                    range_to_insert.Collapse(1)
+                    
+                    # 插入标题
+                    if title:
+                        range_to_insert.Text = title
+                        range_to_insert.InsertParagraphAfter()
+                        range_to_insert.Collapse(0)
+                    
+                    # 插入目录
+                    toc_range = range_to_insert
+                    toc_range.Fields.Add(Range=toc_range, Type=-1, Text=f"TOC \\o \"1-{levels}\" \\h", PreserveFormatting=True)
                 
-                # 插入目录
-                toc_range = range_to_insert
-                toc_range.Fields.Add(Range=toc_range, Type=-1, Text=f"TOC \\o \"1-{levels}\" \\h", PreserveFormatting=True)
-            
-            # 更新目录
-            if doc.TablesOfContents.Count > 0:
-                doc.TablesOfContents(1).Update()
-            
-            # 保存并关闭
-            doc.Save()
-            doc.Close()
-            word.Quit()
-            
-            pythoncom.CoUninitialize()
+                # 更新目录
+                if doc.TablesOfContents.Count > 0:
+                    doc.TablesOfContents(1).Update()
+                
+                # 保存
+                doc.Save()
+            finally:
+                doc.Close(SaveChanges=0)  # 0 = wdDoNotSaveChanges
             
             return f"成功在文档 {os.path.basename(file_path)} 中插入目录"
         
         except ImportError:
             # 使用python-docx的方式添加目录（功能受限）
-            doc = Document(file_path)
+            doc = get_doc(file_path)
+            
+            # 只获取一次段落列表
+            paras = doc.paragraphs
+            n_paras = len(paras)
             
             # 检查指定段落是否有效
-            if after_paragraph >= len(doc.paragraphs):
-                return f"错误: 无效的段落索引 {after_paragraph}，文档共有 {len(doc.paragraphs)} 个段落"
+            if after_paragraph >= n_paras:
+                return f"错误: 无效的段落索引 {after_paragraph}，文档共有 {n_paras} 个段落"
             
-            # 在指定位置插入目录标题
-            if after_paragraph == 0:
-                # 在文档开头插入
-                if title:
-                    heading_para = doc.add_paragraph(title, style="Heading 1")
-                    if len(doc.paragraphs) > 1:
-                        first_para = doc.paragraphs[1]._p
-                        heading_para._p.addnext(first_para)
-            else:
-                # 在指定段落后插入
-                paragraph = doc.paragraphs[after_paragraph]
-                if title:
-                    new_para = doc.add_paragraph()
-                    paragraph._p.addnext(new_para._p)
-                    new_para.text = title
-                    new_para.style = "Heading 1"
+            # 在指定段落后依次插入目录标题和目录字段
+            anchor = paras[after_paragraph]._p
+            if title:
+                heading_p = OxmlElement('w:p')
+                anchor.addnext(heading_p)
+                heading_para = Paragraph(heading_p, doc._body)
+                heading_para.text = title
+                heading_para.style = "Heading 1"
+                anchor = heading_p
             
             # 创建目录字段
-            toc_para = doc.add_paragraph()
-            if title:
-                if after_paragraph == 0 and len(doc.paragraphs) > 1:
-                    doc.paragraphs[1]._p.addnext(toc_para._p)
-                elif after_paragraph > 0:
-                    doc.paragraphs[after_paragraph + 1]._p.addnext(toc_para._p)
-            else:
-                if after_paragraph < len(doc.paragraphs):
-                    doc.paragraphs[after_paragraph]._p.addnext(toc_para._p)
+            toc_p = OxmlElement('w:p')
+            anchor.addnext(toc_p)
+            toc_para = Paragraph(toc_p, doc._body)
             
             toc_run = toc_para.add_run()
             
             # 添加目录字段XML
             fldChar = OxmlElement('w:fldChar')
-            fldChar.set(qn('w:fldCharType'), 'begin')
+            fldChar.set(_W_FLDCHARTYPE, 'begin')
             toc_run._r.append(fldChar)
             
             instrText = OxmlElement('w:instrText')
@@ -426,13 +441,14 @@ def insert_table_of_contents(
             toc_run._r.append(instrText)
             
             fldChar = OxmlElement('w:fldChar')
-            fldChar.set(qn('w:fldCharType'), 'end')
+            fldChar.set(_W_FLDCHARTYPE, 'end')
             toc_run._r.append(fldChar)
             
             # 保存文档
-            doc.save(file_path)
+            save_doc(doc, file_path)
             
             return f"成功在文档 {os.path.basename(file_path)} 中插入目录（需要在Word中手动更新）"
     
     except Exception as e:
+        evict(file_path)
         return f"插入目录时出错: {str(e)}"
@@ -0,0 +1,61 @@
+"""
+并行高级格式模块 - 使用多进程同时处理多个文档的COM操作
+
+每个工作进程通过DispatchEx启动自己独立的Word实例，因此只有在处理
+互不相同的文件时才有意义；同一个文件不能被多个Word实例同时打开。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any
+
+from utils._word_app import ensure_win32com, quit_word
+from utils.advanced_formatting import add_text_box
+
+
+def _text_box_worker(kwargs: Dict[str, Any]) -> str:
+    """工作进程入口：添加文本框后关闭本进程的Word实例"""
+    try:
+        return add_text_box(**kwargs)
+    finally:
+        # 进程池的子进程不会执行atexit，需要手动退出Word
+        quit_word()
+
+
+def batch_add_text_boxes(files_and_args: List[Dict[str, Any]]) -> str:
+    """
+    并行地为多个Word文档添加文本框。
+    
+    Args:
+        files_and_args: 操作列表，每个元素为add_text_box的参数字典，
+            必须包含file_path和text，各元素的file_path应互不相同
+    
+    Returns:
+        操作结果信息
+    """
+    if not ensure_win32com():
+        return "错误: 文本框功能需要pywin32支持，请先安装: pip install pywin32"
+    
+    if not files_and_args:
+        return "没有需要处理的文档"
+    
+    file_paths = [args.get('file_path') for args in files_and_args]
+    if len(set(file_paths)) != len(file_paths):
+        return "错误: 并行处理时每个操作的file_path必须互不相同"
+    
+    max_workers = min(os.cpu_count() or 1, len(files_and_args))
+    
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_text_box_worker, files_and_args))
+    except Exception as e:
+        return f"并行添加文本框时出错: {str(e)}"
+    
+    failed = [(path, msg) for path, msg in zip(file_paths, results) if not msg.startswith("成功")]
+    
+    result_msg = f"成功为 {len(results) - len(failed)} 个文档添加文本框"
+    if failed:
+        result_msg += f"，但有 {len(failed)} 个文档失败:\n"
+        result_msg += "\n".join(f"{path}: {msg}" for path, msg in failed)
+    
+    return result_msg
@@ -4,7 +4,14 @@ Word Document Save Methods
 This module provides functions for saving Word documents in different formats.
 """
 import os
+import shutil
+import subprocess
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pickle import PicklingError
+from typing import List
 
 # 标记库是否已安装
 docx_installed = True
@@ -24,7 +31,46 @@ except ImportError:
     print("请使用以下命令安装: pip install python-docx")
     docx_installed = False
 
+# Word COM实例在多次转换之间共享，pywin32不可用时get_word()抛出ImportError
+from utils._word_app import get_word, word_available, open_document
+# 没有Word时通过共享的无界面LibreOffice导出PDF，不可用时convert_via_uno()抛出ImportError
+from utils._soffice import convert_via_uno, convert_batch_via_cli, soffice_cli_available
+# 导出纯文本时流式读取段落
+from utils.document_operations import _iter_paragraph_texts
+# 相对路径的解析和文件存在检查由装饰器统一完成
+from utils._paths import resolve_docx, resolve_docx_path
+# 导出前先写入缓存中未写盘的修改（save=False），各种导出方式都直接读取磁盘上的文件
+from utils._doc_cache import flush
 
+
+# 支持的输出格式及对应的Word SaveAs文件格式（顺序即错误提示中的顺序）
+_FORMAT_MAP = {
+    "docx": 16,  # wdFormatDocumentDefault (*.docx)
+    "doc": 0,    # wdFormatDocument97 (*.doc)
+    "pdf": 17,   # wdFormatPDF
+    "txt": 2,    # wdFormatText（纯文本由python-docx导出，不经过Word）
+    "html": 8,   # wdFormatHTML
+}
+
+
+def _save_as_with_word(file_path: str, output_path: str, file_format: int) -> None:
+    """用共享的Word实例打开文档并另存为指定格式，完成后只关闭文档，不退出Word"""
+    word = get_word()
+    # 只读打开，不加入最近使用的文件列表，也不弹出格式转换确认
+    doc = open_document(
+        word, file_path,
+        ConfirmConversions=False,
+        ReadOnly=True,
+        AddToRecentFiles=False,
+        Visible=False
+    )
+    try:
+        doc.SaveAs(output_path, FileFormat=file_format)
+    finally:
+        doc.Close(SaveChanges=0)  # 0 = wdDoNotSaveChanges
+
+
+@resolve_docx_path('file_path')
 def save_document_as_pdf(file_path: str) -> str:
     """
     将Word文档保存为PDF格式。
@@ -39,46 +85,37 @@ def save_document_as_pdf(file_path: str) -> str:
     if not docx_installed:
         return "错误: 无法导出PDF，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
+        flush(file_path)
+        
         # 构建PDF文件路径
         pdf_path = os.path.splitext(file_path)[0] + ".pdf"
         
         # 尝试使用Microsoft Word COM对象导出PDF
         try:
-            import win32com.client
-            word = win32com.client.Dispatch("Word.Application")
-            word.Visible = False
+            _save_as_with_word(file_path, pdf_path, _FORMAT_MAP["pdf"])
             
-            doc = word.Documents.Open(file_path)
-            doc.SaveAs(pdf_path, FileFormat=17)  # 17表示PDF格式
-            doc.Close()
-            word.Quit()
+            return f"成功将文档导出为PDF: {os.path.basename(pdf_path)}"
+        
+        except ImportError:
+            # 没有win32com库或不是Windows系统时，改用LibreOffice导出
+            pass
+        
+        try:
+            convert_via_uno(file_path, pdf_path)
             
             return f"成功将文档导出为PDF: {os.path.basename(pdf_path)}"
         
         except ImportError:
-            # 如果没有win32com库或不是Windows系统，返回错误信息
-            return "错误: 导出PDF功能需要在Windows系统上安装pywin32库，请使用以下命令安装: pip install pywin32"
+            # Word和LibreOffice都不可用，返回错误信息
+            return "错误: 导出PDF功能需要在Windows系统上安装pywin32库（或安装LibreOffice），请使用以下命令安装: pip install pywin32"
     
     except Exception as e:
         return f"导出PDF时出错: {str(e)}"
 
 
-def save_document_as(file_path: str, output_format: str = "docx", new_filename: str = None) -> str:
+@resolve_docx_path('file_path')
+def save_document_as(file_path: str, output_format: str = "docx", new_filename: str = None, force_word: bool = False) -> str:
     """
     将Word文档保存为指定格式。
     
@@ -86,6 +123,7 @@ def save_document_as(file_path: str, output_format: str = "docx", new_filename:
         file_path: Word文档的完整路径或相对于输出目录的路径
         output_format: 输出格式，可选值: "docx", "doc", "pdf", "txt", "html"
         new_filename: 新文件名(不含扩展名)，如果不提供则使用原文件名
+        force_word: 为True时docx到docx也由Word重新保存；默认直接复制文件
     
     Returns:
         操作结果信息
@@ -95,25 +133,12 @@ def save_document_as(file_path: str, output_format: str = "docx", new_filename:
         return "错误: 无法保存文档，请先安装python-docx库: pip install python-docx"
     
     # 检查格式是否支持
-    supported_formats = ["docx", "doc", "pdf", "txt", "html"]
-    if output_format.lower() not in supported_formats:
-        return f"错误: 不支持的输出格式 '{output_format}'，可选值为: {', '.join(supported_formats)}"
-    
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
+    if output_format.lower() not in _FORMAT_MAP:
+        return f"错误: 不支持的输出格式 '{output_format}'，可选值为: {', '.join(_FORMAT_MAP)}"
     
     try:
+        flush(file_path)
+        
         # 构建新文件路径
         original_basename = os.path.splitext(os.path.basename(file_path))[0]
         output_dirname = os.path.dirname(file_path)
@@ -133,22 +158,15 @@ def save_document_as(file_path: str, output_format: str = "docx", new_filename:
             return save_document_as_pdf(file_path)
         
         elif output_format.lower() in ["docx", "doc"]:
+            # docx另存为docx不需要转换格式，直接复制文件，无需启动Word
+            if output_format.lower() == "docx" and file_path.lower().endswith(".docx") and not force_word:
+                if os.path.abspath(output_path) != os.path.abspath(file_path):
+                    shutil.copyfile(file_path, output_path)
+                return f"成功将文档保存为 docx 格式: {os.path.basename(output_path)}"
+            
             try:
-                # 尝试使用Microsoft Word COM对象保存
-                import win32com.client
-                word = win32com.client.Dispatch("Word.Application")
-                word.Visible = False
-                
-                # 使用数字格式指定不同的Word格式
-                format_map = {
-                    "docx": 16,  # wdFormatDocumentDefault (*.docx)
-                    "doc": 0     # wdFormatDocument97 (*.doc)
-                }
-                
-                doc = word.Documents.Open(file_path)
-                doc.SaveAs(output_path, FileFormat=format_map[output_format.lower()])
-                doc.Close()
-                word.Quit()
+                # 尝试使用Microsoft Word COM对象保存，使用数字格式指定不同的Word格式
+                _save_as_with_word(file_path, output_path, _FORMAT_MAP[output_format.lower()])
                 
                 return f"成功将文档保存为 {output_format} 格式: {os.path.basename(output_path)}"
             
@@ -162,26 +180,22 @@ def save_document_as(file_path: str, output_format: str = "docx", new_filename:
                     return "错误: 保存为DOC格式需要在Windows系统上安装pywin32库"
         
         elif output_format.lower() == "txt":
-            # 将文档转换为纯文本
-            doc = Document(file_path)
-            text_content = "\n\n".join([para.text for para in doc.paragraphs if para.text.strip()])
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(text_content)
+            # 将文档转换为纯文本：流式解析段落并逐段写入，不构建文档对象和完整的文本
+            with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                first = True
+                for text, _ in _iter_paragraph_texts(file_path):
+                    if text and not text.isspace():
+                        if not first:
+                            f.write("\n\n")
+                        f.write(text)
+                        first = False
             
             return f"成功将文档保存为文本格式: {os.path.basename(output_path)}"
         
         elif output_format.lower() == "html":
             try:
                 # 尝试使用Microsoft Word COM对象保存为HTML
-                import win32com.client
-                word = win32com.client.Dispatch("Word.Application")
-                word.Visible = False
-                
-                doc = word.Documents.Open(file_path)
-                doc.SaveAs(output_path, FileFormat=8)  # 8表示HTML格式
-                doc.Close()
-                word.Quit()
+                _save_as_with_word(file_path, output_path, _FORMAT_MAP["html"])
                 
                 return f"成功将文档保存为HTML格式: {os.path.basename(output_path)}"
             
@@ -192,3 +206,109 @@ def save_document_as(file_path: str, output_format: str = "docx", new_filename:
         return f"保存文档时出错: {str(e)}"
 
 
+# 没有Word时可以由一个soffice进程批量转换的输出格式
+_SOFFICE_BATCH_FORMATS = ("pdf", "html")
+
+
+def _convert_batch_with_soffice(file_paths: List[str], output_format: str) -> List[str]:
+    """
+    用soffice命令行批量转换，同一目录下的文档只启动一个soffice进程，输出文件与源文件同目录。
+
+    Returns:
+        与file_paths一一对应的结果信息
+    """
+    results = [None] * len(file_paths)
+    by_dir = {}
+    for index, path in enumerate(file_paths):
+        full_path = resolve_docx(path)
+        if not os.path.exists(full_path):
+            results[index] = f"错误: 文件 {full_path} 不存在"
+        else:
+            by_dir.setdefault(os.path.dirname(full_path), []).append((index, full_path))
+    
+    for output_dir, items in by_dir.items():
+        # 输出文件可能已经存在，以本次转换开始后的修改时间判断是否转换成功（留出1秒的时间戳精度误差）
+        started = time.time() - 1
+        try:
+            convert_batch_via_cli([full_path for _, full_path in items], output_format, output_dir)
+            error = None
+        except (subprocess.SubprocessError, OSError) as e:
+            error = f"LibreOffice转换失败: {e}"
+        
+        for index, full_path in items:
+            output_path = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(full_path))[0]}.{output_format}")
+            # 一次stat同时判断输出文件是否存在及其修改时间
+            try:
+                converted = os.stat(output_path).st_mtime >= started
+            except OSError:
+                converted = False
+            if converted:
+                results[index] = f"成功将文档保存为 {output_format} 格式: {os.path.basename(output_path)}"
+            else:
+                results[index] = f"错误: {error or 'LibreOffice未生成输出文件'}"
+    return results
+
+
+def _convert_one(file_path: str, output_format: str) -> str:
+    """工作进程入口：每个工作进程通过get_word()持有自己的Word实例，处理多个文档时复用"""
+    return save_document_as(file_path, output_format)
+
+
+def save_documents_as_batch(file_paths: List[str], output_format: str = "pdf", max_workers: int = 4) -> str:
+    """
+    将多个Word文档批量保存为指定格式。
+    
+    各文档在进程池中并行转换，每个工作进程使用自己的Word实例，互不阻塞。
+    没有Word时，PDF和HTML改由一个soffice --headless进程批量转换。
+    
+    Args:
+        file_paths: Word文档路径列表（完整路径或相对于输出目录的路径）
+        output_format: 输出格式，可选值同save_document_as
+        max_workers: 最多同时运行的工作进程（Word实例）数量
+    
+    Returns:
+        操作结果信息
+    """
+    if not file_paths:
+        return "错误: 未提供需要转换的文档"
+    
+    results = [None] * len(file_paths)
+    workers = min(max_workers, len(file_paths))
+    
+    # 工作进程和soffice都读取磁盘上的文件，缓存中未写盘的修改只有当前进程能写入
+    for index, path in enumerate(file_paths):
+        try:
+            flush(resolve_docx(path))
+        except Exception as e:
+            results[index] = f"错误: 保存未写盘的修改失败: {e}"
+    pending = [index for index, result in enumerate(results) if result is None]
+    
+    if output_format.lower() in _SOFFICE_BATCH_FORMATS and not word_available() and soffice_cli_available():
+        # 没有Word时由一个soffice进程转换所有文档，不再逐个启动LibreOffice
+        converted = _convert_batch_with_soffice([file_paths[index] for index in pending], output_format.lower())
+        for index, result in zip(pending, converted):
+            results[index] = result
+    elif workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(_convert_one, file_paths[index], output_format): index
+                    for index in pending
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+        except (BrokenProcessPool, PicklingError, OSError):
+            # 进程池不可用时，未完成的文档改为在当前进程中依次转换
+            pass
+    
+    for index, path in enumerate(file_paths):
+        if results[index] is None:
+            results[index] = _convert_one(path, output_format)
+    
+    failed = [(path, result) for path, result in zip(file_paths, results) if not result.startswith("成功")]
+    result_msg = f"成功批量转换 {len(file_paths) - len(failed)} 个文档为 {output_format} 格式"
+    if failed:
+        result_msg += f"，但有 {len(failed)} 个文档转换失败: " + "; ".join(
+            f"{os.path.basename(path)}: {result}" for path, result in failed
+        )
+    return result_msg
@@ -3,7 +3,7 @@
 """
 
 import os
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple, Union
 from docx import Document
 from docx.shared import Pt, Cm, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
@@ -20,14 +20,159 @@ try:
 except ImportError:
     docx_installed = False
 
-# 尝试导入pywin32，用于某些高级功能
+# 安装了orjson时用它解析样式JSON文件（单次C语言解析，比标准库json快数倍），否则使用标准库
 try:
-    import win32com.client
-    import pythoncom
-    win32com_installed = True
+    from orjson import loads as _json_loads
 except ImportError:
-    win32com_installed = False
+    from json import loads as _json_loads
 
+from utils._colors import hex_to_rgb_tuple, is_hex_color
+# 已解析的文档在连续的样式操作之间复用，文件被修改后自动重新解析
+from utils._doc_cache import get_doc, save_doc, evict
+# 相对路径的解析和文件存在检查由装饰器统一完成
+from utils._paths import resolve_docx_path
+
+# 样式类型名称 -> python-docx样式类型
+_STYLE_TYPE_MAP = {
+    "paragraph": WD_STYLE_TYPE.PARAGRAPH,
+    "character": WD_STYLE_TYPE.CHARACTER,
+    "table": WD_STYLE_TYPE.TABLE,
+    "list": WD_STYLE_TYPE.LIST
+}
+
+# 导出的JSON中的样式类型值 -> 样式类型名称
+_STYLE_TYPE_NAMES = {
+    1: "paragraph",
+    2: "character",
+    3: "table",
+    4: "list"
+}
+
+# 对齐方式名称 -> python-docx对齐方式，以及导出时使用的反向映射
+_ALIGNMENT_MAP = {
+    "left": WD_ALIGN_PARAGRAPH.LEFT,
+    "right": WD_ALIGN_PARAGRAPH.RIGHT,
+    "center": WD_ALIGN_PARAGRAPH.CENTER,
+    "justify": WD_ALIGN_PARAGRAPH.JUSTIFY
+}
+_ALIGNMENT_MAP_REVERSE = {value: name for name, value in _ALIGNMENT_MAP.items()}
+
+class _Result(NamedTuple):
+    """内部样式操作的结果：是否成功，以及返回给调用方的信息"""
+    ok: bool
+    msg: str
+
+def _build_style_index(doc) -> Dict[str, Any]:
+    """遍历一次文档样式，建立 样式名称 -> 样式 的索引"""
+    return {style.name: style for style in doc.styles}
+
+def _w_element(tag: str, **attrs):
+    """创建OOXML元素，attrs中的属性名自动加上w:前缀（按传入顺序设置）"""
+    element = OxmlElement(tag)
+    for name, value in attrs.items():
+        element.set(qn(f'w:{name}'), value)
+    return element
+
+def _toggle_element(tag: str, value: bool):
+    """开关属性（w:b、w:i）：True为空元素，False时设置w:val为0"""
+    return _w_element(tag) if value else _w_element(tag, val="0")
+
+def _build_run_properties(
+    font_name: str = None,
+    font_size: float = None,
+    font_bold: bool = None,
+    font_italic: bool = None,
+    font_underline: bool = None,
+    font_color: str = None
+):
+    """
+    按参数构造样式的w:rPr元素，子元素按OOXML规定的顺序排列。
+    
+    Returns:
+        w:rPr元素，没有需要设置的字体属性时返回None
+    """
+    children = []
+    
+    if font_name:
+        # 西文和中文字体都设置为同一字体
+        children.append(_w_element('w:rFonts', ascii=font_name, hAnsi=font_name, eastAsia=font_name))
+    
+    if font_bold is not None:
+        children.append(_toggle_element('w:b', font_bold))
+    
+    if font_italic is not None:
+        children.append(_toggle_element('w:i', font_italic))
+    
+    # 格式无效的颜色忽略
+    if font_color and is_hex_color(font_color):
+        children.append(_w_element('w:color', val=str(RGBColor(*hex_to_rgb_tuple(font_color)))))
+    
+    if font_size:
+        # w:sz以半磅为单位
+        children.append(_w_element('w:sz', val=str(int(round(font_size * 2)))))
+    
+    if font_underline is not None:
+        children.append(_w_element('w:u', val="single" if font_underline else "none"))
+    
+    if not children:
+        return None
+    rPr = OxmlElement('w:rPr')
+    rPr.extend(children)
+    return rPr
+
+def _build_paragraph_properties(
+    alignment: str = None,
+    line_spacing: float = None,
+    space_before: float = None,
+    space_after: float = None,
+    first_line_indent: float = None,
+    left_indent: float = None,
+    right_indent: float = None
+):
+    """
+    按参数构造样式的w:pPr元素，距离换算为缇（twips），行距为倍数行距。
+    
+    Returns:
+        w:pPr元素，没有需要设置的段落属性时返回None
+    """
+    children = []
+    
+    spacing = {}
+    if line_spacing is not None:
+        # 倍数行距以单倍行距的240分之一为单位
+        spacing["line"] = str(int(round(line_spacing * 240)))
+        spacing["lineRule"] = "auto"
+    if space_before is not None:
+        spacing["before"] = str(Pt(space_before).twips)
+    if space_after is not None:
+        spacing["after"] = str(Pt(space_after).twips)
+    if spacing:
+        children.append(_w_element('w:spacing', **spacing))
+    
+    ind = {}
+    if first_line_indent is not None:
+        # 负的首行缩进即悬挂缩进
+        if first_line_indent < 0:
+            ind["hanging"] = str(Cm(-first_line_indent).twips)
+        else:
+            ind["firstLine"] = str(Cm(first_line_indent).twips)
+    if left_indent is not None:
+        ind["left"] = str(Cm(left_indent).twips)
+    if right_indent is not None:
+        ind["right"] = str(Cm(right_indent).twips)
+    if ind:
+        children.append(_w_element('w:ind', **ind))
+    
+    if alignment and alignment in _ALIGNMENT_MAP:
+        children.append(_w_element('w:jc', val=_ALIGNMENT_MAP[alignment].xml_value))
+    
+    if not children:
+        return None
+    pPr = OxmlElement('w:pPr')
+    pPr.extend(children)
+    return pPr
+
+@resolve_docx_path('file_path')
 def create_custom_style(
     file_path: str,
     style_name: str,
@@ -76,133 +221,100 @@ def create_custom_style(
     if not docx_installed:
         return "错误: 无法创建自定义样式，请先安装python-docx库"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
-    # 映射样式类型
-    style_type_map = {
-        "paragraph": WD_STYLE_TYPE.PARAGRAPH,
-        "character": WD_STYLE_TYPE.CHARACTER,
-        "table": WD_STYLE_TYPE.TABLE,
-        "list": WD_STYLE_TYPE.LIST
-    }
-    
-    if style_type not in style_type_map:
-        return f"错误: 不支持的样式类型 '{style_type}'，可用选项: paragraph, character, table, list"
-    
-    # 映射对齐方式
-    alignment_map = {
-        "left": WD_ALIGN_PARAGRAPH.LEFT,
-        "right": WD_ALIGN_PARAGRAPH.RIGHT,
-        "center": WD_ALIGN_PARAGRAPH.CENTER,
-        "justify": WD_ALIGN_PARAGRAPH.JUSTIFY
-    }
-    
     try:
-        doc = Document(file_path)
-        
-        # 检查样式名称是否已存在
-        style_exists = False
-        for style in doc.styles:
-            if style.name == style_name:
-                style_exists = True
-                break
-        
-        # 创建新样式或获取现有样式
-        if style_exists:
-            return f"错误: 样式 '{style_name}' 已存在，请使用不同的名称或使用apply_style功能修改现有样式"
-        else:
-            style = doc.styles.add_style(style_name, style_type_map[style_type])
-        
-        # 设置基于哪个样式
-        if based_on:
-            try:
-                style.base_style = doc.styles[based_on]
-            except KeyError:
-                return f"错误: 基础样式 '{based_on}' 不存在"
-        
-        # 设置字体属性
-        if any([font_name, font_size, font_bold is not None, font_italic is not None, 
-                font_underline is not None, font_color]):
-                
-            # 对于段落和字符样式，可以设置字体
-            if style_type in ["paragraph", "character"]:
-                font = style.font
-                
-                if font_name:
-                    font.name = font_name
-                    # 设置中文字体
-                    try:
-                        style._element.rPr.rFonts.set(qn('w:eastAsia'), font_name)
-                    except:
-                        pass
-                
-                if font_size:
-                    font.size = Pt(font_size)
-                
-                if font_bold is not None:
-                    font.bold = font_bold
-                
-                if font_italic is not None:
-                    font.italic = font_italic
-                
-                if font_underline is not None:
-                    font.underline = font_underline
-                
-                if font_color:
-                    try:
-                        # 解析十六进制颜色
-                        color = font_color.lstrip('#')
-                        rgb = tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
-                        font.color.rgb = RGBColor(*rgb)
-                    except:
-                        pass
-        
-        # 对于段落样式，可以设置段落格式
-        if style_type == "paragraph":
-            paragraph_format = style.paragraph_format
-            
-            if alignment and alignment in alignment_map:
-                paragraph_format.alignment = alignment_map[alignment]
-            
-            if line_spacing is not None:
-                paragraph_format.line_spacing = line_spacing
-                paragraph_format.line_spacing_rule = WD_LINE_SPACING.MULTIPLE
-            
-            if space_before is not None:
-                paragraph_format.space_before = Pt(space_before)
-            
-            if space_after is not None:
-                paragraph_format.space_after = Pt(space_after)
-            
-            if first_line_indent is not None:
-                paragraph_format.first_line_indent = Cm(first_line_indent)
-            
-            if left_indent is not None:
-                paragraph_format.left_indent = Cm(left_indent)
-            
-            if right_indent is not None:
-                paragraph_format.right_indent = Cm(right_indent)
+        doc = get_doc(file_path)
+        result = _create_custom_style(
+            doc, file_path, style_name, style_type, based_on,
+            font_name, font_size, font_bold, font_italic, font_underline, font_color,
+            alignment, line_spacing, space_before, space_after,
+            first_line_indent, left_indent, right_indent
+        )
         
-        # 保存文档
-        doc.save(file_path)
+        # 只在创建成功时保存；失败时都在修改文档之前返回，无需写盘，缓存的文档也仍然有效
+        if result.ok:
+            save_doc(doc, file_path)
         
-        return f"成功在文档 {os.path.basename(file_path)} 中创建样式 '{style_name}'"
+        return result.msg
     
     except Exception as e:
+        evict(file_path)
         return f"创建自定义样式时出错: {str(e)}"
 
+def _create_custom_style(
+    doc,
+    file_path: str,
+    style_name: str,
+    style_type: str = "paragraph",
+    based_on: str = None,
+    font_name: str = None,
+    font_size: float = None,
+    font_bold: bool = None,
+    font_italic: bool = None,
+    font_underline: bool = None,
+    font_color: str = None,
+    alignment: str = None,
+    line_spacing: float = None,
+    space_before: float = None,
+    space_after: float = None,
+    first_line_indent: float = None,
+    left_indent: float = None,
+    right_indent: float = None,
+    style_index: Dict[str, Any] = None
+) -> _Result:
+    """
+    在已打开的文档中创建自定义样式（不保存），参数同create_custom_style，返回_Result。
+    
+    style_index为_build_style_index建立的样式索引，连续处理多个样式时传入同一个索引，
+    新建的样式会加入其中；为None时临时建立。
+    """
+    if style_type not in _STYLE_TYPE_MAP:
+        return _Result(False, f"错误: 不支持的样式类型 '{style_type}'，可用选项: paragraph, character, table, list")
+    
+    if style_index is None:
+        style_index = _build_style_index(doc)
+    
+    # 检查样式名称是否已存在
+    if style_name in style_index:
+        return _Result(False, f"错误: 样式 '{style_name}' 已存在，请使用不同的名称或使用apply_style功能修改现有样式")
+    
+    # 先查找基础样式，基础样式不存在时不向文档中添加任何内容
+    base_style = None
+    if based_on:
+        try:
+            base_style = doc.styles[based_on]
+        except KeyError:
+            return _Result(False, f"错误: 基础样式 '{based_on}' 不存在")
+    
+    # 创建新样式
+    style = doc.styles.add_style(style_name, _STYLE_TYPE_MAP[style_type])
+    style_index[style_name] = style
+    
+    # 设置基于哪个样式
+    if base_style is not None:
+        style.base_style = base_style
+    
+    # 新建的样式还没有rPr和pPr，直接构造完整的属性元素一次插入，
+    # 不再通过font/paragraph_format的各个属性分别查找和修改XML
+    style_element = style.element
+    
+    # 对于段落和字符样式，可以设置字体
+    if style_type in ["paragraph", "character"]:
+        rPr = _build_run_properties(font_name, font_size, font_bold, font_italic, font_underline, font_color)
+        if rPr is not None:
+            style_element._insert_rPr(rPr)
+    
+    # 对于段落样式，可以设置段落格式
+    if style_type == "paragraph":
+        pPr = _build_paragraph_properties(
+            alignment, line_spacing, space_before, space_after,
+            first_line_indent, left_indent, right_indent
+        )
+        if pPr is not None:
+            style_element._insert_pPr(pPr)
+    
+    return _Result(True, f"成功在文档 {os.path.basename(file_path)} 中创建样式 '{style_name}'")
+
+@resolve_docx_path('file_path')
 def apply_style(
     file_path: str,
     paragraph_indices: List[int],
@@ -227,77 +339,146 @@ def apply_style(
     if not docx_installed:
         return "错误: 无法应用样式，请先安装python-docx库"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
+    try:
+        doc = get_doc(file_path)
+        result = _apply_style(doc, file_path, paragraph_indices, style_name, create_if_not_exists, style_properties)
         
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
+        # 只在应用成功时保存；失败时都在修改文档之前返回，无需写盘，缓存的文档也仍然有效
+        if result.ok:
+            save_doc(doc, file_path)
+        
+        return result.msg
     
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
+    except Exception as e:
+        evict(file_path)
+        return f"应用样式时出错: {str(e)}"
+
+def _apply_style(
+    doc,
+    file_path: str,
+    paragraph_indices: List[int],
+    style_name: str,
+    create_if_not_exists: bool = False,
+    style_properties: dict = None,
+    style_index: Dict[str, Any] = None
+) -> _Result:
+    """在已打开的文档中应用样式（不保存），参数同apply_style，style_index同_create_custom_style，返回_Result"""
+    if style_index is None:
+        style_index = _build_style_index(doc)
+    
+    # 检查样式是否存在
+    style_exists = style_name in style_index
+    
+    # 如果样式不存在且需要创建
+    if not style_exists and create_if_not_exists:
+        # 在同一个文档对象中创建样式，无需保存后重新加载
+        properties = {
+            key: value for key, value in (style_properties or {}).items()
+            if key not in ("file_path", "style_name", "style_index")
+        }
+        create_result = _create_custom_style(doc, file_path, style_name, style_index=style_index, **properties)
+        
+        # 如果创建失败则返回错误
+        if not create_result.ok:
+            return create_result
+    elif not style_exists:
+        return _Result(False, f"错误: 样式 '{style_name}' 不存在，请先创建样式或设置create_if_not_exists=True")
+    
+    # 应用样式到指定段落：段落列表只获取一次，样式对象只查找一次，
+    # 不再每次按名称重新解析样式
+    paragraphs = doc.paragraphs
+    n_paras = len(paragraphs)
+    style = style_index[style_name]
+    success_count = 0
+    invalid_indices = []
+    
+    for idx in paragraph_indices:
+        # 检查段落索引是否有效
+        if idx < 0 or idx >= n_paras:
+            invalid_indices.append(idx)
+            continue
+        
+        # 应用样式
+        paragraphs[idx].style = style
+        success_count += 1
+    
+    result_msg = f"成功将样式 '{style_name}' 应用到文档 {os.path.basename(file_path)} 中的 {success_count} 个段落"
+    if invalid_indices:
+        result_msg += f"，但有 {len(invalid_indices)} 个无效的段落索引: {invalid_indices}"
+    
+    return _Result(True, result_msg)
+
+# apply_styles_batch支持的操作
+_BATCH_STYLE_OPERATIONS = {
+    "create_custom_style": _create_custom_style,
+    "apply_style": _apply_style,
+}
+
+@resolve_docx_path('file_path')
+def apply_styles_batch(
+    file_path: str,
+    operations: List[Dict[str, Any]]
+) -> str:
+    """
+    在同一个文档上依次执行多个样式操作，文档只解析和保存一次。
+    
+    Args:
+        file_path: Word文档路径
+        operations: 操作列表，每个元素包含：
+            - operation: 操作名称（create_custom_style 或 apply_style）
+            - 其余键为对应函数的参数（不含file_path）
+    
+    Returns:
+        操作结果信息
+    """
+    # 检查是否安装了必要的库
+    if not docx_installed:
+        return "错误: 无法批量处理样式，请先安装python-docx库"
     
     try:
-        doc = Document(file_path)
-        
-        # 检查样式是否存在
-        style_exists = False
-        for style in doc.styles:
-            if style.name == style_name:
-                style_exists = True
-                break
-        
-        # 如果样式不存在且需要创建
-        if not style_exists and create_if_not_exists:
-            if style_properties is None:
-                style_properties = {}
-            
-            # 创建默认段落样式
-            style_properties["style_name"] = style_name
-            style_properties["file_path"] = file_path
-            
-            # 调用创建样式函数
-            create_result = create_custom_style(**style_properties)
-            
-            # 如果创建失败则返回错误
-            if "错误" in create_result:
-                return create_result
-            
-            # 重新加载文档以获取新创建的样式
-            doc = Document(file_path)
-        elif not style_exists:
-            return f"错误: 样式 '{style_name}' 不存在，请先创建样式或设置create_if_not_exists=True"
-        
-        # 应用样式到指定段落
+        doc = get_doc(file_path)
         success_count = 0
-        invalid_indices = []
+        failed_operations = []
+        
+        # 所有操作共用一个样式索引
+        style_index = _build_style_index(doc)
         
-        for idx in paragraph_indices:
-            # 检查段落索引是否有效
-            if idx < 0 or idx >= len(doc.paragraphs):
-                invalid_indices.append(idx)
+        for i, operation in enumerate(operations):
+            params = dict(operation)
+            name = params.pop("operation", None)
+            params.pop("file_path", None)
+            params["style_index"] = style_index
+            
+            func = _BATCH_STYLE_OPERATIONS.get(name)
+            if func is None:
+                failed_operations.append((i, f"不支持的操作: {name}"))
                 continue
             
-            # 应用样式
-            doc.paragraphs[idx].style = style_name
-            success_count += 1
+            try:
+                result = func(doc, file_path, **params)
+            except Exception as e:
+                result = _Result(False, str(e))
+            
+            if result.ok:
+                success_count += 1
+            else:
+                failed_operations.append((i, result.msg))
         
         # 保存文档
-        doc.save(file_path)
+        if success_count:
+            save_doc(doc, file_path)
         
-        result_msg = f"成功将样式 '{style_name}' 应用到文档 {os.path.basename(file_path)} 中的 {success_count} 个段落"
-        if invalid_indices:
-            result_msg += f"，但有 {len(invalid_indices)} 个无效的段落索引: {invalid_indices}"
+        result_msg = f"成功批量执行 {success_count} 个样式操作"
+        if failed_operations:
+            result_msg += f"，但有 {len(failed_operations)} 个操作失败: {failed_operations}"
         
         return result_msg
     
     except Exception as e:
-        return f"应用样式时出错: {str(e)}"
+        evict(file_path)
+        return f"批量处理样式时出错: {str(e)}"
 
+@resolve_docx_path('file_path', base_arg=None)
 def export_document_styles(
     file_path: str,
     output_path: str = None,
@@ -318,20 +499,6 @@ def export_document_styles(
     if not docx_installed:
         return "错误: 无法导出样式，请先安装python-docx库"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     # 设置导出文件路径
     if output_path is None:
         # 使用与文档同名的路径，但修改扩展名为.json
@@ -340,92 +507,95 @@ def export_document_styles(
         output_path += '_styles.json'
     
     try:
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
-        # 收集样式信息
-        style_info = []
+        # 逐个收集样式信息并直接写入JSON文件，格式与json.dump(列表, indent=4)相同
+        count = 0
+        with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            for style_data in _iter_style_info(doc, style_names):
+                f.write(",\n    " if count else "[\n    ")
+                f.write(json.dumps(style_data, indent=4, ensure_ascii=False).replace("\n", "\n    "))
+                count += 1
+            f.write("\n]" if count else "[]")
         
-        for style in doc.styles:
-            # 如果指定了样式名称列表，只导出列表中的样式
-            if style_names is not None and style.name not in style_names:
-                continue
+        return f"成功导出 {count} 个样式到 {output_path}"
+    
+    except Exception as e:
+        return f"导出样式时出错: {str(e)}"
+
+def _iter_style_info(doc, style_names: List[str] = None):
+    """
+    逐个生成文档中样式的属性（不读写文件）。
+    
+    Yields:
+        样式信息字典，结构与导出的JSON文件中的元素相同
+    """
+    for style in doc.styles:
+        # 如果指定了样式名称列表，只导出列表中的样式
+        if style_names is not None and style.name not in style_names:
+            continue
+        
+        # 创建样式信息字典
+        style_data = {
+            "name": style.name,
+            "type": style.type,
+            "properties": {}
+        }
+        
+        # 记录基础样式（编号样式没有base_style）
+        if getattr(style, 'base_style', None):
+            style_data["based_on"] = style.base_style.name
+        
+        # 添加字体属性
+        if hasattr(style, 'font'):
+            font_properties = {}
             
-            # 创建样式信息字典
-            style_data = {
-                "name": style.name,
-                "type": style.type,
-                "properties": {}
-            }
+            if style.font.name:
+                font_properties["name"] = style.font.name
             
-            # 记录基础样式
-            if style.base_style:
-                style_data["based_on"] = style.base_style.name
+            if style.font.size:
+                font_properties["size"] = style.font.size.pt
             
-            # 添加字体属性
-            if hasattr(style, 'font'):
-                font_properties = {}
-                
-                if style.font.name:
-                    font_properties["name"] = style.font.name
-                
-                if style.font.size:
-                    font_properties["size"] = style.font.size.pt
-                
-                font_properties["bold"] = style.font.bold
-                font_properties["italic"] = style.font.italic
-                font_properties["underline"] = style.font.underline
-                
-                if style.font.color.rgb:
-                    r, g, b = style.font.color.rgb.red, style.font.color.rgb.green, style.font.color.rgb.blue
-                    font_properties["color"] = f"#{r:02x}{g:02x}{b:02x}"
-                
-                style_data["properties"]["font"] = font_properties
+            font_properties["bold"] = style.font.bold
+            font_properties["italic"] = style.font.italic
+            font_properties["underline"] = style.font.underline
             
-            # 添加段落格式属性
-            if hasattr(style, 'paragraph_format'):
-                para_properties = {}
-                
-                if hasattr(style.paragraph_format, 'alignment') and style.paragraph_format.alignment:
-                    alignment_map_reverse = {
-                        WD_ALIGN_PARAGRAPH.LEFT: "left",
-                        WD_ALIGN_PARAGRAPH.RIGHT: "right",
-                        WD_ALIGN_PARAGRAPH.CENTER: "center",
-                        WD_ALIGN_PARAGRAPH.JUSTIFY: "justify"
-                    }
-                    para_properties["alignment"] = alignment_map_reverse.get(style.paragraph_format.alignment, None)
-                
-                if style.paragraph_format.line_spacing:
-                    para_properties["line_spacing"] = style.paragraph_format.line_spacing
-                
-                if style.paragraph_format.space_before:
-                    para_properties["space_before"] = style.paragraph_format.space_before.pt
-                
-                if style.paragraph_format.space_after:
-                    para_properties["space_after"] = style.paragraph_format.space_after.pt
-                
-                if style.paragraph_format.first_line_indent:
-                    para_properties["first_line_indent"] = style.paragraph_format.first_line_indent.cm
-                
-                if style.paragraph_format.left_indent:
-                    para_properties["left_indent"] = style.paragraph_format.left_indent.cm
-                
-                if style.paragraph_format.right_indent:
-                    para_properties["right_indent"] = style.paragraph_format.right_indent.cm
-                
-                style_data["properties"]["paragraph_format"] = para_properties
+            if style.font.color.rgb:
+                # RGBColor的字符串形式为"RRGGBB"
+                font_properties["color"] = f"#{str(style.font.color.rgb).lower()}"
             
-            style_info.append(style_data)
+            style_data["properties"]["font"] = font_properties
         
-        # 将样式信息保存到JSON文件
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(style_info, f, indent=4, ensure_ascii=False)
+        # 添加段落格式属性
+        if hasattr(style, 'paragraph_format'):
+            para_properties = {}
+            
+            if hasattr(style.paragraph_format, 'alignment') and style.paragraph_format.alignment:
+                para_properties["alignment"] = _ALIGNMENT_MAP_REVERSE.get(style.paragraph_format.alignment, None)
+            
+            if style.paragraph_format.line_spacing:
+                para_properties["line_spacing"] = style.paragraph_format.line_spacing
+            
+            if style.paragraph_format.space_before:
+                para_properties["space_before"] = style.paragraph_format.space_before.pt
+            
+            if style.paragraph_format.space_after:
+                para_properties["space_after"] = style.paragraph_format.space_after.pt
+            
+            if style.paragraph_format.first_line_indent:
+                para_properties["first_line_indent"] = style.paragraph_format.first_line_indent.cm
+            
+            if style.paragraph_format.left_indent:
+                para_properties["left_indent"] = style.paragraph_format.left_indent.cm
+            
+            if style.paragraph_format.right_indent:
+                para_properties["right_indent"] = style.paragraph_format.right_indent.cm
+            
+            style_data["properties"]["paragraph_format"] = para_properties
         
-        count = len(style_info)
-        return f"成功导出 {count} 个样式到 {output_path}"
-    
-    except Exception as e:
-        return f"导出样式时出错: {str(e)}"
+        yield style_data
 
+@resolve_docx_path('file_path')
 def import_document_styles(
     file_path: str,
     style_file_path: str,
@@ -448,144 +618,153 @@ def import_document_styles(
     if not docx_installed:
         return "错误: 无法导入样式，请先安装python-docx库"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     # 确保样式文件存在
     if not os.path.exists(style_file_path):
         return f"错误: 样式文件 {style_file_path} 不存在"
     
     try:
-        # 加载样式信息
-        with open(style_file_path, 'r', encoding='utf-8') as f:
-            style_info = json.load(f)
+        # 加载样式信息：一次读入整个文件再解析
+        with open(style_file_path, 'rb') as f:
+            style_info = _json_loads(f.read())
         
-        doc = Document(file_path)
+        # 所有样式在同一个文档对象中创建，最后只保存一次
+        doc = get_doc(file_path)
         
-        # 获取文档中现有的样式名称
-        existing_styles = [style.name for style in doc.styles]
+        imported_count, skipped_count, failed_styles = _apply_style_info(
+            doc, file_path, style_info, style_names, overwrite_existing
+        )
         
-        # 记录操作结果
-        imported_count = 0
-        skipped_count = 0
-        failed_styles = []
+        # 保存文档
+        if imported_count:
+            save_doc(doc, file_path)
         
-        # 导入样式
-        for style_data in style_info:
-            style_name = style_data["name"]
+        result_msg = f"导入样式结果: 成功 {imported_count} 个, 跳过 {skipped_count} 个"
+        if failed_styles:
+            result_msg += f", 失败 {len(failed_styles)} 个: {failed_styles}"
+        
+        return result_msg
+    
+    except Exception as e:
+        evict(file_path)
+        return f"导入样式时出错: {str(e)}"
+
+def _apply_style_info(
+    doc,
+    file_path: str,
+    style_info,
+    style_names: List[str] = None,
+    overwrite_existing: bool = False
+) -> Tuple[int, int, List[str]]:
+    """
+    在已打开的文档中按样式信息（列表或_iter_style_info生成的序列）创建样式（不保存）。
+    
+    Returns:
+        (成功数量, 跳过数量, 失败的样式名称列表)
+    """
+    # 获取文档中现有的样式名称（新建的样式由_create_custom_style加入索引）
+    existing_styles = _build_style_index(doc)
+    
+    # 要导入的样式名称集合，每个样式只做一次哈希查找
+    wanted = frozenset(style_names) if style_names is not None else None
+    
+    # 记录操作结果
+    imported_count = 0
+    skipped_count = 0
+    failed_styles = []
+    
+    # 导入样式
+    for style_data in style_info:
+        style_name = style_data["name"]
+        
+        # 如果指定了样式名称列表，只导入列表中的样式，其余样式在准备参数之前跳过
+        if wanted is not None and style_name not in wanted:
+            continue
+        
+        # 检查样式是否已存在
+        if style_name in existing_styles and not overwrite_existing:
+            skipped_count += 1
+            continue
+        
+        # 准备样式参数
+        style_params = {
+            "style_name": style_name,
+            "style_index": existing_styles
+        }
+        
+        # 设置样式类型
+        style_params["style_type"] = _STYLE_TYPE_NAMES.get(style_data["type"], "paragraph")
+        
+        # 设置基础样式
+        if "based_on" in style_data:
+            style_params["based_on"] = style_data["based_on"]
+        
+        # 设置字体属性
+        if "properties" in style_data and "font" in style_data["properties"]:
+            font = style_data["properties"]["font"]
             
-            # 如果指定了样式名称列表，只导入列表中的样式
-            if style_names is not None and style_name not in style_names:
-                continue
+            if "name" in font:
+                style_params["font_name"] = font["name"]
             
-            # 检查样式是否已存在
-            if style_name in existing_styles and not overwrite_existing:
-                skipped_count += 1
-                continue
+            if "size" in font:
+                style_params["font_size"] = font["size"]
             
-            # 准备样式参数
-            style_params = {
-                "file_path": file_path,
-                "style_name": style_name
-            }
+            if "bold" in font:
+                style_params["font_bold"] = font["bold"]
             
-            # 设置样式类型
-            style_type_map = {
-                1: "paragraph",
-                2: "character",
-                3: "table",
-                4: "list"
-            }
-            style_params["style_type"] = style_type_map.get(style_data["type"], "paragraph")
+            if "italic" in font:
+                style_params["font_italic"] = font["italic"]
             
-            # 设置基础样式
-            if "based_on" in style_data:
-                style_params["based_on"] = style_data["based_on"]
+            if "underline" in font:
+                style_params["font_underline"] = font["underline"]
             
-            # 设置字体属性
-            if "properties" in style_data and "font" in style_data["properties"]:
-                font = style_data["properties"]["font"]
-                
-                if "name" in font:
-                    style_params["font_name"] = font["name"]
-                
-                if "size" in font:
-                    style_params["font_size"] = font["size"]
-                
-                if "bold" in font:
-                    style_params["font_bold"] = font["bold"]
-                
-                if "italic" in font:
-                    style_params["font_italic"] = font["italic"]
-                
-                if "underline" in font:
-                    style_params["font_underline"] = font["underline"]
-                
-                if "color" in font:
-                    style_params["font_color"] = font["color"]
+            if "color" in font:
+                style_params["font_color"] = font["color"]
+        
+        # 设置段落格式属性
+        if "properties" in style_data and "paragraph_format" in style_data["properties"]:
+            para_format = style_data["properties"]["paragraph_format"]
             
-            # 设置段落格式属性
-            if "properties" in style_data and "paragraph_format" in style_data["properties"]:
-                para_format = style_data["properties"]["paragraph_format"]
-                
-                if "alignment" in para_format:
-                    style_params["alignment"] = para_format["alignment"]
-                
-                if "line_spacing" in para_format:
-                    style_params["line_spacing"] = para_format["line_spacing"]
-                
-                if "space_before" in para_format:
-                    style_params["space_before"] = para_format["space_before"]
-                
-                if "space_after" in para_format:
-                    style_params["space_after"] = para_format["space_after"]
-                
-                if "first_line_indent" in para_format:
-                    style_params["first_line_indent"] = para_format["first_line_indent"]
-                
-                if "left_indent" in para_format:
-                    style_params["left_indent"] = para_format["left_indent"]
-                
-                if "right_indent" in para_format:
-                    style_params["right_indent"] = para_format["right_indent"]
+            if "alignment" in para_format:
+                style_params["alignment"] = para_format["alignment"]
             
-            try:
-                # 创建新样式或更新现有样式
-                if style_name in existing_styles and overwrite_existing:
-                    # 删除现有样式
-                    # 注意：python-docx不直接支持删除样式，这里我们通过创建新样式来覆盖
-                    pass
-                
-                # 创建新样式
-                result = create_custom_style(**style_params)
-                
-                if "成功" in result:
-                    imported_count += 1
-                else:
-                    failed_styles.append(style_name)
-            except Exception as e:
+            if "line_spacing" in para_format:
+                style_params["line_spacing"] = para_format["line_spacing"]
+            
+            if "space_before" in para_format:
+                style_params["space_before"] = para_format["space_before"]
+            
+            if "space_after" in para_format:
+                style_params["space_after"] = para_format["space_after"]
+            
+            if "first_line_indent" in para_format:
+                style_params["first_line_indent"] = para_format["first_line_indent"]
+            
+            if "left_indent" in para_format:
+                style_params["left_indent"] = para_format["left_indent"]
+            
+            if "right_indent" in para_format:
+                style_params["right_indent"] = para_format["right_indent"]
+        
+        try:
+            # 创建新样式或更新现有样式
+            if style_name in existing_styles and overwrite_existing:
+                # 删除现有样式
+                # 注意：python-docx不直接支持删除样式，这里我们通过创建新样式来覆盖
+                pass
+            
+            # 创建新样式
+            result = _create_custom_style(doc, file_path, **style_params)
+            
+            if result.ok:
+                imported_count += 1
+            else:
                 failed_styles.append(style_name)
-        
-        result_msg = f"导入样式结果: 成功 {imported_count} 个, 跳过 {skipped_count} 个"
-        if failed_styles:
-            result_msg += f", 失败 {len(failed_styles)} 个: {failed_styles}"
-        
-        return result_msg
+        except Exception as e:
+            failed_styles.append(style_name)
     
-    except Exception as e:
-        return f"导入样式时出错: {str(e)}"
+    return imported_count, skipped_count, failed_styles
 
+@resolve_docx_path('source_file_path', 'target_file_path')
 def copy_style_between_documents(
     source_file_path: str,
     target_file_path: str,
@@ -608,59 +787,27 @@ def copy_style_between_documents(
     if not docx_installed:
         return "错误: 无法复制样式，请先安装python-docx库"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(source_file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        source_file_path = os.path.join(base_path, source_file_path)
-    
-    if not os.path.isabs(target_file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        target_file_path = os.path.join(base_path, target_file_path)
-    
-    # 确保源文件存在
-    if not os.path.exists(source_file_path):
-        return f"错误: 源文件 {source_file_path} 不存在"
-    
-    # 确保目标文件存在
-    if not os.path.exists(target_file_path):
-        return f"错误: 目标文件 {target_file_path} 不存在"
-    
     try:
-        # 创建临时样式文件
-        temp_style_file = os.path.join(os.path.dirname(source_file_path), "_temp_styles_.json")
+        # 样式信息直接在内存中传递，不经过临时JSON文件
+        source_doc = get_doc(source_file_path)
+        style_info = _iter_style_info(source_doc, style_names)
         
-        # 从源文档导出指定样式
-        export_result = export_document_styles(source_file_path, temp_style_file, style_names)
+        target_doc = get_doc(target_file_path)
+        imported_count, skipped_count, failed_styles = _apply_style_info(
+            target_doc, target_file_path, style_info, style_names, overwrite_existing
+        )
         
-        # 检查导出是否成功
-        if "错误" in export_result:
-            # 清理临时文件
-            if os.path.exists(temp_style_file):
-                os.remove(temp_style_file)
-            return f"从源文档导出样式时出错: {export_result}"
+        # 保存目标文档
+        if imported_count:
+            save_doc(target_doc, target_file_path)
         
-        # 将样式导入到目标文档
-        import_result = import_document_styles(target_file_path, temp_style_file, style_names, overwrite_existing)
-        
-        # 清理临时文件
-        if os.path.exists(temp_style_file):
-            os.remove(temp_style_file)
+        import_result = f"导入样式结果: 成功 {imported_count} 个, 跳过 {skipped_count} 个"
+        if failed_styles:
+            import_result += f", 失败 {len(failed_styles)} 个: {failed_styles}"
         
         # 返回导入结果
         return f"将样式从 {os.path.basename(source_file_path)} 复制到 {os.path.basename(target_file_path)}: {import_result}"
     
     except Exception as e:
-        # 清理临时文件
-        if 'temp_style_file' in locals() and os.path.exists(temp_style_file):
-            os.remove(temp_style_file)
+        evict(target_file_path)
         return f"复制样式时出错: {str(e)}" 
\ No newline at end of file
@@ -8,8 +8,20 @@ It's implemented using the Model Context Protocol (MCP) Python SDK.
 import os
 import sys
 import io
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from mcp.server.fastmcp import FastMCP
-from typing import Optional, List, Dict, Any, Union, Tuple
+from typing import Annotated, Optional, List, Dict, Any, Union, Tuple
+from pydantic import SkipValidation
+# 基础目录按环境变量OFFICE_EDIT_PATH的值缓存，不再每次调用expanduser；
+# 相对路径的解析和文件存在检查由装饰器统一完成
+from utils._paths import get_base_path, resolve_docx, resolve_docx_path
+# 已解析的文档在连续的工具调用之间复用，文件被修改后自动重新解析
+from utils._doc_cache import get_doc, save_doc, mark_dirty, flush, flush_all, evict, discard
+from utils.edit_operations import find_and_replace_text as _find_and_replace_text, _replace_paragraph_text
+from utils.saveMethod import save_document_as_pdf as _save_document_as_pdf, save_document_as as _save_document_as
+# Word COM实例在多次调用之间共享，pywin32不可用时get_word()抛出ImportError
+from utils._word_app import get_word, running_word, open_document
 
 # 标记库是否已安装
 docx_installed = True
@@ -23,7 +35,16 @@ try:
     from docx.enum.section import WD_ORIENTATION, WD_SECTION
     from docx.oxml.ns import qn
     from docx.oxml import OxmlElement
+    from docx.oxml.table import CT_Tbl
+    from docx.table import Table
     import docx.opc.constants
+    # 以下共用的辅助函数所在模块都依赖python-docx，放在这里导入，未安装时服务器仍能启动
+    # 段落文本格式的rPr模板与批量格式化共用
+    from utils.batch_paragraph_operations import _build_rpr_template, _replace_rpr, _parse_rgb
+    # 表格单元格文本直接写入w:tc，与批量插入表格共用
+    from utils.media_table_operations import _set_cell_text
+    # 合并文档时直接复制正文XML元素（并重建图片、图表、嵌入对象和链接关系），与utils中的合并共用
+    from utils.document_formatting import _append_body_elements, _set_run_fonts
 except ImportError:
     print("警告: 未检测到python-docx库，Word文档功能将不可用")
     print("请使用以下命令安装: pip install python-docx")
@@ -38,6 +59,55 @@ except ImportError:
     print("请使用以下命令安装: pip install Pillow")
     pillow_installed = False
 
+# 高亮颜色映射 (用于XML着色)，以及错误提示中列出的可选值
+_HIGHLIGHT_COLOR_MAP = {
+    "yellow": "FFFF00",
+    "green": "00FF00",
+    "blue": "0000FF",
+    "red": "FF0000",
+    "pink": "FFC0CB",
+    "turquoise": "40E0D0",
+    "violet": "EE82EE",
+    "darkblue": "00008B",
+    "teal": "008080",
+    "darkred": "8B0000",
+    "darkgreen": "006400"
+}
+_HIGHLIGHT_COLOR_NAMES = ", ".join(_HIGHLIGHT_COLOR_MAP)
+
+if docx_installed:
+    # 行间距规则映射
+    _SPACING_RULE_MAP = {
+        "multiple": WD_LINE_SPACING.MULTIPLE,
+        "exact": WD_LINE_SPACING.EXACTLY,
+        "atLeast": WD_LINE_SPACING.AT_LEAST
+    }
+    
+    # 页面方向映射
+    _ORIENTATION_MAP = {
+        "portrait": WD_ORIENTATION.PORTRAIT,
+        "landscape": WD_ORIENTATION.LANDSCAPE
+    }
+    
+    # 段落对齐方式映射
+    _ALIGNMENT_MAP = {
+        "left": WD_ALIGN_PARAGRAPH.LEFT,
+        "center": WD_ALIGN_PARAGRAPH.CENTER,
+        "right": WD_ALIGN_PARAGRAPH.RIGHT,
+        "justify": WD_ALIGN_PARAGRAPH.JUSTIFY
+    }
+    
+    # 常用的带命名空间的标签和属性名，只在导入时计算一次
+    _QN_P = qn('w:p')
+    _QN_TBL = qn('w:tbl')
+    _QN_FILL = qn('w:fill')
+    _QN_FLDCHARTYPE = qn('w:fldCharType')
+
+
+# 批量工具的操作列表可能很大，FastMCP默认会按类型逐项校验每次调用的参数；
+# 这里跳过校验但保留生成的JSON Schema，每个操作的字段由工具函数自己检查
+_Operations = Annotated[List[Dict[str, Any]], SkipValidation]
+
 # 创建一个MCP服务器，保持名称与配置文件一致
 mcp = FastMCP("wordEditor", enable_standard_requests=True)
 
@@ -58,9 +128,7 @@ def create_empty_txt(filename: str) -> str:
         filename += '.txt'
     
     # 从环境变量获取输出路径，如果未设置则使用默认桌面路径
-    output_path = os.environ.get('OFFICE_EDIT_PATH')
-    if not output_path:
-        output_path = os.path.join(os.path.expanduser('~'), '桌面')
+    output_path = get_base_path()
     
     # 创建完整的文件路径
     file_path = os.path.join(output_path, filename)
@@ -96,9 +164,7 @@ def create_word_document(filename: str) -> str:
         filename += '.docx'
     
     # 从环境变量获取输出路径，如果未设置则使用默认桌面路径
-    output_path = os.environ.get('OFFICE_EDIT_PATH')  # 保持环境变量名不变，以兼容现有配置
-    if not output_path:
-        output_path = os.path.join(os.path.expanduser('~'), '桌面')
+    output_path = get_base_path()
     
     # 创建完整的文件路径
     file_path = os.path.join(output_path, filename)
@@ -111,13 +177,14 @@ def create_word_document(filename: str) -> str:
         doc = Document()
         
         # 保存文档
-        doc.save(file_path)
+        save_doc(doc, file_path)
         
         return f"成功在 {output_path} 创建了Word文档: {filename}"
     except Exception as e:
         return f"创建Word文档时出错: {str(e)}"
 
 @mcp.tool()
+@resolve_docx_path('file_path')
 def open_and_read_word_document(file_path: str) -> str:
     """
     打开并读取Word文档的完整内容。
@@ -132,40 +199,28 @@ def open_and_read_word_document(file_path: str) -> str:
     if not docx_installed:
         return "错误: 无法读取Word文档，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
         # 打开Word文档
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
-        # 提取文档基本信息
-        paragraphs = [p.text for p in doc.paragraphs]
-        headings = [p.text for p in doc.paragraphs if p.style.name.startswith('Heading')]
+        # 提取文档基本信息：一次遍历段落，同时生成带编号的内容行和统计标题数
+        lines = []
+        heading_count = 0
+        for i, paragraph in enumerate(doc.paragraphs):
+            # 添加段落编号 (i) 在每段前
+            lines.append(f"[{i}] {paragraph.text}\n")
+            if paragraph.style.name.startswith('Heading'):
+                heading_count += 1
         
         # 构建文档信息头
         doc_info = (
             f"文件名: {os.path.basename(file_path)}\n"
-            f"段落数: {len(paragraphs)}\n"
-            f"标题数: {len(headings)}\n\n"
+            f"段落数: {len(lines)}\n"
+            f"标题数: {heading_count}\n\n"
         )
         
-        # 构建完整文档内容，保留段落结构，并在每段前添加段落编号
-        full_content = ""
-        for i, p_text in enumerate(paragraphs):
-            # 添加段落编号 (i) 在每段前
-            full_content += f"[{i}] {p_text}\n"
+        # 构建完整文档内容，保留段落结构；一次拼接，不再逐段复制已有内容
+        full_content = "".join(lines)
         
         # 返回文档信息和完整内容
         return doc_info + full_content
@@ -174,6 +229,7 @@ def open_and_read_word_document(file_path: str) -> str:
 
 
 @mcp.tool()
+@resolve_docx_path('file_path')
 def format_text_in_document(
     file_path: str,
     paragraph_index: int,
@@ -206,108 +262,64 @@ def format_text_in_document(
     if not docx_installed:
         return "错误: 无法格式化Word文档，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
-    # 定义高亮颜色映射 (用于XML着色)
-    highlight_color_map = {
-        "yellow": "FFFF00",      
-        "green": "00FF00",       
-        "blue": "0000FF",        
-        "red": "FF0000",         
-        "pink": "FFC0CB",        
-        "turquoise": "40E0D0",   
-        "violet": "EE82EE",      
-        "darkblue": "00008B",    
-        "teal": "008080",        
-        "darkred": "8B0000",     
-        "darkgreen": "006400"    
-    }
+    # 没有指定任何格式参数时不打开、不保存文档
+    if not any((font_name, font_size, bold, italic, underline, font_color, highlight_color)):
+        return "无变化: 未指定任何格式参数"
     
     # 校验高亮颜色
-    if highlight_color and highlight_color.lower() not in highlight_color_map:
-        return f"错误: 不支持的高亮颜色 '{highlight_color}'，可选值为: {', '.join(highlight_color_map.keys())}"
+    if highlight_color and highlight_color.lower() not in _HIGHLIGHT_COLOR_MAP:
+        return f"错误: 不支持的高亮颜色 '{highlight_color}'，可选值为: {_HIGHLIGHT_COLOR_NAMES}"
     
     try:
         # 打开Word文档
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
         # 检查段落索引是否有效
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return f"错误: 无效的段落索引 {paragraph_index}，文档共有 {len(doc.paragraphs)} 个段落"
+        paras = doc.paragraphs
+        if paragraph_index < 0 or paragraph_index >= len(paras):
+            return f"错误: 无效的段落索引 {paragraph_index}，文档共有 {len(paras)} 个段落"
         
         # 获取指定的段落
-        paragraph = doc.paragraphs[paragraph_index]
+        paragraph = paras[paragraph_index]
         
         # 检查段落是否有内容
         if not paragraph.text.strip():
             return f"警告: 段落 {paragraph_index+1} 为空或只包含空白字符，无法设置格式"
+        
+        # 颜色只解析一次，格式无效时在修改文档之前返回
+        rgb = None
+        if font_color:
+            rgb = _parse_rgb(font_color)
+            if rgb is None:
+                return f"错误: 无效的字体颜色格式 '{font_color}'，请使用十六进制RGB格式，如 '#FF0000'"
             
-        # 检查段落是否有run，如果没有，添加一个run
+        # 检查段落是否有run，如果没有，保留段落属性并把内容替换为一个包含原文本的run
         if len(paragraph.runs) == 0:
-            # 保存原始文本
-            original_text = paragraph.text
-            # 清空段落
-            for child in list(paragraph._element):
-                paragraph._element.remove(child)
-            # 添加新run
-            paragraph.add_run(original_text)
-        
-        # 应用格式设置
+            _replace_paragraph_text(paragraph._p, paragraph.text)
+        
+        # 设置高亮颜色（通过XML方式）
+        shd_template = None
+        if highlight_color:
+            shd_template = OxmlElement('w:shd')
+            shd_template.set(_QN_FILL, _HIGHLIGHT_COLOR_MAP[highlight_color.lower()])
+        
+        # 所有格式属性（包括中文字体）合并到一个rPr模板中，只构建一次；
+        # 每个run复制模板并替换其中涉及的属性，不再逐个属性查找和修改XML
+        rpr_template = _build_rpr_template(font_name, font_size, bold, italic, underline, rgb, shd_template)
         for run in paragraph.runs:
-            if font_name:
-                # 设置西文字体名
-                run.font.name = font_name
-                # 设置中文字体名（这是关键部分）
-                run._element.get_or_add_rPr().get_or_add_rFonts().set(qn('w:eastAsia'), font_name)
-            
-            if font_size:
-                run.font.size = Pt(font_size)
-            
-            run.font.bold = bold
-            run.font.italic = italic
-            run.font.underline = underline
-            
-            # 设置字体颜色
-            if font_color:
-                try:
-                    # 解析十六进制颜色值
-                    if font_color.startswith("#"):
-                        font_color = font_color[1:]
-                    r = int(font_color[0:2], 16)
-                    g = int(font_color[2:4], 16)
-                    b = int(font_color[4:6], 16)
-                    run.font.color.rgb = RGBColor(r, g, b)
-                except ValueError:
-                    return f"错误: 无效的字体颜色格式 '{font_color}'，请使用十六进制RGB格式，如 '#FF0000'"
-            
-            # 设置高亮颜色（通过XML方式）
-            if highlight_color:
-                shading_elm = OxmlElement('w:shd')
-                color_value = highlight_color_map[highlight_color.lower()]
-                shading_elm.set(qn('w:fill'), color_value)
-                run._element.get_or_add_rPr().append(shading_elm)
+            _replace_rpr(run._element, rpr_template)
         
         # 保存文档
-        doc.save(file_path)
+        save_doc(doc, file_path)
         
         return f"成功设置文档 {os.path.basename(file_path)} 第 {paragraph_index+1} 段落的格式"
     
     except Exception as e:
+        evict(file_path)
         return f"设置Word文档格式时出错: {str(e)}"
 
 @mcp.tool()
+@resolve_docx_path('file_path')
 def set_paragraph_spacing(
     file_path: str,
     paragraph_index: int,
@@ -343,33 +355,12 @@ def set_paragraph_spacing(
     if paragraph_index is None:
         return "错误: 必须提供段落索引(paragraph_index)参数"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
-    # 映射行间距规则
-    spacing_rule_map = {
-        "multiple": WD_LINE_SPACING.MULTIPLE,
-        "exact": WD_LINE_SPACING.EXACTLY,
-        "atLeast": WD_LINE_SPACING.AT_LEAST
-    }
-    
-    if line_spacing_rule not in spacing_rule_map:
+    if line_spacing_rule not in _SPACING_RULE_MAP:
         return f"错误: 无效的行间距规则 '{line_spacing_rule}'，可选值为: multiple, exact, atLeast"
     
     try:
         # 打开Word文档
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
         # 确保paragraph_index是整数
         try:
@@ -378,11 +369,12 @@ def set_paragraph_spacing(
             return f"错误: 段落索引必须是整数，收到的是: {paragraph_index}"
         
         # 检查段落索引是否有效
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return f"错误: 无效的段落索引 {paragraph_index}，文档共有 {len(doc.paragraphs)} 个段落"
+        paras = doc.paragraphs
+        if paragraph_index < 0 or paragraph_index >= len(paras):
+            return f"错误: 无效的段落索引 {paragraph_index}，文档共有 {len(paras)} 个段落"
         
         # 获取指定的段落
-        paragraph = doc.paragraphs[paragraph_index]
+        paragraph = paras[paragraph_index]
         
         # 设置段前间距
         if before_spacing is not None:
@@ -395,7 +387,7 @@ def set_paragraph_spacing(
         # 设置行间距
         if line_spacing is not None:
             # 设置行间距规则
-            paragraph.paragraph_format.line_spacing_rule = spacing_rule_map[line_spacing_rule]
+            paragraph.paragraph_format.line_spacing_rule = _SPACING_RULE_MAP[line_spacing_rule]
             
             # 根据规则设置行间距值
             if line_spacing_rule == "multiple":
@@ -404,13 +396,15 @@ def set_paragraph_spacing(
                 paragraph.paragraph_format.line_spacing = Pt(line_spacing)
         
         # 保存文档
-        doc.save(file_path)
+        save_doc(doc, file_path)
         
         return f"成功设置文档 {os.path.basename(file_path)} 第 {paragraph_index+1} 段落的间距"
     except Exception as e:
+        evict(file_path)
         return f"设置段落间距时出错: {str(e)}"
 
 @mcp.tool()
+@resolve_docx_path('file_path')
 def insert_image(
     file_path: str,
     image_path: str,
@@ -435,29 +429,8 @@ def insert_image(
     if not docx_installed:
         return "错误: 无法插入图片，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     # 处理图片路径，同样支持相对路径
-    if not os.path.isabs(image_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        image_path = os.path.join(base_path, image_path)
+    image_path = resolve_docx(image_path)
     
     # 检查图片文件是否存在
     if not os.path.exists(image_path):
@@ -465,11 +438,12 @@ def insert_image(
     
     try:
         # 打开Word文档
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
         # 检查指定段落是否有效
-        if after_paragraph >= len(doc.paragraphs):
-            return f"错误: 无效的段落索引 {after_paragraph}，文档共有 {len(doc.paragraphs)} 个段落"
+        paras = doc.paragraphs
+        if after_paragraph >= len(paras):
+            return f"错误: 无效的段落索引 {after_paragraph}，文档共有 {len(paras)} 个段落"
         
         # 在指定位置插入图片
         if after_paragraph == -1:
@@ -477,7 +451,7 @@ def insert_image(
             paragraph = doc.add_paragraph()
         else:
             # 在指定段落后插入新段落，然后插入图片
-            paragraph = doc.paragraphs[after_paragraph]
+            paragraph = paras[after_paragraph]
         
         # 设置图片尺寸
         if width and height:
@@ -494,13 +468,15 @@ def insert_image(
             run.add_picture(image_path)
         
         # 保存文档
-        doc.save(file_path)
+        save_doc(doc, file_path)
         
         return f"成功在文档 {os.path.basename(file_path)} 中插入图片 {os.path.basename(image_path)}"
     except Exception as e:
+        evict(file_path)
         return f"插入图片时出错: {str(e)}"
 
 @mcp.tool()
+@resolve_docx_path('file_path')
 def insert_table(
     file_path: str,
     rows: int,
@@ -527,63 +503,51 @@ def insert_table(
     if not docx_installed:
         return "错误: 无法插入表格，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     # 校验参数
     if rows <= 0 or cols <= 0:
         return "错误: 表格行数和列数必须大于0"
     
     try:
         # 打开Word文档
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
         # 检查指定段落是否有效
-        if after_paragraph >= len(doc.paragraphs):
-            return f"错误: 无效的段落索引 {after_paragraph}，文档共有 {len(doc.paragraphs)} 个段落"
+        paras = doc.paragraphs
+        if after_paragraph >= len(paras):
+            return f"错误: 无效的段落索引 {after_paragraph}，文档共有 {len(paras)} 个段落"
         
         # 在指定位置插入表格
         if after_paragraph == -1:
             # 在文档末尾插入表格
             table = doc.add_table(rows=rows, cols=cols)
         else:
-            # 获取指定段落的位置
-            paragraph = doc.paragraphs[after_paragraph]
-            # 在段落后插入表格
-            table = doc.add_table(rows=rows, cols=cols)
-            # 移动表格到指定段落后
-            paragraph._p.addnext(table._tbl)
+            # 直接在指定段落后创建表格（宽度与doc.add_table相同），而不是先追加到末尾再移动
+            tbl = CT_Tbl.new_tbl(rows, cols, doc._block_width)
+            paras[after_paragraph]._p.addnext(tbl)
+            table = Table(tbl, doc._body)
         
         # 设置表格样式
         table.style = style
         
-        # 如果提供了数据，填充表格内容
+        # 如果提供了数据，填充表格内容（新表格没有合并单元格，按行列顺序直接取w:tc，
+        # 不再为每个单元格调用table.cell重新计算整个表格的单元格网格）
         if data:
-            for i, row_data in enumerate(data):
-                if i < rows:  # 确保不超出表格行数
-                    for j, cell_data in enumerate(row_data):
-                        if j < cols:  # 确保不超出表格列数
-                            table.cell(i, j).text = str(cell_data)
+            tbl_rows = table._tbl.tr_lst
+            for row_idx, row_data in enumerate(data[:rows]):
+                tcs = tbl_rows[row_idx].tc_lst
+                for col_idx, cell_data in enumerate(row_data[:cols]):
+                    _set_cell_text(tcs[col_idx], str(cell_data))
         
         # 保存文档
-        doc.save(file_path)
+        save_doc(doc, file_path)
         
         return f"成功在文档 {os.path.basename(file_path)} 中插入 {rows}x{cols} 的表格"
     except Exception as e:
+        evict(file_path)
         return f"插入表格时出错: {str(e)}"
 
 @mcp.tool()
+@resolve_docx_path('file_path')
 def edit_table_cell(
     file_path: str,
     table_index: int,
@@ -608,30 +572,17 @@ def edit_table_cell(
     if not docx_installed:
         return "错误: 无法编辑表格，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
         # 打开Word文档
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
         # 检查表格索引是否有效
-        if table_index < 0 or table_index >= len(doc.tables):
-            return f"错误: 无效的表格索引 {table_index}，文档共有 {len(doc.tables)} 个表格"
+        tables = doc.tables
+        if table_index < 0 or table_index >= len(tables):
+            return f"错误: 无效的表格索引 {table_index}，文档共有 {len(tables)} 个表格"
         
         # 获取指定的表格
-        table = doc.tables[table_index]
+        table = tables[table_index]
         
         # 检查行索引是否有效
         if row < 0 or row >= len(table.rows):
@@ -645,10 +596,11 @@ def edit_table_cell(
         table.cell(row, col).text = text
         
         # 保存文档
-        doc.save(file_path)
+        save_doc(doc, file_path)
         
         return f"成功编辑文档 {os.path.basename(file_path)} 中第 {table_index+1} 个表格的单元格 ({row+1},{col+1})"
     except Exception as e:
+        evict(file_path)
         return f"编辑表格单元格时出错: {str(e)}"
 
 @mcp.tool()
@@ -662,47 +614,8 @@ def save_document_as_pdf(file_path: str) -> str:
     Returns:
         操作结果信息
     """
-    # 检查是否安装了必要的库
-    if not docx_installed:
-        return "错误: 无法导出PDF，请先安装python-docx库: pip install python-docx"
-    
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
-    try:
-        # 构建PDF文件路径
-        pdf_path = os.path.splitext(file_path)[0] + ".pdf"
-        
-        # 尝试使用Microsoft Word COM对象导出PDF
-        try:
-            import win32com.client
-            word = win32com.client.Dispatch("Word.Application")
-            word.Visible = False
-            
-            doc = word.Documents.Open(file_path)
-            doc.SaveAs(pdf_path, FileFormat=17)  # 17表示PDF格式
-            doc.Close()
-            word.Quit()
-            
-            return f"成功将文档导出为PDF: {os.path.basename(pdf_path)}"
-        
-        except ImportError:
-            # 如果没有win32com库或不是Windows系统，返回错误信息
-            return "错误: 导出PDF功能需要在Windows系统上安装pywin32库，请使用以下命令安装: pip install pywin32"
-    
-    except Exception as e:
-        return f"导出PDF时出错: {str(e)}"
+    # 复用共享的Word实例导出，只打开和关闭文档（实现见utils.saveMethod）
+    return _save_document_as_pdf(file_path)
 
 @mcp.tool()
 def save_document_as(file_path: str, output_format: str = "docx", new_filename: str = None) -> str:
@@ -717,108 +630,17 @@ def save_document_as(file_path: str, output_format: str = "docx", new_filename:
     Returns:
         操作结果信息
     """
-    # 检查是否安装了必要的库
-    if not docx_installed:
-        return "错误: 无法保存文档，请先安装python-docx库: pip install python-docx"
-    
-    # 检查格式是否支持
-    supported_formats = ["docx", "doc", "pdf", "txt", "html"]
-    if output_format.lower() not in supported_formats:
-        return f"错误: 不支持的输出格式 '{output_format}'，可选值为: {', '.join(supported_formats)}"
-    
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
-    try:
-        # 构建新文件路径
-        original_basename = os.path.splitext(os.path.basename(file_path))[0]
-        output_dirname = os.path.dirname(file_path)
-        
-        # 如果提供了新文件名，则使用新文件名
-        if new_filename:
-            output_basename = new_filename
-        else:
-            output_basename = original_basename
-        
-        # 创建新文件的完整路径
-        output_path = os.path.join(output_dirname, f"{output_basename}.{output_format}")
-        
-        # 根据输出格式选择不同的处理方式
-        if output_format.lower() == "pdf":
-            # 使用前面定义的导出PDF功能
-            return save_document_as_pdf(file_path)
-        
-        elif output_format.lower() in ["docx", "doc"]:
-            try:
-                # 尝试使用Microsoft Word COM对象保存
-                import win32com.client
-                word = win32com.client.Dispatch("Word.Application")
-                word.Visible = False
-                
-                # 使用数字格式指定不同的Word格式
-                format_map = {
-                    "docx": 16,  # wdFormatDocumentDefault (*.docx)
-                    "doc": 0     # wdFormatDocument97 (*.doc)
-                }
-                
-                doc = word.Documents.Open(file_path)
-                doc.SaveAs(output_path, FileFormat=format_map[output_format.lower()])
-                doc.Close()
-                word.Quit()
-                
-                return f"成功将文档保存为 {output_format} 格式: {os.path.basename(output_path)}"
-            
-            except ImportError:
-                # 如果是docx格式，我们可以使用python-docx直接保存
-                if output_format.lower() == "docx":
-                    doc = Document(file_path)
-                    doc.save(output_path)
-                    return f"成功将文档保存为 DOCX 格式: {os.path.basename(output_path)}"
-                else:
-                    return "错误: 保存为DOC格式需要在Windows系统上安装pywin32库"
-        
-        elif output_format.lower() == "txt":
-            # 将文档转换为纯文本
-            doc = Document(file_path)
-            text_content = "\n\n".join([para.text for para in doc.paragraphs if para.text.strip()])
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(text_content)
-            
-            return f"成功将文档保存为文本格式: {os.path.basename(output_path)}"
-        
-        elif output_format.lower() == "html":
-            try:
-                # 尝试使用Microsoft Word COM对象保存为HTML
-                import win32com.client
-                word = win32com.client.Dispatch("Word.Application")
-                word.Visible = False
-                
-                doc = word.Documents.Open(file_path)
-                doc.SaveAs(output_path, FileFormat=8)  # 8表示HTML格式
-                doc.Close()
-                word.Quit()
-                
-                return f"成功将文档保存为HTML格式: {os.path.basename(output_path)}"
-            
-            except ImportError:
-                return "错误: 保存为HTML格式需要在Windows系统上安装pywin32库"
-    
-    except Exception as e:
-        return f"保存文档时出错: {str(e)}"
+    # 复用共享的Word实例转换，只打开和关闭文档（实现见utils.saveMethod）
+    return _save_document_as(file_path, output_format, new_filename)
+
+def _close_cached_document(file_path: str, save_changes: bool) -> None:
+    """将缓存中未写盘的修改保存（save_changes为True时）或丢弃，并把文档移出缓存"""
+    if save_changes:
+        flush(file_path)
+    discard(file_path)
 
 @mcp.tool()
+@resolve_docx_path('file_path')
 def close_document(file_path: str, save_changes: bool = True) -> str:
     """
     关闭Word文档，可选是否保存更改。
@@ -834,31 +656,14 @@ def close_document(file_path: str, save_changes: bool = True) -> str:
     if not docx_installed:
         return "错误: 无法关闭文档，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
-        # 尝试使用Microsoft Word COM对象关闭文档
-        try:
-            import win32com.client
-            import pythoncom
-            
-            pythoncom.CoInitialize()
-            word = win32com.client.Dispatch("Word.Application")
-            
-            # 检查文档是否已经打开
-            doc_found = False
+        # 文档仍在共享的Word实例中打开时（例如之前的COM操作中途出错）在Word中关闭；
+        # Word尚未启动时不为此启动Word
+        word = running_word()
+        
+        # 检查文档是否已经打开
+        doc_found = False
+        if word is not None:
             for doc in word.Documents:
                 if os.path.abspath(doc.FullName) == os.path.abspath(file_path):
                     if save_changes:
@@ -866,31 +671,35 @@ def close_document(file_path: str, save_changes: bool = True) -> str:
                     doc.Close(SaveChanges=save_changes)
                     doc_found = True
                     break
-            
-            if not doc_found:
-                # 如果文档未打开，则python-docx中没有明确的关闭方法
-                # 这里我们模拟一个"关闭"操作，即打开文档后立即关闭
-                doc = Document(file_path)
-                if save_changes:
-                    doc.save(file_path)
-            
-            pythoncom.CoUninitialize()
-            
-            return f"成功关闭文档: {os.path.basename(file_path)}" + (" 并保存更改" if save_changes else "")
         
-        except ImportError:
-            # 如果没有win32com库，使用python-docx的方式
-            doc = Document(file_path)
-            if save_changes:
-                doc.save(file_path)
-            
-            # python-docx没有明确的关闭方法，垃圾收集器会处理
-            return f"成功关闭文档: {os.path.basename(file_path)}" + (" 并保存更改" if save_changes else "")
+        if doc_found:
+            # Word已经保存或放弃了修改，缓存中的文档不再有效
+            discard(file_path)
+        else:
+            # 文档未在Word中打开时关闭缓存中的文档
+            _close_cached_document(file_path, save_changes)
+        
+        return f"成功关闭文档: {os.path.basename(file_path)}" + (" 并保存更改" if save_changes else "")
     
     except Exception as e:
         return f"关闭文档时出错: {str(e)}"
 
 @mcp.tool()
+def save_all_documents() -> str:
+    """
+    保存所有以save=False修改、尚未写盘的文档。
+    
+    Returns:
+        操作结果信息
+    """
+    try:
+        saved_count = flush_all()
+        return f"成功保存 {saved_count} 个有未写盘修改的文档"
+    except Exception as e:
+        return f"保存文档时出错: {str(e)}"
+
+@mcp.tool()
+@resolve_docx_path('file_path')
 def edit_paragraph_in_document(
     file_path: str,
     paragraph_index: int,
@@ -913,57 +722,30 @@ def edit_paragraph_in_document(
     if not docx_installed:
         return "错误: 无法编辑Word文档，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
         # 打开Word文档
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
         # 检查段落索引是否有效
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return f"错误: 无效的段落索引 {paragraph_index}，文档共有 {len(doc.paragraphs)} 个段落"
+        paras = doc.paragraphs
+        if paragraph_index < 0 or paragraph_index >= len(paras):
+            return f"错误: 无效的段落索引 {paragraph_index}，文档共有 {len(paras)} 个段落"
         
         # 获取并编辑指定的段落
-        paragraph = doc.paragraphs[paragraph_index]
-        
-        # 保存原始样式和格式
-        original_style = paragraph.style
-        original_alignment = paragraph.alignment
-        
-        # 更简单安全的替换方法：清除所有runs并添加新文本
-        for run in paragraph.runs:
-            run.clear()
+        paragraph = paras[paragraph_index]
         
-        # 清空所有runs后，确保段落内容被清除
-        if paragraph.runs:
-            # 如果仍有runs，直接重新设置text属性
-            paragraph.text = ""
+        # 一次删除段落属性以外的全部内容再添加新文本，段落属性保持不变，样式和对齐方式无需恢复
+        _replace_paragraph_text(paragraph._p, new_text)
         
-        # 添加新内容
-        run = paragraph.add_run(new_text)
-        
-        # 恢复原始样式和格式
-        paragraph.style = original_style
-        paragraph.alignment = original_alignment
-        
-        # 保存文档
+        # 保存文档；不保存时修改保留在缓存中，之后由另一次保存或close_document写盘
         if save:
-            doc.save(file_path)
+            save_doc(doc, file_path)
+        else:
+            mark_dirty(doc, file_path)
         
         return f"成功编辑文档 {os.path.basename(file_path)} 第 {paragraph_index+1} 段落的内容"
     except Exception as e:
+        evict(file_path)
         return f"编辑Word文档内容时出错: {str(e)}"
 
 @mcp.tool()
@@ -989,132 +771,11 @@ def find_and_replace_text(
     Returns:
         操作结果信息
     """
-    # 检查是否安装了必要的库
-    if not docx_installed:
-        return "错误: 无法在Word文档中查找替换文本，请先安装python-docx库: pip install python-docx"
-    
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
-    try:
-        # 使用python-docx的方式（更可靠）
-        doc = Document(file_path)
-        replace_count = 0
-        
-        # 遍历所有段落和所有run
-        for paragraph in doc.paragraphs:
-            # 获取段落的完整文本
-            full_text = paragraph.text
-            if not match_case:
-                search_text = find_text.lower()
-                full_text_lower = full_text.lower()
-            else:
-                search_text = find_text
-                full_text_lower = full_text
-            
-            # 如果段落中包含要查找的文本
-            if search_text in full_text_lower:
-                # 清除所有runs
-                for run in paragraph.runs:
-                    run.clear()
-                
-                # 如果需要区分大小写
-                if match_case:
-                    # 直接替换
-                    new_text = full_text.replace(find_text, replace_text)
-                    replace_count += full_text.count(find_text)
-                else:
-                    # 不区分大小写的替换
-                    current_pos = 0
-                    new_text = ""
-                    while True:
-                        # 在剩余文本中查找目标字符串
-                        pos = full_text_lower[current_pos:].find(search_text)
-                        if pos == -1:
-                            # 没有找到更多匹配，添加剩余文本
-                            new_text += full_text[current_pos:]
-                            break
-                        
-                        # 添加匹配位置之前的文本
-                        new_text += full_text[current_pos:current_pos + pos]
-                        # 添加替换文本
-                        new_text += replace_text
-                        # 更新位置
-                        current_pos += pos + len(find_text)
-                        replace_count += 1
-                
-                # 添加新的run，包含替换后的文本
-                paragraph.add_run(new_text)
-        
-        # 遍历所有表格单元格
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        # 获取段落的完整文本
-                        full_text = paragraph.text
-                        if not match_case:
-                            search_text = find_text.lower()
-                            full_text_lower = full_text.lower()
-                        else:
-                            search_text = find_text
-                            full_text_lower = full_text
-                        
-                        # 如果段落中包含要查找的文本
-                        if search_text in full_text_lower:
-                            # 清除所有runs
-                            for run in paragraph.runs:
-                                run.clear()
-                            
-                            # 如果需要区分大小写
-                            if match_case:
-                                # 直接替换
-                                new_text = full_text.replace(find_text, replace_text)
-                                replace_count += full_text.count(find_text)
-                            else:
-                                # 不区分大小写的替换
-                                current_pos = 0
-                                new_text = ""
-                                while True:
-                                    # 在剩余文本中查找目标字符串
-                                    pos = full_text_lower[current_pos:].find(search_text)
-                                    if pos == -1:
-                                        # 没有找到更多匹配，添加剩余文本
-                                        new_text += full_text[current_pos:]
-                                        break
-                                    
-                                    # 添加匹配位置之前的文本
-                                    new_text += full_text[current_pos:current_pos + pos]
-                                    # 添加替换文本
-                                    new_text += replace_text
-                                    # 更新位置
-                                    current_pos += pos + len(find_text)
-                                    replace_count += 1
-                            
-                            # 添加新的run，包含替换后的文本
-                            paragraph.add_run(new_text)
-        
-        # 保存文档
-        if save:
-            doc.save(file_path)
-        
-        return f"成功在文档 {os.path.basename(file_path)} 中替换了 {replace_count} 处文本"
-    
-    except Exception as e:
-        return f"在Word文档中查找替换文本时出错: {str(e)}"
+    # 查找模式只编译一次，由正则引擎在段落文本中查找和替换（实现见utils.edit_operations）
+    return _find_and_replace_text(file_path, find_text, replace_text, match_case, match_whole_word, save)
 
 @mcp.tool()
+@resolve_docx_path('file_path')
 def delete_paragraph(
     file_path: str,
     paragraph_index: int,
@@ -1135,48 +796,38 @@ def delete_paragraph(
     if not docx_installed:
         return "错误: 无法编辑Word文档，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     try:
         # 打开Word文档
-        doc = Document(file_path)
-        
-        # 检查段落索引是否有效
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return f"错误: 无效的段落索引 {paragraph_index}，文档共有 {len(doc.paragraphs)} 个段落"
+        doc = get_doc(file_path)
         
-        # 获取要删除的段落
-        paragraph = doc.paragraphs[paragraph_index]
+        # 检查段落索引是否有效；直接取正文中的w:p元素，不为每个段落构造Paragraph对象
+        body = doc.element.body
+        p_elements = body.findall(_QN_P)
+        if paragraph_index < 0 or paragraph_index >= len(p_elements):
+            return f"错误: 无效的段落索引 {paragraph_index}，文档共有 {len(p_elements)} 个段落"
         
         # 删除段落
-        p = paragraph._element
-        p.getparent().remove(p)
-        
-        # 删除对象的引用
-        paragraph._p = None
-        paragraph._element = None
+        body.remove(p_elements[paragraph_index])
         
-        # 保存文档
+        # 保存文档；不保存时修改保留在缓存中，之后由另一次保存或close_document写盘
         if save:
-            doc.save(file_path)
+            save_doc(doc, file_path)
+        else:
+            mark_dirty(doc, file_path)
         
         return f"成功从文档 {os.path.basename(file_path)} 中删除第 {paragraph_index+1} 段落"
     except Exception as e:
+        evict(file_path)
         return f"删除Word文档段落时出错: {str(e)}"
 
+def _nth_paragraph(doc, n: int):
+    """返回正文第n个顶层段落的w:p元素（与doc.paragraphs[n]._p相同），只遍历到该段落为止"""
+    for p in islice(doc.element.body.iterchildren(_QN_P), n, None):
+        return p
+    raise IndexError(f"段落索引 {n} 超出范围")
+
 @mcp.tool()
+@resolve_docx_path('file_path')
 def insert_table_of_contents(
     file_path: str,
     title: str = "目录",
@@ -1199,20 +850,6 @@ def insert_table_of_contents(
     if not docx_installed:
         return "错误: 无法插入目录，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     # 校验参数
     if levels < 1 or levels > 9:
         return "错误: 目录级别数必须在1至9之间"
@@ -1221,69 +858,63 @@ def insert_table_of_contents(
         # 使用python-docx库直接添加目录XML标记比较复杂
         # 尝试使用Word COM对象添加目录
         try:
-            import win32com.client
-            import pythoncom
-            
-            pythoncom.CoInitialize()
-            word = win32com.client.Dispatch("Word.Application")
-            word.Visible = False
-            
-            doc = word.Documents.Open(file_path)
+            word = get_word()
             
-            # 将光标移动到指定段落后
-            if after_paragraph >= 0 and after_paragraph < doc.Paragraphs.Count:
-                # 修复：不再使用Select方法，改用EndOf和InsertAfter方法以保留原段落
-                range_to_insert = doc.Paragraphs(after_paragraph + 1).Range
-                range_to_insert.Collapse(0)  # 0表示wdCollapseEnd，折叠到段落末尾
-                
-                # 插入换行符创建新段落
-                range_to_insert.InsertParagraphAfter()
-                range_to_insert.Collapse(0)  # 再次折叠到末尾
-                
-                # 插入标题
-                if title:
-                    range_to_insert.Text = title
+            doc = open_document(word, file_path)
+            try:
+                # 将光标移动到指定段落后
+                if after_paragraph >= 0 and after_paragraph < doc.Paragraphs.Count:
+                    # 修复：不再使用Select方法，改用EndOf和InsertAfter方法以保留原段落
+                    range_to_insert = doc.Paragraphs(after_paragraph + 1).Range
+                    range_to_insert.Collapse(0)  # 0表示wdCollapseEnd，折叠到段落末尾
+                    
+                    # 插入换行符创建新段落
                     range_to_insert.InsertParagraphAfter()
-                    range_to_insert.Collapse(0)
-                
-                # 插入目录
-                toc_range = range_to_insert
-                toc_range.Fields.Add(Range=toc_range, Type=-1, Text=f"TOC \\o \"1-{levels}\" \\h", PreserveFormatting=True)
-            else:
-                # 在文档开头插入目录
-                range_to_insert = doc.Paragraphs(1).Range
-                range_to_insert.Collapse(1)  # 1表示wdCollapseStart，折叠到段落开头
+                    range_to_insert.Collapse(0)  # 再次折叠到末尾
+                    
+                    # 插入标题
+                    if title:
+                        range_to_insert.Text = title
+                        range_to_insert.InsertParagraphAfter()
+                        range_to_insert.Collapse(0)
+                    
+                    # 插入目录
+                    toc_range = range_to_insert
+                    toc_range.Fields.Add(Range=toc_range, Type=-1, Text=f"TOC \\o \"1-{levels}\" \\h", PreserveFormatting=True)
+                else:
+                    # 在文档开头插入目录
+                    range_to_insert = doc.Paragraphs(1).Range
+                    range_to_insert.Collapse(1)  # 1表示wdCollapseStart，折叠到段落开头
+                    
+                    # 插入标题
+                    if title:
+                        range_to_insert.Text = title
+                        range_to_insert.InsertParagraphAfter()
+                        range_to_insert.Collapse(0)
+                    
+                    # 插入目录
+                    toc_range = range_to_insert
+                    toc_range.Fields.Add(Range=toc_range, Type=-1, Text=f"TOC \\o \"1-{levels}\" \\h", PreserveFormatting=True)
                 
-                # 插入标题
-                if title:
-                    range_to_insert.Text = title
-                    range_to_insert.InsertParagraphAfter()
-                    range_to_insert.Collapse(0)
+                # 更新目录
+                if doc.TablesOfContents.Count > 0:
+                    doc.TablesOfContents(1).Update()
                 
-                # 插入目录
-                toc_range = range_to_insert
-                toc_range.Fields.Add(Range=toc_range, Type=-1, Text=f"TOC \\o \"1-{levels}\" \\h", PreserveFormatting=True)
-            
-            # 更新目录
-            if doc.TablesOfContents.Count > 0:
-                doc.TablesOfContents(1).Update()
-            
-            # 保存并关闭
-            doc.Save()
-            doc.Close()
-            word.Quit()
-            
-            pythoncom.CoUninitialize()
+                # 保存
+                doc.Save()
+            finally:
+                doc.Close(SaveChanges=0)  # 0 = wdDoNotSaveChanges
             
             return f"成功在文档 {os.path.basename(file_path)} 中插入目录"
         
         except ImportError:
             # 使用python-docx的方式添加目录（功能受限）
-            doc = Document(file_path)
+            doc = get_doc(file_path)
             
             # 检查指定段落是否有效
-            if after_paragraph >= len(doc.paragraphs):
-                return f"错误: 无效的段落索引 {after_paragraph}，文档共有 {len(doc.paragraphs)} 个段落"
+            paras = doc.paragraphs
+            if after_paragraph >= len(paras):
+                return f"错误: 无效的段落索引 {after_paragraph}，文档共有 {len(paras)} 个段落"
             
             # 修复：在指定位置插入目录标题，确保不删除原段落
             if after_paragraph == 0:
@@ -1291,11 +922,11 @@ def insert_table_of_contents(
                 if title:
                     # 将标题插入到第一段前
                     heading_para = doc.add_paragraph(title, style="Heading 1")
-                    first_para = doc.paragraphs[1]._p  # 获取原第一段
+                    first_para = _nth_paragraph(doc, 1)  # 获取原第一段
                     heading_para._p.addnext(first_para)  # 确保原第一段仍然在标题后
             else:
                 # 在指定段落后插入
-                paragraph = doc.paragraphs[after_paragraph]
+                paragraph = paras[after_paragraph]
                 if title:
                     new_para = doc.add_paragraph()
                     # 确保新段落在指定段落之后
@@ -1307,10 +938,11 @@ def insert_table_of_contents(
             toc_para = doc.add_paragraph()
             # 确保目录段落在标题之后，不覆盖原有内容
             if title:
+                # 插入标题后段落位置已变化，按位置直接取段落元素，不再重新构建doc.paragraphs
                 if after_paragraph == 0:
-                    doc.paragraphs[1]._p.addnext(toc_para._p)
+                    _nth_paragraph(doc, 1).addnext(toc_para._p)
                 else:
-                    doc.paragraphs[after_paragraph + 1]._p.addnext(toc_para._p)
+                    _nth_paragraph(doc, after_paragraph + 1).addnext(toc_para._p)
             else:
                 paragraph._p.addnext(toc_para._p)
             
@@ -1318,7 +950,7 @@ def insert_table_of_contents(
             
             # 添加目录字段XML（这是一个简化版，功能受限）
             fldChar = OxmlElement('w:fldChar')
-            fldChar.set(qn('w:fldCharType'), 'begin')
+            fldChar.set(_QN_FLDCHARTYPE, 'begin')
             toc_run._r.append(fldChar)
             
             instrText = OxmlElement('w:instrText')
@@ -1326,19 +958,21 @@ def insert_table_of_contents(
             toc_run._r.append(instrText)
             
             fldChar = OxmlElement('w:fldChar')
-            fldChar.set(qn('w:fldCharType'), 'end')
+            fldChar.set(_QN_FLDCHARTYPE, 'end')
             toc_run._r.append(fldChar)
             
             # 保存文档
-            doc.save(file_path)
+            save_doc(doc, file_path)
             
             # 注意：使用python-docx添加的目录需要在Word中手动更新
             return f"成功在文档 {os.path.basename(file_path)} 中插入目录（需要在Word中手动更新）"
     
     except Exception as e:
+        evict(file_path)
         return f"插入目录时出错: {str(e)}"
 
 @mcp.tool()
+@resolve_docx_path('file_path')
 def add_header_footer(
     file_path: str,
     header_text: str = None,
@@ -1361,20 +995,6 @@ def add_header_footer(
     if not docx_installed:
         return "错误: 无法添加页眉页脚，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     # 检查是否提供了有效的参数
     if header_text is None and footer_text is None and not page_numbers:
         return "错误: 请至少提供页眉文本、页脚文本或启用页码"
@@ -1382,45 +1002,38 @@ def add_header_footer(
     try:
         # 尝试使用Word COM对象添加页眉页脚（功能最完整）
         try:
-            import win32com.client
-            import pythoncom
-            
-            pythoncom.CoInitialize()
-            word = win32com.client.Dispatch("Word.Application")
-            word.Visible = False
+            word = get_word()
             
-            doc = word.Documents.Open(file_path)
-            
-            # 添加页眉
-            if header_text:
-                for section in range(1, doc.Sections.Count + 1):
-                    header = doc.Sections(section).Headers(1)  # 1表示主页眉
-                    header.Range.Text = header_text
-            
-            # 添加页脚
-            if footer_text or page_numbers:
-                for section in range(1, doc.Sections.Count + 1):
-                    footer = doc.Sections(section).Footers(1)  # 1表示主页脚
-                    
-                    if footer_text:
-                        footer.Range.Text = footer_text
-                    
-                    # 添加页码
-                    if page_numbers:
-                        footer.PageNumbers.Add()
-            
-            # 保存并关闭
-            doc.Save()
-            doc.Close()
-            word.Quit()
-            
-            pythoncom.CoUninitialize()
+            doc = open_document(word, file_path)
+            try:
+                # 添加页眉
+                if header_text:
+                    for section in range(1, doc.Sections.Count + 1):
+                        header = doc.Sections(section).Headers(1)  # 1表示主页眉
+                        header.Range.Text = header_text
+                
+                # 添加页脚
+                if footer_text or page_numbers:
+                    for section in range(1, doc.Sections.Count + 1):
+                        footer = doc.Sections(section).Footers(1)  # 1表示主页脚
+                        
+                        if footer_text:
+                            footer.Range.Text = footer_text
+                        
+                        # 添加页码
+                        if page_numbers:
+                            footer.PageNumbers.Add()
+                
+                # 保存
+                doc.Save()
+            finally:
+                doc.Close(SaveChanges=0)  # 0 = wdDoNotSaveChanges
             
             return f"成功为文档 {os.path.basename(file_path)} 添加页眉页脚"
         
         except ImportError:
             # 使用python-docx的方式添加页眉页脚（功能受限）
-            doc = Document(file_path)
+            doc = get_doc(file_path)
             
             # 获取所有节
             sections = doc.sections
@@ -1450,7 +1063,7 @@ def add_header_footer(
                     run = footer_para.add_run()
                     
                     fldChar = OxmlElement('w:fldChar')
-                    fldChar.set(qn('w:fldCharType'), 'begin')
+                    fldChar.set(_QN_FLDCHARTYPE, 'begin')
                     run._r.append(fldChar)
                     
                     instrText = OxmlElement('w:instrText')
@@ -1458,20 +1071,22 @@ def add_header_footer(
                     run._r.append(instrText)
                     
                     fldChar = OxmlElement('w:fldChar')
-                    fldChar.set(qn('w:fldCharType'), 'end')
+                    fldChar.set(_QN_FLDCHARTYPE, 'end')
                     run._r.append(fldChar)
                     
                     footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
             
             # 保存文档
-            doc.save(file_path)
+            save_doc(doc, file_path)
             
             return f"成功为文档 {os.path.basename(file_path)} 添加页眉页脚"
     
     except Exception as e:
+        evict(file_path)
         return f"添加页眉页脚时出错: {str(e)}"
 
 @mcp.tool()
+@resolve_docx_path('file_path')
 def set_page_layout(
     file_path: str,
     orientation: str = None,
@@ -1504,32 +1119,13 @@ def set_page_layout(
     if not docx_installed:
         return "错误: 无法设置页面布局，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     # 校验方向参数
-    orientation_map = {
-        "portrait": WD_ORIENTATION.PORTRAIT,
-        "landscape": WD_ORIENTATION.LANDSCAPE
-    }
-    
-    if orientation and orientation.lower() not in orientation_map:
+    if orientation and orientation.lower() not in _ORIENTATION_MAP:
         return f"错误: 无效的页面方向 '{orientation}'，可选值为: portrait, landscape"
     
     try:
         # 打开Word文档
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
         # 检查节索引是否有效
         if section_index < 0 or section_index >= len(doc.sections):
@@ -1540,7 +1136,7 @@ def set_page_layout(
         
         # 设置页面方向
         if orientation:
-            section.orientation = orientation_map[orientation.lower()]
+            section.orientation = _ORIENTATION_MAP[orientation.lower()]
         
         # 设置页面尺寸
         if page_width and page_height:
@@ -1561,13 +1157,15 @@ def set_page_layout(
             section.bottom_margin = Cm(bottom_margin)
         
         # 保存文档
-        doc.save(file_path)
+        save_doc(doc, file_path)
         
         return f"成功设置文档 {os.path.basename(file_path)} 第 {section_index+1} 节的页面布局"
     except Exception as e:
+        evict(file_path)
         return f"设置页面布局时出错: {str(e)}"
 
 @mcp.tool()
+@resolve_docx_path('main_file_path', 'files_to_merge', optional=('main_file_path',))
 def merge_documents(
     main_file_path: str,
     files_to_merge: List[str]
@@ -1586,77 +1184,46 @@ def merge_documents(
     if not docx_installed:
         return "错误: 无法合并文档，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(main_file_path):
-        # 从环境变量获取基础路径
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        
-        # 构建完整路径
-        main_file_path = os.path.join(base_path, main_file_path)
-    
     # 校验参数
     if not files_to_merge:
         return "错误: 请提供至少一个要合并的文档"
     
-    # 处理文件路径
-    processed_files = []
-    for file_path in files_to_merge:
-        if not os.path.isabs(file_path):
-            # 从环境变量获取基础路径
-            base_path = os.environ.get('OFFICE_EDIT_PATH')
-            if not base_path:
-                base_path = os.path.join(os.path.expanduser('~'), '桌面')
-            
-            # 构建完整路径
-            file_path = os.path.join(base_path, file_path)
-        
-        # 确保文件存在
-        if not os.path.exists(file_path):
-            return f"错误: 文件 {file_path} 不存在"
-        
-        processed_files.append(file_path)
-    
     try:
+        # Word直接读取磁盘上的文件，先写入缓存中未写盘的修改
+        for path in (main_file_path, *files_to_merge):
+            flush(path)
+        
         # 尝试使用Word COM对象合并文档（功能最完整）
         try:
-            import win32com.client
-            import pythoncom
-            
-            pythoncom.CoInitialize()
-            word = win32com.client.Dispatch("Word.Application")
-            word.Visible = False
+            word = get_word()
             
             # 检查主文档是否存在，如果不存在则创建
-            if not os.path.exists(main_file_path):
-                doc = word.Documents.Add()
-                doc.SaveAs(main_file_path)
-            else:
-                doc = word.Documents.Open(main_file_path)
-            
-            # 记录成功合并的文档数量
-            merged_count = 0
-            
-            # 合并每个文档
-            for file_path in processed_files:
-                # 将光标移动到文档末尾
-                word.Selection.EndKey(Unit=6)  # 6表示wdStory，即整个文档
+            create_new = not os.path.exists(main_file_path)
+            doc = word.Documents.Add() if create_new else open_document(word, main_file_path)
+            try:
+                # 记录成功合并的文档数量
+                merged_count = 0
                 
-                # 插入分节符
-                if merged_count > 0:
-                    word.Selection.InsertBreak(Type=2)  # 2表示wdSectionBreakNextPage
+                # 合并每个文档
+                for file_path in files_to_merge:
+                    # 将光标移动到文档末尾
+                    word.Selection.EndKey(Unit=6)  # 6表示wdStory，即整个文档
+                    
+                    # 插入分节符
+                    if merged_count > 0:
+                        word.Selection.InsertBreak(Type=2)  # 2表示wdSectionBreakNextPage
+                    
+                    # 插入文档内容
+                    word.Selection.InsertFile(file_path)
+                    merged_count += 1
                 
-                # 插入文档内容
-                word.Selection.InsertFile(file_path)
-                merged_count += 1
-            
-            # 保存并关闭
-            doc.Save()
-            doc.Close()
-            word.Quit()
-            
-            pythoncom.CoUninitialize()
+                # 保存
+                if create_new:
+                    doc.SaveAs(main_file_path)
+                else:
+                    doc.Save()
+            finally:
+                doc.Close(SaveChanges=0)  # 0 = wdDoNotSaveChanges
             
             return f"成功将 {merged_count} 个文档合并到 {os.path.basename(main_file_path)}"
         
@@ -1664,67 +1231,41 @@ def merge_documents(
             # 使用python-docx方式合并文档（功能受限）
             # 检查主文档是否存在，如果不存在则创建
             if os.path.exists(main_file_path):
-                main_doc = Document(main_file_path)
+                main_doc = get_doc(main_file_path)
             else:
                 main_doc = Document()
             
             # 记录成功合并的文档数量
             merged_count = 0
             
+            # 在线程池中同时读取和解析所有待合并的文档（解压和XML解析期间释放GIL），再按顺序拼接
+            with ThreadPoolExecutor(max_workers=min(len(files_to_merge), os.cpu_count() or 1)) as executor:
+                docs_to_merge = list(executor.map(get_doc, files_to_merge))
+            
             # 合并每个文档
-            for file_path in processed_files:
-                # 打开要合并的文档
-                doc_to_merge = Document(file_path)
-                
+            for doc_to_merge in docs_to_merge:
                 # 插入分节符（如果不是第一个文档）
                 if merged_count > 0:
                     main_doc.add_section()
                 
-                # 复制所有段落
-                for paragraph in doc_to_merge.paragraphs:
-                    # 创建新段落
-                    new_paragraph = main_doc.add_paragraph()
-                    
-                    # 复制文本和格式
-                    for run in paragraph.runs:
-                        new_run = new_paragraph.add_run(run.text)
-                        new_run.bold = run.bold
-                        new_run.italic = run.italic
-                        new_run.underline = run.underline
-                        if run.font.size:
-                            new_run.font.size = run.font.size
-                        if run.font.name:
-                            new_run.font.name = run.font.name
-                    
-                    # 复制段落格式
-                    new_paragraph.style = paragraph.style
-                    new_paragraph.alignment = paragraph.alignment
-                
-                # 复制所有表格
-                for table in doc_to_merge.tables:
-                    # 创建新表格
-                    new_table = main_doc.add_table(rows=len(table.rows), cols=len(table.columns))
-                    new_table.style = table.style
-                    
-                    # 复制所有单元格内容
-                    for i, row in enumerate(table.rows):
-                        for j, cell in enumerate(row.cells):
-                            if i < len(new_table.rows) and j < len(new_table.rows[i].cells):
-                                new_table.rows[i].cells[j].text = cell.text
+                # 直接复制正文的顶层XML元素，按原顺序完整保留段落、表格及其格式
+                _append_body_elements(main_doc, doc_to_merge)
                 
                 merged_count += 1
             
             # 保存合并后的文档
-            main_doc.save(main_file_path)
+            save_doc(main_doc, main_file_path)
             
             return f"成功将 {merged_count} 个文档合并到 {os.path.basename(main_file_path)}"
     
     except Exception as e:
+        evict(main_file_path)
         return f"合并文档时出错: {str(e)}"
 @mcp.tool()
+@resolve_docx_path('file_path')
 def batch_process_document_structure(
     file_path: str,
-    structure: List[Dict[str, Any]],
+    structure: _Operations,
     clear_existing: bool = False
 ) -> str:
     """
@@ -1790,45 +1331,31 @@ def batch_process_document_structure(
     if not docx_installed:
         return "错误: 无法批量处理文档，请先安装python-docx库: pip install python-docx"
     
-    # 检查是否提供了完整路径
-    if not os.path.isabs(file_path):
-        base_path = os.environ.get('OFFICE_EDIT_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        file_path = os.path.join(base_path, file_path)
-    
-    # 确保文件存在
-    if not os.path.exists(file_path):
-        return f"错误: 文件 {file_path} 不存在"
-    
     # 校验结构参数
     if not structure or not isinstance(structure, list):
         return "错误: 请提供有效的文档结构数组"
     
     try:
         # 打开Word文档
-        doc = Document(file_path)
+        doc = get_doc(file_path)
         
-        # 如果需要清空现有内容
+        # 如果需要清空现有内容：一次遍历正文的子元素，删除所有段落和表格
         if clear_existing:
-            # 删除所有段落
-            for paragraph in doc.paragraphs:
-                p = paragraph._element
-                p.getparent().remove(p)
-            
-            # 删除所有表格
-            for table in doc.tables:
-                t = table._element
-                t.getparent().remove(t)
+            body = doc.element.body
+            removable_tags = (_QN_P, _QN_TBL)
+            for child in list(body):
+                if child.tag in removable_tags:
+                    body.remove(child)
         
-        # 批量处理每个结构元素
+        # 批量处理每个结构元素；标题和列表样式按名称只查找一次
         processed_count = 0
+        styles = {}
         
         for item in structure:
             element_type = item.get('type', '').lower()
             
             if element_type == 'heading':
-                _process_heading_element(doc, item)
+                _process_heading_element(doc, item, styles)
                 processed_count += 1
                 
             elif element_type == 'paragraph':
@@ -1840,7 +1367,7 @@ def batch_process_document_structure(
                 processed_count += 1
                 
             elif element_type == 'list':
-                _process_list_element(doc, item)
+                _process_list_element(doc, item, styles)
                 processed_count += 1
                 
             elif element_type == 'image':
@@ -1856,25 +1383,36 @@ def batch_process_document_structure(
                 continue
         
         # 保存文档
-        doc.save(file_path)
+        save_doc(doc, file_path)
         
         return f"成功批量处理文档 {os.path.basename(file_path)}，共处理 {processed_count} 个元素"
         
     except Exception as e:
+        evict(file_path)
         return f"批量处理文档结构时出错: {str(e)}"
 
-def _process_heading_element(doc: Document, item: Dict[str, Any]):
+def _cached_style(doc: "Document", styles: Dict[str, Any], name: str):
+    """按名称获取样式对象，同一次批量处理中每个样式只在样式部件中查找一次"""
+    style = styles.get(name)
+    if style is None:
+        style = styles[name] = doc.styles[name]
+    return style
+
+def _process_heading_element(doc: "Document", item: Dict[str, Any], styles: Dict[str, Any]):
     """处理标题元素"""
     content = item.get('content', '')
     level = item.get('level', 1)
     
-    # 添加标题
-    heading = doc.add_heading(content, level=level)
+    # 添加标题（与doc.add_heading相同：0级为Title样式）
+    if not 0 <= level <= 9:
+        raise ValueError(f"标题级别必须在0到9之间: {level}")
+    style_name = "Title" if level == 0 else f"Heading {level}"
+    heading = doc.add_paragraph(content, _cached_style(doc, styles, style_name))
     
     # 应用格式
     _apply_text_formatting(heading, item)
 
-def _process_paragraph_element(doc: Document, item: Dict[str, Any]):
+def _process_paragraph_element(doc: "Document", item: Dict[str, Any]):
     """处理段落元素"""
     content = item.get('content', '')
     
@@ -1885,7 +1423,7 @@ def _process_paragraph_element(doc: Document, item: Dict[str, Any]):
     _apply_text_formatting(paragraph, item)
     _apply_paragraph_formatting(paragraph, item)
 
-def _process_table_element(doc: Document, item: Dict[str, Any]):
+def _process_table_element(doc: "Document", item: Dict[str, Any]):
     """处理表格元素"""
     rows = item.get('rows', 2)
     cols = item.get('cols', 2)
@@ -1896,33 +1434,32 @@ def _process_table_element(doc: Document, item: Dict[str, Any]):
     table = doc.add_table(rows=rows, cols=cols)
     table.style = style
     
-    # 填充数据
-    for i, row_data in enumerate(data):
-        if i < rows:
-            for j, cell_data in enumerate(row_data):
-                if j < cols:
-                    table.cell(i, j).text = str(cell_data)
+    # 填充数据（新表格没有合并单元格，按行列顺序直接取w:tc写入文本）
+    tbl_rows = table._tbl.tr_lst
+    for row_idx, row_data in enumerate(data[:rows]):
+        tcs = tbl_rows[row_idx].tc_lst
+        for col_idx, cell_data in enumerate(row_data[:cols]):
+            _set_cell_text(tcs[col_idx], str(cell_data))
 
-def _process_list_element(doc: Document, item: Dict[str, Any]):
+def _process_list_element(doc: "Document", item: Dict[str, Any], styles: Dict[str, Any]):
     """处理列表元素"""
     items = item.get('items', [])
     list_type = item.get('list_type', 'bullet')
     
     style_name = 'List Bullet' if list_type == 'bullet' else 'List Number'
+    style = _cached_style(doc, styles, style_name)
     
     for list_item in items:
-        paragraph = doc.add_paragraph(str(list_item), style=style_name)
+        doc.add_paragraph(str(list_item), style=style)
 
-def _process_image_element(doc: Document, item: Dict[str, Any], base_file_path: str):
+def _process_image_element(doc: "Document", item: Dict[str, Any], base_file_path: str):
     """处理图片元素"""
     image_path = item.get('path', '')
     width = item.get('width')
     height = item.get('height')
     
-    # 处理相对路径
-    if not os.path.isabs(image_path):
-        base_dir = os.path.dirname(base_file_path)
-        image_path = os.path.join(base_dir, image_path)
+    # 相对路径基于文档所在目录
+    image_path = resolve_docx(image_path, os.path.dirname(base_file_path))
     
     # 检查图片是否存在
     if not os.path.exists(image_path):
@@ -1943,48 +1480,40 @@ def _process_image_element(doc: Document, item: Dict[str, Any], base_file_path:
 
 def _apply_text_formatting(paragraph, item: Dict[str, Any]):
     """应用文本格式"""
-    font_size = item.get('font_size')
-    font_family = item.get('font_family')
-    bold = item.get('bold')
-    italic = item.get('italic')
-    underline = item.get('underline')
-    color = item.get('color')
-    alignment = item.get('alignment')
-    
-    # 应用字体格式到所有runs
+    get = item.get
+    font_size = get('font_size')
+    font_family = get('font_family')
+    bold = get('bold')
+    italic = get('italic')
+    underline = get('underline')
+    color = get('color')
+    alignment = get('alignment')
+    
+    # 字号和颜色只转换一次，所有runs共用（颜色解析结果在调用之间缓存）；颜色格式无效时忽略颜色
+    size = Pt(int(font_size)) if font_size else None
+    rgb = _parse_rgb(color) if color else None
+    
+    # 应用字体格式到所有runs；每次访问run.font都会新建Font对象，每个run只取一次
     for run in paragraph.runs:
-        if font_size:
-            run.font.size = Pt(int(font_size))
+        font = run.font
+        if size is not None:
+            font.size = size
         if font_family:
-            run.font.name = font_family
-            run._element.get_or_add_rPr().get_or_add_rFonts().set(qn('w:eastAsia'), font_family)
+            _set_run_fonts(run._element, font_family)
         if bold is not None:
-            run.font.bold = bold
+            font.bold = bold
         if italic is not None:
-            run.font.italic = italic
+            font.italic = italic
         if underline is not None:
-            run.font.underline = underline
-        if color:
-            try:
-                if color.startswith("#"):
-                    color = color[1:]
-                r = int(color[0:2], 16)
-                g = int(color[2:4], 16)
-                b = int(color[4:6], 16)
-                run.font.color.rgb = RGBColor(r, g, b)
-            except:
-                pass
+            font.underline = underline
+        if rgb is not None:
+            font.color.rgb = rgb
     
     # 应用段落对齐
     if alignment:
-        alignment_map = {
-            'left': WD_ALIGN_PARAGRAPH.LEFT,
-            'center': WD_ALIGN_PARAGRAPH.CENTER,
-            'right': WD_ALIGN_PARAGRAPH.RIGHT,
-            'justify': WD_ALIGN_PARAGRAPH.JUSTIFY
-        }
-        if alignment.lower() in alignment_map:
-            paragraph.alignment = alignment_map[alignment.lower()]
+        alignment_value = _ALIGNMENT_MAP.get(alignment.lower())
+        if alignment_value is not None:
+            paragraph.alignment = alignment_value
 
 def _apply_paragraph_formatting(paragraph, item: Dict[str, Any]):
     """应用段落格式"""
@@ -4,69 +4,78 @@ MCP Server for Word Document Operations
 This server provides tools to create, edit and manage Word documents.
 It's implemented using the Model Context Protocol (MCP) Python SDK.
 """
-from utils.createWordorTxt import create_empty_txt as create_txt_file, create_word_document as create_word_file
+import importlib
+import importlib.util
 import os
 import sys
 import io
 from mcp.server.fastmcp import FastMCP
-from typing import Optional, List, Dict, Any, Union, Tuple
-from utils.batch_paragraph_operations import (
-    batch_add_formatted_paragraphs, batch_format_paragraphs,batch_set_paragraph_spacing)
-from utils.media_table_operations import (
-    batch_insert_images, batch_insert_tables, batch_edit_table_cells,insert_table_of_contents as insert_toc_func
-)
-from utils.saveMethod import (save_document_as_pdf as save_pdf,
-                                save_document_as as save_as)
-from utils.document_operations import (
-    open_and_read_word_document as read_document,
-    close_document as close_doc
-)
-from utils.edit_operations import (
-    edit_paragraph_in_document as edit_paragraph_func,
-    find_and_replace_text as find_replace_func,
-    delete_paragraph as delete_paragraph_func
-)
-from utils.document_formatting import (
-    add_header_footer as add_header_footer_func,
-    set_page_layout as set_page_layout_func,
-    merge_documents as merge_documents_func,
-    apply_consistent_formatting as apply_consistent_formatting_func
-)
-from utils.advanced_formatting import (
-    add_text_box, add_drop_cap, add_word_art, add_custom_bullets
-)
-from utils.style_management import (
-    create_custom_style, apply_style, export_document_styles,
-    import_document_styles, copy_style_between_documents
-)
-
-
-# 标记库是否已安装
-docx_installed = True
-
-# 尝试导入python-docx库，如果没有安装则标记为未安装但不退出
-try:
-    import docx
-    from docx import Document
-    from docx.shared import Pt, RGBColor, Inches, Cm
-    from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
-    from docx.enum.section import WD_ORIENTATION, WD_SECTION
-    from docx.oxml.ns import qn
-    from docx.oxml import OxmlElement
-    import docx.opc.constants
-except ImportError:
+from typing import Annotated, Optional, List, Dict, Any, Union, Tuple
+from pydantic import SkipValidation
+
+
+def _lazy(module_name: str, attr: str):
+    """
+    返回转发到module_name.attr的函数，模块在第一次调用时才导入。
+    
+    各工具模块都依赖python-docx等较重的库，而一次会话通常只用到其中几个工具，
+    按需导入可以缩短服务器的启动时间。
+    """
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(module_name), attr)(*args, **kwargs)
+    call.__name__ = attr
+    return call
+
+
+create_txt_file = _lazy('utils.createWordorTxt', 'create_empty_txt')
+create_word_file = _lazy('utils.createWordorTxt', 'create_word_document')
+batch_add_formatted_paragraphs = _lazy('utils.batch_paragraph_operations', 'batch_add_formatted_paragraphs')
+batch_format_paragraphs = _lazy('utils.batch_paragraph_operations', 'batch_format_paragraphs')
+batch_set_paragraph_spacing = _lazy('utils.batch_paragraph_operations', 'batch_set_paragraph_spacing')
+batch_document_operations = _lazy('utils.batch_paragraph_operations', 'batch_document_operations')
+batch_insert_images = _lazy('utils.media_table_operations', 'batch_insert_images')
+batch_insert_tables = _lazy('utils.media_table_operations', 'batch_insert_tables')
+batch_edit_table_cells = _lazy('utils.media_table_operations', 'batch_edit_table_cells')
+insert_toc_func = _lazy('utils.media_table_operations', 'insert_table_of_contents')
+save_pdf = _lazy('utils.saveMethod', 'save_document_as_pdf')
+save_as = _lazy('utils.saveMethod', 'save_document_as')
+read_document = _lazy('utils.document_operations', 'open_and_read_word_document')
+close_doc = _lazy('utils.document_operations', 'close_document')
+save_all_docs = _lazy('utils.document_operations', 'save_all_documents')
+edit_paragraph_func = _lazy('utils.edit_operations', 'edit_paragraph_in_document')
+find_replace_func = _lazy('utils.edit_operations', 'find_and_replace_text')
+delete_paragraph_func = _lazy('utils.edit_operations', 'delete_paragraph')
+add_header_footer_func = _lazy('utils.document_formatting', 'add_header_footer')
+set_page_layout_func = _lazy('utils.document_formatting', 'set_page_layout')
+merge_documents_func = _lazy('utils.document_formatting', 'merge_documents')
+apply_consistent_formatting_func = _lazy('utils.document_formatting', 'apply_consistent_formatting')
+add_text_box = _lazy('utils.advanced_formatting', 'add_text_box')
+add_drop_cap = _lazy('utils.advanced_formatting', 'add_drop_cap')
+add_word_art = _lazy('utils.advanced_formatting', 'add_word_art')
+add_custom_bullets = _lazy('utils.advanced_formatting', 'add_custom_bullets')
+create_custom_style = _lazy('utils.style_management', 'create_custom_style')
+apply_style = _lazy('utils.style_management', 'apply_style')
+export_document_styles = _lazy('utils.style_management', 'export_document_styles')
+import_document_styles = _lazy('utils.style_management', 'import_document_styles')
+copy_style_between_documents = _lazy('utils.style_management', 'copy_style_between_documents')
+
+
+# 标记库是否已安装：只查找模块，不在启动时导入
+docx_installed = importlib.util.find_spec("docx") is not None
+if not docx_installed:
     print("警告: 未检测到python-docx库，Word文档功能将不可用")
     print("请使用以下命令安装: pip install python-docx")
-    docx_installed = False
 
-# 尝试导入Pillow库，用于图片处理
-pillow_installed = True
-try:
-    from PIL import Image
-except ImportError:
+# Pillow库用于图片处理
+pillow_installed = importlib.util.find_spec("PIL") is not None
+if not pillow_installed:
     print("警告: 未检测到Pillow库，图片处理功能将受限")
     print("请使用以下命令安装: pip install Pillow")
-    pillow_installed = False
+
+
+# 批量工具的操作列表可能很大，FastMCP默认会按类型逐项校验每次调用的参数；
+# 这里跳过校验但保留生成的JSON Schema，每个操作的字段由工具函数自己检查
+_Operations = Annotated[List[Dict[str, Any]], SkipValidation]
 
 # 创建一个MCP服务器，保持名称与配置文件一致
 mcp = FastMCP("office editor")
@@ -117,7 +126,8 @@ def open_and_read_word_document(file_path: str) -> str:
 @mcp.tool()
 def batch_add_formatted_text(
     file_path: str, 
-    paragraphs_data: List[Dict[str, Any]]
+    paragraphs_data: _Operations,
+    save: bool = True
 ) -> str:
     """
     批量添加格式化段落到Word文档。
@@ -139,18 +149,22 @@ def batch_add_formatted_text(
             - before_spacing: 段前间距磅值（可选）
             - after_spacing: 段后间距磅值（可选）
             - line_spacing: 行间距值（可选）
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，连续多次批量操作只需解析一次文档，
+              最后一次操作时保存，或调用close_document、save_all_documents写盘；
+              导出、另存为和进程退出前会自动写盘
     
     Returns:
         操作结果信息
     """
-    return batch_add_formatted_paragraphs(file_path, paragraphs_data)
+    return batch_add_formatted_paragraphs(file_path, paragraphs_data, save=save)
 
 
 
 @mcp.tool()
 def batch_format_document_text(
     file_path: str,
-    format_operations: List[Dict[str, Any]]
+    format_operations: _Operations,
+    save: bool = True
 ) -> str:
     """
     批量设置Word文档中多个段落的文本格式。
@@ -166,17 +180,21 @@ def batch_format_document_text(
             - underline: 是否下划线（可选，默认False）
             - font_color: 字体颜色十六进制RGB格式如"#FF0000"（可选）
             - highlight_color: 突出显示颜色（可选，支持yellow/green/blue/red等）
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，连续多次批量操作只需解析一次文档，
+              最后一次操作时保存，或调用close_document、save_all_documents写盘；
+              导出、另存为和进程退出前会自动写盘
     
     Returns:
         操作结果信息
     """
-    return batch_format_paragraphs(file_path, format_operations)
+    return batch_format_paragraphs(file_path, format_operations, save=save)
 
 
 @mcp.tool()
 def batch_set_document_spacing(
     file_path: str,
-    spacing_operations: List[Dict[str, Any]]
+    spacing_operations: _Operations,
+    save: bool = True
 ) -> str:
     """
     批量设置Word文档中多个段落的间距。
@@ -189,17 +207,49 @@ def batch_set_document_spacing(
             - after_spacing: 段后间距磅值（可选）
             - line_spacing: 行间距值（可选）
             - line_spacing_rule: 行间距规则（可选，multiple/exact/atLeast，默认multiple）
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，连续多次批量操作只需解析一次文档，
+              最后一次操作时保存，或调用close_document、save_all_documents写盘；
+              导出、另存为和进程退出前会自动写盘
+    
+    Returns:
+        操作结果信息
+    """
+    return batch_set_paragraph_spacing(file_path, spacing_operations, save=save)
+
+
+@mcp.tool()
+def batch_document_ops(
+    file_path: str,
+    ops: _Operations,
+    save: bool = True
+) -> str:
+    """
+    在一次打开和保存中按顺序执行多种批量段落操作，代替依次调用
+    batch_add_formatted_text、batch_format_document_text和batch_set_document_spacing。
+    
+    Args:
+        file_path: Word文档的完整路径或相对于输出目录的路径
+        ops: 操作列表，按顺序执行，每个元素包含：
+            - op: 操作类型（必需），add/format/spacing
+            - op为add时，其余字段与batch_add_formatted_text的段落数据相同
+            - op为format时，其余字段与batch_format_document_text的格式化操作相同
+            - op为spacing时，其余字段与batch_set_document_spacing的间距操作相同
+            - 段落索引以执行到该操作时的文档为准，之前添加的段落会计算在内
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，连续多次批量操作只需解析一次文档，
+              最后一次操作时保存，或调用close_document、save_all_documents写盘；
+              导出、另存为和进程退出前会自动写盘
     
     Returns:
         操作结果信息
     """
-    return batch_set_paragraph_spacing(file_path, spacing_operations)
+    return batch_document_operations(file_path, ops, save=save)
 
 
 @mcp.tool()
 def batch_insert_document_images(
     file_path: str,
-    images_data: List[Dict[str, Any]]
+    images_data: _Operations,
+    save: bool = True
 ) -> str:
     """
     批量在Word文档中插入图片。
@@ -211,17 +261,21 @@ def batch_insert_document_images(
             - width: 图片宽度厘米（可选）
             - height: 图片高度厘米（可选）
             - after_paragraph: 插入位置段落索引（可选，默认-1表示文档末尾）
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，连续多次批量操作只需解析一次文档，
+              最后一次操作时保存，或调用close_document、save_all_documents写盘；
+              导出、另存为和进程退出前会自动写盘
     
     Returns:
         操作结果信息
     """
-    return batch_insert_images(file_path, images_data)
+    return batch_insert_images(file_path, images_data, save=save)
 
 
 @mcp.tool()
 def batch_insert_document_tables(
     file_path: str,
-    tables_data: List[Dict[str, Any]]
+    tables_data: _Operations,
+    save: bool = True
 ) -> str:
     """
     批量在Word文档中插入表格。
@@ -234,17 +288,21 @@ def batch_insert_document_tables(
             - data: 表格内容二维数组（可选）
             - after_paragraph: 插入位置段落索引（可选，默认-1表示文档末尾）
             - style: 表格样式（可选，默认"Table Grid"）
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，连续多次批量操作只需解析一次文档，
+              最后一次操作时保存，或调用close_document、save_all_documents写盘；
+              导出、另存为和进程退出前会自动写盘
     
     Returns:
         操作结果信息
     """
-    return batch_insert_tables(file_path, tables_data)
+    return batch_insert_tables(file_path, tables_data, save=save)
 
 
 @mcp.tool()
 def batch_edit_document_table_cells(
     file_path: str,
-    edit_operations: List[Dict[str, Any]]
+    edit_operations: _Operations,
+    save: bool = True
 ) -> str:
     """
     批量编辑Word文档中表格的单元格内容。
@@ -257,11 +315,14 @@ def batch_edit_document_table_cells(
                 - row: 行索引（从0开始）
                 - col: 列索引（从0开始）
                 - text: 单元格内容
+        save: 是否立即保存，默认为True；为False时修改保留在内存中，连续多次批量操作只需解析一次文档，
+              最后一次操作时保存，或调用close_document、save_all_documents写盘；
+              导出、另存为和进程退出前会自动写盘
     
     Returns:
         操作结果信息
     """
-    return batch_edit_table_cells(file_path, edit_operations)
+    return batch_edit_table_cells(file_path, edit_operations, save=save)
 
 
 @mcp.tool()
@@ -291,7 +352,6 @@ def save_document_as(file_path: str, output_format: str = "docx", new_filename:
     Returns:
         操作结果信息
     """
-    from .utils.saveMethod import save_document_as as save_as
     return save_as(file_path, output_format, new_filename)
 
 
@@ -310,6 +370,17 @@ def close_document(file_path: str, save_changes: bool = True) -> str:
     return close_doc(file_path, save_changes)
 
 
+@mcp.tool()
+def save_all_documents() -> str:
+    """
+    保存所有以save=False修改、尚未写盘的文档。
+    
+    Returns:
+        操作结果信息
+    """
+    return save_all_docs()
+
+
 @mcp.tool()
 def edit_paragraph_in_document(
     file_path: str,